@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AggregatesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'aggregates'
+
+    def ready(self):
+        # Register receivers which keep fond summaries up to date
+        from aggregates import signals  # noqa: F401
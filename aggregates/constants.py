@@ -0,0 +1,11 @@
+"""Constants used in aggregates app"""
+
+# Inventory list fields which summaries are made of,
+# changes of other fields don't touch summaries
+SUMMARY_FIELDS = frozenset({'fond', 'electronic', 'total_items', 'start_date', 'end_date'})
+
+# Number of fonds recomputed with one query by 'rebuild_aggregates'
+AGGREGATES_CHUNK_SIZE = 100
+
+# Number of inventory lists whose fonds are looked up with one query
+AGGREGATES_LOOKUP_CHUNK = 500
@@ -0,0 +1,38 @@
+"""Management command which computes fond summaries again"""
+
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aggregates.constants import AGGREGATES_CHUNK_SIZE
+from aggregates.models import FondSummary
+from fonds.models import Fond
+from helpers.routers import using_database
+from project.shards import project_databases
+
+
+class Command(BaseCommand):
+    help = 'Computes summaries of fonds and projects again from inventory lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=AGGREGATES_CHUNK_SIZE,
+                            help='Number of fonds computed in one transaction')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size should be positive')
+
+        started = time.monotonic()
+        written = 0
+        # Common database and every attached project database
+        for alias in project_databases():
+            with using_database(alias):
+                fond_ids = Fond.objects.order_by('pk').values_list('pk', flat=True).iterator()
+                while chunk := list(islice(fond_ids, options['chunk_size'])):
+                    written += FondSummary.rebuild_chunk(chunk)
+                    self.stdout.write(f'{written} fonds computed')
+
+        # Summaries of deleted fonds are deleted with them
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} fond summaries computed in {time.monotonic() - started:.1f} s'))
@@ -0,0 +1,246 @@
+"""Module contains aggregates app models"""
+
+import logging
+from functools import reduce
+from itertools import islice
+from operator import or_
+from typing import Dict, Iterable, List
+
+from django.db import OperationalError, models, router, transaction
+from django.db.models import Case, Count, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from retry import retry
+
+from aggregates.constants import AGGREGATES_LOOKUP_CHUNK
+from fonds.models import Fond
+from helpers.constants import TRIES, DELAY, BACKOFF, JITTER
+from inventories.models import Inventory
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('inventories', 'electronic', 'total_items')
+
+
+def summarize(inventories: Iterable[Inventory]) -> Dict[int, dict]:
+    """Return totals of inventory lists by fond id"""
+    totals = {}
+    for inventory in inventories:
+        fond_totals = totals.setdefault(inventory.fond_id, {
+            'inventories': 0, 'electronic': 0, 'total_items': 0,
+            'start_date': None, 'end_date': None})
+        fond_totals['inventories'] += 1
+        fond_totals['electronic'] += bool(inventory.electronic)
+        fond_totals['total_items'] += inventory.total_items or 0
+        if inventory.start_date and (fond_totals['start_date'] is None
+                                     or inventory.start_date < fond_totals['start_date']):
+            fond_totals['start_date'] = inventory.start_date
+        if inventory.end_date and (fond_totals['end_date'] is None
+                                   or inventory.end_date > fond_totals['end_date']):
+            fond_totals['end_date'] = inventory.end_date
+    return totals
+
+
+def _by_fond(fond_ids: List[int], totals: Dict[int, dict], field: str, default) -> Case:
+    """Return CASE which chooses value of field by fond primary key"""
+    return Case(*[When(pk=fond_id, then=Value(totals[fond_id][field])) for fond_id in fond_ids],
+                default=default)
+
+
+class FondSummary(models.Model):
+    """Represents 'fond_summaries' table in database.
+
+    Totals of fond's inventory lists, which are changed by deltas when
+    inventory lists are created, changed or deleted (see 'aggregates.signals'),
+    so they are read without aggregating 'inventory_lists'. Project has
+    one fond with the same primary key, so it is project summary as well.
+
+    When inventory list with first start date or last end date of fond
+    is deleted, dates are marked stale and found again on next read.
+    """
+    fond = models.OneToOneField(Fond, on_delete=models.CASCADE, primary_key=True,
+                                related_name='summary')
+    inventories = models.IntegerField(default=0)
+    electronic = models.IntegerField(default=0)
+    total_items = models.BigIntegerField(default=0)
+    start_date = models.DateField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    dates_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'fond_summaries'
+
+    def __str__(self):
+        return f'{self.fond_id}, {self.inventories} inventory lists'
+
+    @property
+    def paper(self) -> int:
+        """Number of paper inventory lists"""
+        return self.inventories - self.electronic
+
+    def as_dict(self) -> dict:
+        return {
+            'fond': self.fond_id,
+            'inventories': self.inventories,
+            'electronic': self.electronic,
+            'paper': self.paper,
+            'total_items': self.total_items,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+        }
+
+    @staticmethod
+    def for_fond(fond_id: int) -> 'FondSummary':
+        """Return summary of fond or project.
+
+        Summary is read by primary key, stale dates are found
+        again. Fond without summary gets empty one.
+        """
+        summary = FondSummary.objects.filter(pk=fond_id).first()
+        if summary is None:
+            return FondSummary(fond_id=fond_id)
+        if summary.dates_stale:
+            summary.refresh_dates()
+        return summary
+
+    @staticmethod
+    def totals() -> dict:
+        """Return totals of all fonds, one row per fond is read"""
+        totals = FondSummary.objects.aggregate(
+            fonds=Count('pk'),
+            **{counter: Coalesce(Sum(counter), 0) for counter in COUNTERS})
+        totals['paper'] = totals['inventories'] - totals['electronic']
+        return totals
+
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+    def refresh_dates(self) -> None:
+        """Find first start date and last end date of fond again"""
+        dates = Inventory.objects.filter(fond_id=self.fond_id).aggregate(
+            start_date=Min('start_date'), end_date=Max('end_date'))
+        self.start_date, self.end_date = dates['start_date'], dates['end_date']
+        self.dates_stale = False
+        FondSummary.objects.filter(pk=self.fond_id).update(dates_stale=False, **dates)
+
+    @staticmethod
+    def create_empty(fond_ids: Iterable[int]) -> None:
+        """Create summaries of new fonds"""
+        FondSummary.objects.bulk_create([FondSummary(fond_id=fond_id) for fond_id in fond_ids],
+                                        ignore_conflicts=True)
+
+    @staticmethod
+    def add(inventories: Iterable[Inventory]) -> None:
+        """Add created inventory lists to summaries of their fonds.
+
+        Deltas of many fonds are written with one UPDATE, fond's delta
+        is chosen by CASE on its primary key.
+        """
+        now = timezone.now()
+        totals = summarize(inventories)
+        fond_ids = list(totals)
+        for start in range(0, len(fond_ids), AGGREGATES_LOOKUP_CHUNK):
+            chunk = fond_ids[start:start + AGGREGATES_LOOKUP_CHUNK]
+            changes = {counter: F(counter) + _by_fond(chunk, totals, counter, Value(0))
+                       for counter in COUNTERS}
+            starts = [When(Q(pk=fond_id) & (Q(start_date__isnull=True)
+                                            | Q(start_date__gt=totals[fond_id]['start_date'])),
+                           then=Value(totals[fond_id]['start_date']))
+                      for fond_id in chunk if totals[fond_id]['start_date'] is not None]
+            if starts:
+                changes['start_date'] = Case(*starts, default=F('start_date'))
+            ends = [When(Q(pk=fond_id) & (Q(end_date__isnull=True)
+                                          | Q(end_date__lt=totals[fond_id]['end_date'])),
+                         then=Value(totals[fond_id]['end_date']))
+                    for fond_id in chunk if totals[fond_id]['end_date'] is not None]
+            if ends:
+                changes['end_date'] = Case(*ends, default=F('end_date'))
+
+            updated = FondSummary.objects.filter(pk__in=chunk).update(updated_at=now, **changes)
+            if updated < len(chunk):
+                # Fonds created before summaries were kept
+                existing = set(FondSummary.objects.filter(pk__in=chunk)
+                               .values_list('pk', flat=True))
+                FondSummary.recompute([fond_id for fond_id in chunk if fond_id not in existing])
+
+    @staticmethod
+    def remove(inventories: Iterable[Inventory]) -> None:
+        """Remove deleted inventory lists from summaries of their fonds"""
+        now = timezone.now()
+        totals = summarize(inventories)
+        fond_ids = list(totals)
+        for start in range(0, len(fond_ids), AGGREGATES_LOOKUP_CHUNK):
+            chunk = fond_ids[start:start + AGGREGATES_LOOKUP_CHUNK]
+            changes = {counter: F(counter) - _by_fond(chunk, totals, counter, Value(0))
+                       for counter in COUNTERS}
+            # First or last date is removed, so it is found again on read
+            stale = []
+            for fond_id in chunk:
+                boundaries = []
+                if totals[fond_id]['start_date'] is not None:
+                    boundaries.append(Q(start_date__gte=totals[fond_id]['start_date']))
+                if totals[fond_id]['end_date'] is not None:
+                    boundaries.append(Q(end_date__lte=totals[fond_id]['end_date']))
+                if boundaries:
+                    stale.append(When(Q(pk=fond_id) & reduce(or_, boundaries), then=Value(True)))
+            if stale:
+                changes['dates_stale'] = Case(*stale, default=F('dates_stale'))
+
+            FondSummary.objects.filter(pk__in=chunk).update(updated_at=now, **changes)
+
+    @staticmethod
+    def recompute(fond_ids: List[int]) -> int:
+        """Compute summaries of fonds from their inventory lists.
+
+        Totals of all fonds are computed with one query.
+
+        Returns:
+            Number of written summaries.
+        """
+        now = timezone.now()
+        # Fond which is being deleted doesn't get new summary
+        summaries = {fond_id: FondSummary(fond_id=fond_id, updated_at=now)
+                     for fond_id in Fond.objects.filter(pk__in=fond_ids)
+                     .values_list('pk', flat=True)}
+        rows = (Inventory.objects
+                .filter(fond_id__in=list(summaries))
+                .values('fond_id')
+                .annotate(inventories=Count('pk'),
+                          electronic=Count('pk', filter=Q(electronic=True)),
+                          total_items=Coalesce(Sum('total_items'), 0),
+                          start_date=Min('start_date'),
+                          end_date=Max('end_date')))
+        for row in rows:
+            summary = summaries[row.pop('fond_id')]
+            for field, value in row.items():
+                setattr(summary, field, value)
+
+        FondSummary.objects.bulk_create(
+            summaries.values(),
+            update_conflicts=True,
+            unique_fields=['fond'],
+            update_fields=[*COUNTERS, 'start_date', 'end_date', 'dates_stale', 'updated_at'])
+        return len(summaries)
+
+    @staticmethod
+    def recompute_inventories(pks: Iterable[int], fond_ids: Iterable[int] = ()) -> None:
+        """Compute summaries of fonds to which inventory lists belong.
+
+        Args:
+            pks: Primary keys of inventory lists.
+            fond_ids: Other fonds which are computed as well, for
+              example fonds from which inventory lists were moved.
+        """
+        pks = iter(pks)
+        fond_ids = set(fond_ids)
+        while chunk := list(islice(pks, AGGREGATES_LOOKUP_CHUNK)):
+            fond_ids.update(Inventory.objects.filter(pk__in=chunk)
+                            .values_list('fond_id', flat=True).distinct())
+        if fond_ids:
+            FondSummary.recompute(sorted(fond_ids))
+
+    @staticmethod
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+    def rebuild_chunk(fond_ids: List[int]) -> int:
+        """Compute summaries of fonds in one transaction"""
+        with transaction.atomic(using=router.db_for_write(FondSummary)):
+            return FondSummary.recompute(fond_ids)
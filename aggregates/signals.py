@@ -0,0 +1,62 @@
+"""Module contains signal receivers which keep fond summaries up to date"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from aggregates.constants import SUMMARY_FIELDS
+from aggregates.models import FondSummary
+from fonds.models import Fond
+from helpers.signals import bulk_created, queryset_updated
+from inventories.models import Inventory
+
+
+def _changes_summary(update_fields) -> bool:
+    return update_fields is None or bool(SUMMARY_FIELDS.intersection(update_fields))
+
+
+@receiver(post_save, sender=Fond)
+def create_summary(sender, instance, created, **kwargs):
+    if created:
+        FondSummary.create_empty([instance.pk])
+
+
+@receiver(pre_save, sender=Inventory)
+def remember_totals(sender, instance, update_fields=None, **kwargs):
+    # Saved values are replaced, so they are read before save
+    instance._summary_previous = None
+    if not instance._state.adding and _changes_summary(update_fields):
+        instance._summary_previous = (Inventory.objects.filter(pk=instance.pk)
+                                      .only('fond', *SUMMARY_FIELDS - {'fond'}).first())
+
+
+@receiver(post_save, sender=Inventory)
+def add_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        FondSummary.add([instance])
+        return
+
+    previous = getattr(instance, '_summary_previous', None)
+    if previous is not None and _changes_summary(update_fields):
+        FondSummary.remove([previous])
+        FondSummary.add([instance])
+
+
+@receiver(post_delete, sender=Inventory)
+def remove_deleted(sender, instance, **kwargs):
+    FondSummary.remove([instance])
+
+
+@receiver(bulk_created)
+def add_bulk_created(sender, instances, **kwargs):
+    if sender is Inventory:
+        FondSummary.add(instance for instance in instances if instance.pk is not None)
+    elif sender is Fond:
+        FondSummary.create_empty(instance.pk for instance in instances)
+
+
+@receiver(queryset_updated)
+def recompute_updated(sender, pks, fields, previous=None, **kwargs):
+    # Previous values are not known, so fonds are computed again,
+    # fonds which moved inventory lists left as well
+    if sender is Inventory and SUMMARY_FIELDS.intersection(fields):
+        FondSummary.recompute_inventories(pks, (previous or {}).get('fond', ()))
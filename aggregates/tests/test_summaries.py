@@ -0,0 +1,108 @@
+"""Module contains tests for aggregates app"""
+
+import datetime
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from aggregates.models import FondSummary
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.models import Project
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': False,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+def inventory_list(number: int, start: int, end: int, electronic: bool = False) -> dict:
+    return {**INVENTORY_LIST, 'number': number, 'electronic': electronic,
+            'start_date': datetime.date(start, 1, 1), 'end_date': datetime.date(end, 12, 31)}
+
+
+def computed(fond: Fond) -> dict:
+    """Return summary computed from inventory lists"""
+    FondSummary.recompute([fond.pk])
+    return FondSummary.for_fond(fond.pk).as_dict()
+
+
+class SummaryTest(TestCase):
+    """Class for testing incrementally kept fond summaries"""
+
+    def setUp(self):
+        self.project = Project.add_project('Projekts')
+        institution = Institution.add_institution(1, 'Iestāde', project=self.project)
+        self.fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                  False, institution)
+        Inventory.bulk_import_from_vvais([
+            inventory_list(1, 1990, 1995),
+            inventory_list(2, 1980, 1999, electronic=True),
+            inventory_list(3, 1985, 1990),
+        ], self.fond)
+
+    def assertSummary(self, **expected):
+        summary = FondSummary.for_fond(self.project.pk).as_dict()
+        self.assertEqual({key: summary[key] for key in expected}, expected)
+        # Deltas give the same summary as computing it again
+        self.assertEqual(summary, computed(self.fond))
+
+    def test_bulk_import(self):
+        """Test that imported inventory lists are added to summary"""
+        self.assertSummary(inventories=3, electronic=1, paper=2, total_items=180,
+                           start_date='1980-01-01', end_date='1999-12-31')
+
+    def test_save_and_delete(self):
+        """Test that changed and deleted inventory lists change summary"""
+        inventory = Inventory.objects.get(number=2)
+        inventory.electronic = False
+        inventory.total_items = 10
+        inventory.save()
+        self.assertSummary(electronic=0, total_items=130, end_date='1999-12-31')
+
+        inventory.delete()
+        self.assertSummary(inventories=2, total_items=120,
+                           start_date='1985-01-01', end_date='1995-12-31')
+
+        Inventory.objects.filter(number=1).update(end_date=datetime.date(2001, 5, 1))
+        self.assertSummary(end_date='2001-05-01')
+
+    def test_move(self):
+        """Test that moved inventory lists leave summary of their former fond"""
+        project = Project.add_project('Cits')
+        institution = Institution.add_institution(2, 'Cita iestāde', project=project)
+        other = Fond.add_fond('F2', 'LNA', 'Valsts arhivs', 401, 'Cits', False, institution)
+
+        Inventory.objects.filter(number__in=[1, 2]).update(fond=other)
+        self.assertSummary(inventories=1, electronic=0, total_items=60,
+                           start_date='1985-01-01', end_date='1990-12-31')
+        self.assertEqual(FondSummary.for_fond(other.pk).as_dict(), computed(other))
+        self.assertEqual(FondSummary.for_fond(other.pk).inventories, 2)
+
+        Inventory.objects.filter(number=2).update(fond_id=self.fond.pk)
+        self.assertSummary(inventories=2, electronic=1)
+        self.assertEqual(FondSummary.for_fond(other.pk).inventories, 1)
+
+    def test_read(self):
+        """Test that summary is read with one query"""
+        with CaptureQueriesContext(connection) as queries:
+            FondSummary.for_fond(self.fond.pk)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(FondSummary.totals(), {'fonds': 1, 'inventories': 3, 'electronic': 1,
+                                                'paper': 2, 'total_items': 180})
+
+    def test_rebuild(self):
+        """Test that rebuilt summaries match inventory lists"""
+        FondSummary.objects.all().delete()
+        self.assertEqual(FondSummary.for_fond(self.fond.pk).inventories, 0)
+
+        call_command('rebuild_aggregates', '--chunk-size', '1', stdout=io.StringIO())
+        self.assertSummary(inventories=3, total_items=180)
@@ -0,0 +1,9 @@
+"""Benchmarks of imports, validation and project queries.
+
+Run with::
+
+    python -m benchmarks --size 100k --output results.json
+
+Benchmarks use a throwaway database filled by 'benchmarks.generator',
+so the project database is never touched.
+"""
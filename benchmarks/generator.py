@@ -0,0 +1,126 @@
+"""Synthetic archive data generator.
+
+Generated values are valid VVAIS values, so the same rows can be used
+for validation, import and query benchmarks.
+"""
+
+import datetime
+import random
+from typing import Iterator, List, Optional
+
+from fonds.models import Fond
+from helpers.constants import VVAIS_STORAGE_TERM, VVAIS_TYPE
+from inventories.models import Inventory
+from project.hierarchy import import_projects
+
+INVENTORIES_PER_FOND = 1000
+
+# Share of electronic inventory lists
+ELECTRONIC_RATIO = 0.3
+
+# Postfix is required by validation, most inventory lists have 'a'
+POSTFIXES = ['a'] * 17 + ['b', 'c', 'd']
+
+ARCHIVES = [
+    ('LVA', 'Latvijas Valsts arhīvs'),
+    ('LVVA', 'Latvijas Valsts vēstures arhīvs'),
+    ('KFFDA', 'Latvijas Valsts kinofotofonodokumentu arhīvs'),
+]
+
+INSTITUTION_NAMES = ['pašvaldība', 'slimnīca', 'skola', 'ministrija', 'pārvalde', 'muzejs']
+
+
+def generate_inventories(count: int,
+                         seed: int = 0,
+                         first_number: int = 1,
+                         electronic_ratio: float = ELECTRONIC_RATIO) -> Iterator[dict]:
+    """Yield VVAIS inventory rows.
+
+    Args:
+        count: Number of rows.
+        seed: Random seed, same seed gives the same rows.
+        first_number: Number of first inventory list.
+        electronic_ratio: Share of electronic inventory lists.
+    """
+    rng = random.Random(seed)
+    for number in range(first_number, first_number + count):
+        start = datetime.date(rng.randint(1920, 2020), rng.randint(1, 12), 1)
+        years = rng.randint(0, 10)
+        total_items = rng.randint(1, 500)
+        yield {
+            'number': number,
+            'postfix': rng.choice(POSTFIXES),
+            'type': rng.choice(VVAIS_TYPE),
+            'electronic': rng.random() < electronic_ratio,
+            'last_gv': rng.randint(0, total_items),
+            'start_date': start,
+            'end_date': start.replace(year=start.year + years),
+            'storage_term': rng.choice(VVAIS_STORAGE_TERM),
+            'items_per_period': max(total_items // (years + 1), 1),
+            'total_items': total_items,
+        }
+
+
+def generate_projects(count: int, seed: int = 0, first: int = 1) -> List[dict]:
+    """Return project descriptions for 'import_projects' without inventories"""
+    rng = random.Random(seed)
+    projects = []
+    for index in range(first, first + count):
+        abbreviation, title = rng.choice(ARCHIVES)
+        name = f'{rng.choice(INSTITUTION_NAMES).capitalize()} {index}'
+        projects.append({
+            'name': f'Projekts {index}',
+            'institution': {
+                'reg_nr': 40000000000 + index,
+                'name': name,
+                'creator': 'Anna Bērziņa',
+                'creator_position': 'arhivāre',
+                'signer': 'Jānis Kalniņš',
+                'signer_position': 'vadītājs',
+            },
+            'fond': {
+                'fond_code': f'{abbreviation}F{index}',
+                'arch_abbreviation': abbreviation,
+                'arch_title': title,
+                'fond_number': index,
+                'fond_title': f'{name} fonds',
+                'subfond': rng.random() < 0.1,
+            },
+        })
+    return projects
+
+
+def create_archive(inventories: int,
+                   seed: int = 0,
+                   per_fond: int = INVENTORIES_PER_FOND,
+                   batch_size: Optional[int] = None) -> List[Fond]:
+    """Fill database with projects and inventory lists.
+
+    Inventory lists are streamed into batched import,
+    so memory usage does not depend on archive size.
+
+    Args:
+        inventories: Total number of inventory lists.
+        seed: Random seed.
+        per_fond: Number of inventory lists in one fond.
+        batch_size: Import batch size.
+
+    Returns:
+        List of created fonds.
+    """
+    fond_count = max((inventories + per_fond - 1) // per_fond, 1)
+    projects = import_projects(generate_projects(fond_count, seed))
+    if not isinstance(projects, list):
+        raise RuntimeError(f'Projects were not created: {projects}')
+
+    fonds = list(Fond.objects.filter(institution_id__in=[project.pk for project in projects])
+                 .order_by('pk'))
+    left = inventories
+    for index, fond in enumerate(fonds):
+        count = min(per_fond, left)
+        left -= count
+        rows = generate_inventories(count, seed=seed + index)
+        kwargs = {'batch_size': batch_size} if batch_size else {}
+        Inventory.bulk_import_from_vvais(rows, fond, **kwargs)
+
+    return fonds
@@ -0,0 +1,244 @@
+"""Benchmark runner.
+
+Benchmarks run in a throwaway database which is filled by
+'vvais_import' benchmark. Results are written as JSON, so results
+of different commits can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+BENCHMARKS: Dict[str, Callable[[int, int], Tuple[int, float]]] = {}
+
+
+def benchmark(function: Callable) -> Callable:
+    """Register benchmark.
+
+    Benchmark gets size and seed and returns number of handled rows
+    and seconds spent, so data preparation is not measured.
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+@benchmark
+def validate_invenotry(size: int, seed: int) -> Tuple[int, float]:
+    from benchmarks.generator import generate_inventories
+    from inventories.helpers.validators import validate_invenotry as validate
+
+    rows = list(generate_inventories(size, seed))
+    started = time.perf_counter()
+    for row in rows:
+        validate(row)
+    return size, time.perf_counter() - started
+
+
+@benchmark
+def validate_inventories(size: int, seed: int) -> Tuple[int, float]:
+    from benchmarks.generator import generate_inventories
+    from inventories.helpers.validators import validate_inventories as validate
+
+    rows = list(generate_inventories(size, seed))
+    started = time.perf_counter()
+    validate(rows)
+    return size, time.perf_counter() - started
+
+
+@benchmark
+def vvais_import(size: int, seed: int) -> Tuple[int, float]:
+    from benchmarks.generator import create_archive
+    from inventories.models import Inventory
+
+    started = time.perf_counter()
+    create_archive(size, seed)
+    seconds = time.perf_counter() - started
+    return Inventory.objects.count(), seconds
+
+
+@benchmark
+def institution_bulk_update(size: int, seed: int) -> Tuple[int, float]:
+    from institutions.models import Institution
+
+    pks = list(Institution.objects.values_list('pk', flat=True))
+    started = time.perf_counter()
+    for pk in pks:
+        Institution.bulk_update(pk, {'signer': f'Signer {seed}'})
+    return len(pks), time.perf_counter() - started
+
+
+@benchmark
+def institution_mapping_update(size: int, seed: int) -> Tuple[int, float]:
+    from institutions.models import Institution
+
+    mapping = {reg_nr: {'signer': f'Signer {seed + 1}'}
+               for reg_nr in Institution.objects.values_list('reg_nr', flat=True)}
+    started = time.perf_counter()
+    result = Institution.update_from_mapping(mapping)
+    return len(result['changed']), time.perf_counter() - started
+
+
+@benchmark
+def project_queries(size: int, seed: int) -> Tuple[int, float]:
+    from django.db.models import Count, Max, Min, Sum
+
+    from inventories.models import Inventory
+    from project.models import Project
+
+    started = time.perf_counter()
+    rows = 0
+    for project in Project.objects.iterator():
+        inventories = Inventory.objects.filter(fond_id=project.pk)
+        inventories.aggregate(count=Count('pk'), items=Sum('total_items'),
+                              start=Min('start_date'), end=Max('end_date'))
+        rows += sum(1 for _ in inventories.order_by('number', 'postfix')
+                    .values_list('number', 'postfix').iterator())
+    return rows, time.perf_counter() - started
+
+
+@benchmark
+def project_summaries(size: int, seed: int) -> Tuple[int, float]:
+    from aggregates.models import FondSummary
+    from project.models import Project
+
+    pks = list(Project.objects.values_list('pk', flat=True))
+    started = time.perf_counter()
+    rows = sum(FondSummary.for_fond(pk).inventories for pk in pks)
+    return rows, time.perf_counter() - started
+
+
+@benchmark
+def search(size: int, seed: int) -> Tuple[int, float]:
+    from search.index import search as search_index
+
+    queries = ['fonds', 'arhīvs', 'foto', 'pastāvīgi glabājamās', '12a', 'ministrija 1']
+    started = time.perf_counter()
+    rows = 0
+    for text in queries:
+        results, cursor = search_index(text)
+        rows += len(results)
+        if cursor is not None:
+            rows += len(search_index(text, after=cursor)[0])
+    return rows, time.perf_counter() - started
+
+
+@benchmark
+def storage_units(size: int, seed: int) -> Tuple[int, float]:
+    from fonds.models import Fond
+    from inventories.models import Inventory
+    from inventories.units import generate_units, iter_fond_units
+
+    started = time.perf_counter()
+    generate_units(Inventory.objects.all(), title=f'Lieta {seed}')
+    rows = sum(1 for fond in Fond.objects.all() for _ in iter_fond_units(fond))
+    return rows, time.perf_counter() - started
+
+
+@benchmark
+def vvais_sync(size: int, seed: int) -> Tuple[int, float]:
+    from django.db.models import Count
+
+    from inventories.constants import FINGERPRINT_FIELDS
+    from inventories.models import Inventory
+    from inventories.sync import sync_from_vvais
+
+    fond_id = (Inventory.objects.values('fond_id').annotate(rows=Count('pk'))
+               .order_by('-rows').values_list('fond_id', flat=True).first())
+    # Report of the largest fond where few rows are changed
+    report = list(Inventory.objects.filter(fond_id=fond_id)
+                  .values('number', 'postfix', *FINGERPRINT_FIELDS))
+    for row in report[::max(len(report) // 10, 1)]:
+        row['last_gv'] += seed + 1
+    fond = Inventory.objects.filter(fond_id=fond_id).first().fond
+
+    started = time.perf_counter()
+    sync_from_vvais(report, fond, delete=False)
+    return len(report), time.perf_counter() - started
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(size: int, names: List[str], seed: int = 0, database: str = '') -> dict:
+    """Run benchmarks in throwaway database.
+
+    Args:
+        size: Number of inventory lists.
+        names: Benchmark names, 'vvais_import' should be first
+          if other benchmarks need data.
+        seed: Random seed of generated data.
+        database: SQLite file for database, default is in memory.
+
+    Returns:
+        Dictionary with environment and results of benchmarks.
+    """
+    from django.conf import settings
+    from django.db import connection
+
+    if database:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = database
+    test_database = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    results = []
+    try:
+        for name in names:
+            rows, seconds = BENCHMARKS[name](size, seed)
+            results.append({
+                'name': name,
+                'rows': rows,
+                'seconds': round(seconds, 4),
+                'rows_per_second': round(rows / seconds, 1) if seconds else None,
+            })
+    finally:
+        connection.creation.destroy_test_db(test_database, verbosity=0)
+
+    return {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'sqlite': connection.Database.sqlite_version,
+        'size': size,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--size', choices=SIZES, default='1k',
+                        help='Number of generated inventory lists')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS,
+                        help='Run only given benchmarks, data is always generated')
+    parser.add_argument('--database', default='',
+                        help='SQLite file for benchmark database, default is in memory')
+    parser.add_argument('--output', help='JSON file for results, default is stdout')
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'opex_project.settings')
+    import django
+    django.setup()
+
+    names = list(BENCHMARKS)
+    if options.only:
+        names = ['vvais_import'] + [name for name in options.only if name != 'vvais_import']
+
+    result = run(SIZES[options.size], names, options.seed, options.database)
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
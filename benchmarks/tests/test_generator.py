@@ -0,0 +1,28 @@
+"""Module contains tests for benchmarks.generator"""
+
+from django.test import TestCase
+
+from benchmarks.generator import create_archive, generate_inventories
+from inventories.helpers.validators import validate_inventories
+from inventories.models import Inventory
+
+
+class GeneratorTest(TestCase):
+    """Class for testing synthetic data generator"""
+
+    def test_rows_are_valid(self):
+        """Test that generated rows pass validation"""
+        results = validate_inventories(list(generate_inventories(500, seed=1)))
+        self.assertTrue(all(validated for validated, _ in results))
+
+    def test_same_seed(self):
+        """Test that the same seed gives the same rows"""
+        self.assertEqual(list(generate_inventories(10, seed=2)),
+                         list(generate_inventories(10, seed=2)))
+
+    def test_create_archive(self):
+        """Test that inventory lists are spread over fonds"""
+        fonds = create_archive(25, per_fond=10)
+        self.assertEqual(len(fonds), 3)
+        self.assertEqual(Inventory.objects.count(), 25)
+        self.assertEqual(Inventory.objects.filter(fond=fonds[-1]).count(), 5)
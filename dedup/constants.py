@@ -0,0 +1,8 @@
+"""Constants used in dedup app"""
+
+# Number of stored objects or references looked up with one query
+DEDUP_LOOKUP_CHUNK = 500
+
+CONTENT_CHANGED_MSG = 'File changed while it was ingested'
+UNKNOWN_INVENTORY_MSG = 'Inventory list does not exist'
+NOT_ELECTRONIC_MSG = 'Inventory list is not electronic'
@@ -0,0 +1,27 @@
+"""Management command which shows bytes saved by deduplication"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from dedup.report import savings_report
+
+
+class Command(BaseCommand):
+    help = 'Shows size of content files and bytes saved by deduplication per project'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print report as JSON')
+
+    def handle(self, *args, **options):
+        report = savings_report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f'{"project":<40} {"files":>8} {"objects":>8} '
+                          f'{"referenced":>14} {"stored":>14} {"saved":>14}')
+        for row in [*report['projects'], {'project': 'Total', **report['total']}]:
+            self.stdout.write(f'{row["project"] or "-":<40} {row["files"]:>8} {row["objects"]:>8} '
+                              f'{row["referenced_bytes"]:>14} {row["stored_bytes"]:>14} '
+                              f'{row["saved_bytes"]:>14}')
@@ -0,0 +1,51 @@
+"""Management command which ingests content files into content store"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dedup.store import ingest_folder
+from project.shards import find_fond, use_project
+
+
+class Command(BaseCommand):
+    help = ('Ingests content files of electronic inventory lists, '
+            'every distinct content is stored and hashed once')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fond', help='Fond code')
+        parser.add_argument('folder', help='Folder with inventory list folders, '
+                                           'named by number and postfix')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of processes which hash files')
+
+    def handle(self, *args, **options):
+        try:
+            fond = find_fond(options['fond'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        if fond is None:
+            raise CommandError(f'Fond "{options["fond"]}" does not exist')
+
+        if not os.path.isdir(options['folder']):
+            raise CommandError(f'Folder "{options["folder"]}" does not exist')
+        if options['workers'] < 1:
+            raise CommandError('Number of workers should be positive')
+
+        started = time.monotonic()
+
+        def progress(files: int) -> None:
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{files} files ingested')
+
+        with use_project(fond.pk):
+            result = ingest_folder(fond, options['folder'], workers=options['workers'],
+                                   progress=progress)
+
+        for path, error in sorted(result['errors'].items()):
+            self.stderr.write(f'{path}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result["files"]} files ingested, {result["new"]} new, '
+            f'{result["duplicates"]} duplicates, {result["saved_bytes"]} bytes saved '
+            f'({time.monotonic() - started:.1f} s)'))
@@ -0,0 +1,136 @@
+"""Module contains dedup app models"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, models
+from django.utils import timezone
+from retry import retry
+
+from dedup.constants import DEDUP_LOOKUP_CHUNK
+from exports.constants import FIXITY_ALGORITHMS
+from helpers.constants import BACKOFF, DELAY, JITTER, TRIES
+from inventories.models import Inventory
+
+logger = logging.getLogger(__name__)
+
+
+class ContentObject(models.Model):
+    """Represents 'content_objects' table in database.
+
+    File content stored once in content store under its SHA-256
+    hash, see 'path'. Stored files are never changed.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    md5 = models.CharField(max_length=32)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'content_objects'
+
+    def __str__(self):
+        return f'{self.sha256} ({self.size} bytes)'
+
+    @property
+    def path(self) -> Path:
+        """Path of stored file, objects are spread into two folder levels"""
+        return (Path(settings.CONTENT_STORE_ROOT)
+                / self.sha256[:2] / self.sha256[2:4] / self.sha256)
+
+    @staticmethod
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+    def add_object(sha256: str, md5: str, size: int) -> Tuple['ContentObject', bool]:
+        """Return stored object with given hash, create it if needed.
+
+        Returns:
+            Tuple with ContentObject instance and True if it was created.
+        """
+        try:
+            return ContentObject.objects.get_or_create(
+                sha256=sha256, defaults={'md5': md5, 'size': size})
+        except IntegrityError:
+            # Created by another process meanwhile
+            return ContentObject.objects.get(sha256=sha256), False
+
+
+class ContentReference(models.Model):
+    """Represents 'content_references' table in database.
+
+    Content file of electronic inventory list which points to stored
+    object. The same object can be referenced from many inventory
+    lists of different fonds.
+    """
+    # Content objects stay in common database when project has its
+    # own database (see 'helpers.routers'), so there is no constraint
+    content = models.ForeignKey(ContentObject, on_delete=models.PROTECT,
+                                related_name='references', db_constraint=False)
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE,
+                                  related_name='content_references')
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'content_references'
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'name'], name='unique_content_name'),
+        ]
+
+    def __str__(self):
+        return f'{self.inventory_id}/{self.name} -> {self.content_id}'
+
+    @staticmethod
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+    def add_reference(inventory: Inventory, name: str,
+                      content: ContentObject) -> 'ContentReference':
+        """Point content file of inventory list to stored object"""
+        reference, _ = ContentReference.objects.update_or_create(
+            inventory=inventory, name=name, defaults={'content': content})
+        return reference
+
+    @staticmethod
+    def known_fixities(files: Dict[int, List[Path]]) -> Dict[str, Dict[str, str]]:
+        """Return fixity values of content files which are stored objects.
+
+        File is taken as stored object only if it is hard link to
+        stored file, so file replaced after ingest is hashed again.
+
+        Args:
+            files: Dictionary with inventory primary key as key
+              and list of content file paths as value.
+
+        Returns:
+            Dictionary with absolute file path as key and dictionary
+            with algorithm name and hex digest as value.
+        """
+        paths = {(pk, path.name): path for pk, inventory_files in files.items()
+                 for path in inventory_files}
+        fixities = {}
+        pks = [pk for pk, inventory_files in files.items() if inventory_files]
+        for start in range(0, len(pks), DEDUP_LOOKUP_CHUNK):
+            # References and objects can be in different databases, so no join
+            references = list(ContentReference.objects
+                              .filter(inventory_id__in=pks[start:start + DEDUP_LOOKUP_CHUNK])
+                              .values_list('inventory_id', 'name', 'content_id'))
+            contents = ContentObject.objects.in_bulk(
+                {content_id for _, _, content_id in references})
+            for inventory_id, name, content_id in references:
+                path = paths.get((inventory_id, name))
+                content = contents.get(content_id)
+                if path is None or content is None or not same_file(path, content.path):
+                    continue
+                fixities[os.path.abspath(path)] = {
+                    algorithm: getattr(content, algorithm) for algorithm in FIXITY_ALGORITHMS}
+        return fixities
+
+
+def same_file(first: Path, second: Path) -> bool:
+    """Check that both paths are the same file, missing file is not"""
+    try:
+        return os.path.samefile(first, second)
+    except OSError:
+        return False
+
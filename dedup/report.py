@@ -0,0 +1,75 @@
+"""Module contains report of disk space saved by deduplication"""
+
+from collections import defaultdict
+
+from django.db.models import Count
+
+from dedup.constants import DEDUP_LOOKUP_CHUNK
+from dedup.models import ContentObject, ContentReference
+from project.models import Project
+from project.shards import project_databases
+
+
+def savings_report() -> dict:
+    """Return bytes saved by deduplication per project and in total.
+
+    For project, 'referenced_bytes' is size of all its content files,
+    'stored_bytes' is size of distinct content among them and
+    'saved_bytes' is the difference. Total also counts content shared
+    between projects, which is stored once for all of them.
+
+    References are read from common and all attached project
+    databases, content objects are in common database.
+
+    Returns:
+        Dictionary with list of project dictionaries
+        ordered by saved bytes and 'total' dictionary.
+    """
+    # Number of files per project and distinct content, fond shares primary key with project
+    counts = defaultdict(int)
+    for alias in project_databases():
+        rows = (ContentReference.objects.using(alias)
+                .values_list('inventory__fond_id', 'content_id')
+                .annotate(files=Count('pk'))
+                .order_by())
+        for project_id, content_id, files in rows.iterator():
+            counts[project_id, content_id] += files
+
+    sizes = {}
+    content_ids = sorted({content_id for _, content_id in counts})
+    for start in range(0, len(content_ids), DEDUP_LOOKUP_CHUNK):
+        sizes.update(ContentObject.objects
+                     .filter(pk__in=content_ids[start:start + DEDUP_LOOKUP_CHUNK])
+                     .values_list('pk', 'size'))
+
+    projects = defaultdict(lambda: {'files': 0, 'objects': 0,
+                                    'referenced_bytes': 0, 'stored_bytes': 0})
+    total_files = referenced_bytes = 0
+    for (project_id, content_id), files in counts.items():
+        size = sizes[content_id]
+        project = projects[project_id]
+        project['files'] += files
+        project['objects'] += 1
+        project['referenced_bytes'] += size * files
+        project['stored_bytes'] += size
+        total_files += files
+        referenced_bytes += size * files
+
+    names = dict(Project.objects.filter(pk__in=list(projects)).values_list('pk', 'name'))
+    result = []
+    for project_id, project in projects.items():
+        project['saved_bytes'] = project['referenced_bytes'] - project['stored_bytes']
+        result.append({'project': names.get(project_id), **project})
+    result.sort(key=lambda project: (-project['saved_bytes'], project['project'] or ''))
+
+    stored_bytes = sum(sizes.values())
+    return {
+        'projects': result,
+        'total': {
+            'files': total_files,
+            'objects': len(sizes),
+            'referenced_bytes': referenced_bytes,
+            'stored_bytes': stored_bytes,
+            'saved_bytes': referenced_bytes - stored_bytes,
+        },
+    }
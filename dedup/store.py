@@ -0,0 +1,234 @@
+"""Module contains ingest of content files into content store.
+
+Every distinct file content is copied once into 'CONTENT_STORE_ROOT'
+under its SHA-256 hash. Content folders of inventory lists (see
+'exports.opex.content_folder') get hard links to stored files, so
+a scan which appears in several fonds takes disk space once, and
+export gets its fixity values from the index instead of hashing it.
+
+Before hashing, files are looked up in fixity cache, so file which was
+ingested before is not read again. Before copying, hash is looked up
+in the index, so only new content is copied. File which is already
+referenced with the same content is not counted again.
+"""
+
+import hashlib
+import os
+import shutil
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from dedup.constants import (
+    CONTENT_CHANGED_MSG,
+    DEDUP_LOOKUP_CHUNK,
+    NOT_ELECTRONIC_MSG,
+    UNKNOWN_INVENTORY_MSG,
+)
+from dedup.models import ContentObject, ContentReference, same_file
+from exports.constants import HASH_BUFFER_SIZE
+from exports.fixity import compute_fixities
+from exports.opex import content_folder, inventory_folder
+from fonds.models import Fond
+from inventories.models import Inventory
+
+
+def _replace_with(destination: Path, write: Callable[[Path], None]) -> None:
+    """Write file next to destination and put it in place of destination"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temporary = destination.with_name(f'.{destination.name}.tmp')
+    temporary.unlink(missing_ok=True)
+    try:
+        write(temporary)
+        os.replace(temporary, destination)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
+def store_file(source: Path, content: ContentObject) -> bool:
+    """Copy file into content store, if content is not stored yet.
+
+    Copy is hashed while it is written, so file changed after it was
+    hashed is not stored under wrong hash. Stored file is read-only.
+
+    Returns:
+        True if file was copied.
+
+    Raises:
+        ValueError: File content doesn't match hash.
+    """
+    if content.path.is_file():
+        return False
+
+    def copy(temporary: Path) -> None:
+        hasher = hashlib.sha256()
+        with open(source, 'rb') as src, open(temporary, 'wb') as out:
+            while data := src.read(HASH_BUFFER_SIZE):
+                hasher.update(data)
+                out.write(data)
+        if hasher.hexdigest() != content.sha256:
+            raise ValueError(CONTENT_CHANGED_MSG)
+        os.chmod(temporary, 0o444)
+
+    _replace_with(content.path, copy)
+    return True
+
+
+def link_file(content: ContentObject, destination: Path) -> None:
+    """Put stored file into content folder of inventory list.
+
+    Hard link is used, so file takes no more disk space,
+    if link is not possible file is copied.
+    """
+    if same_file(content.path, destination):
+        return
+
+    def link(temporary: Path) -> None:
+        try:
+            os.link(content.path, temporary)
+        except OSError:
+            shutil.copyfile(content.path, temporary)
+
+    _replace_with(destination, link)
+
+
+def _fixities(paths: List[Path], workers: int, errors: Dict[str, str]) -> Dict[str, dict]:
+    """Return fixities of chunk, unreadable files are added to errors.
+
+    Whole chunk is hashed at once, only when it fails files are
+    hashed one by one to find the unreadable ones.
+    """
+    try:
+        return compute_fixities(paths, workers=workers)
+    except OSError:
+        pass
+
+    fixities = {}
+    for path in paths:
+        try:
+            fixities.update(compute_fixities([path]))
+        except OSError as error:
+            errors[str(path)] = str(error)
+    return fixities
+
+
+def _references(chunk: List[Tuple[Inventory, Path]]) -> Dict[Tuple[int, str], int]:
+    """Return content primary key of chunk's files which are referenced already"""
+    return {(inventory_id, name): content_id for inventory_id, name, content_id in
+            ContentReference.objects
+            .filter(inventory_id__in={inventory.pk for inventory, _ in chunk},
+                    name__in={path.name for _, path in chunk})
+            .values_list('inventory_id', 'name', 'content_id')}
+
+
+def ingest_files(files: Iterable[Tuple[Inventory, Path]],
+                 fond: Fond,
+                 workers: int = 1,
+                 progress: Optional[Callable[[int], None]] = None) -> dict:
+    """Ingest content files of fond's inventory lists.
+
+    Files are handled in chunks: hashes of whole chunk are calculated
+    at once (several processes can be used) and stored objects and
+    references are looked up with one query each. File which already
+    references its content is neither a new object nor a duplicate,
+    so ingesting again doesn't change totals. File which can't be read
+    is added to errors.
+
+    Args:
+        files: Pairs of electronic inventory list and path of its content file.
+        fond: Fond of inventory lists.
+        workers: Number of processes which hash files.
+        progress: Function called with number of handled files after every chunk.
+
+    Returns:
+        Dictionary with number of ingested files, new stored objects,
+        duplicate files, bytes copied into store, bytes saved and
+        'errors' dictionary with path of skipped file as key.
+    """
+    fond_content = content_folder(fond)
+    result = {'files': 0, 'new': 0, 'duplicates': 0, 'stored_bytes': 0, 'saved_bytes': 0,
+              'errors': {}}
+    files = iter(files)
+
+    while chunk := list(islice(files, DEDUP_LOOKUP_CHUNK)):
+        fixities = _fixities([path for _, path in chunk], workers, result['errors'])
+        hashes = {fixity['sha256'] for fixity in fixities.values()}
+        stored = {content.sha256: content
+                  for content in ContentObject.objects.filter(sha256__in=hashes)}
+        references = _references(chunk)
+
+        for inventory, path in chunk:
+            fixity = fixities.get(os.path.abspath(path))
+            if fixity is None:
+                continue
+            content = stored.get(fixity['sha256'])
+            if content is None:
+                content, _ = ContentObject.add_object(fixity['sha256'], fixity['md5'],
+                                                      path.stat().st_size)
+                stored[content.sha256] = content
+            referenced = references.get((inventory.pk, path.name)) == content.pk
+
+            try:
+                if store_file(path, content):
+                    result['new'] += 1
+                    result['stored_bytes'] += content.size
+                elif not referenced and not same_file(path, content.path):
+                    # File which is already a link to stored file is not a duplicate
+                    result['duplicates'] += 1
+                    result['saved_bytes'] += content.size
+            except (ValueError, OSError) as error:
+                result['errors'][str(path)] = str(error)
+                continue
+
+            folder = fond_content / inventory_folder(inventory.number, inventory.postfix)
+            link_file(content, folder / path.name)
+            if not referenced:
+                ContentReference.add_reference(inventory, path.name, content)
+            result['files'] += 1
+
+        if progress is not None:
+            progress(result['files'])
+
+    return result
+
+
+def ingest_folder(fond: Fond,
+                  folder: Union[str, Path],
+                  workers: int = 1,
+                  progress: Optional[Callable[[int], None]] = None) -> dict:
+    """Ingest content files from folder with inventory list folders.
+
+    Folder has the same layout as content folder of fond, files of
+    inventory list are in folder named by its number and postfix.
+
+    Returns:
+        Result of 'ingest_files', skipped inventory list
+        folders are added to its errors.
+    """
+    folder = Path(folder)
+    inventories: Dict[str, Tuple[int, int, str, bool]] = {
+        inventory_folder(number, postfix): (pk, number, postfix, electronic)
+        for pk, number, postfix, electronic in
+        Inventory.objects.filter(fond=fond).values_list('pk', 'number', 'postfix', 'electronic')
+    }
+    errors = {}
+
+    def files() -> Iterable[Tuple[Inventory, Path]]:
+        for inventory_path in sorted(path for path in folder.iterdir() if path.is_dir()):
+            found = inventories.get(inventory_path.name)
+            if found is None or not found[3]:
+                errors[str(inventory_path)] = (UNKNOWN_INVENTORY_MSG if found is None
+                                               else NOT_ELECTRONIC_MSG)
+                continue
+
+            pk, number, postfix, electronic = found
+            inventory = Inventory(pk=pk, number=number, postfix=postfix,
+                                  electronic=electronic, fond=fond)
+            for path in sorted(inventory_path.iterdir()):
+                if path.is_file() and not path.name.startswith('.'):
+                    yield inventory, path
+
+    result = ingest_files(files(), fond, workers=workers, progress=progress)
+    result['errors'].update(errors)
+    return result
@@ -0,0 +1,157 @@
+"""Module contains tests for dedup app"""
+
+import io
+import os
+import tarfile
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from dedup.constants import UNKNOWN_INVENTORY_MSG
+from dedup.models import ContentObject, ContentReference
+from dedup.report import savings_report
+from dedup.store import ingest_files, ingest_folder
+from exports.builder import build_package
+from exports.packaging import iter_archive
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.models import Project
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+SCAN = b'%PDF scan' * 1000
+PHOTO = b'\xff\xd8 photo' * 500
+
+
+def create_fond(name: str, reg_nr: int) -> Fond:
+    project = Project.add_project(name)
+    institution = Institution.add_institution(reg_nr, name, project=project)
+    fond = Fond.add_fond(name, 'LNA', 'Valsts arhivs', reg_nr, 'Valsts meži', False, institution)
+    Inventory.bulk_import_from_vvais(
+        ({**INVENTORY_LIST, 'number': number} for number in (1, 2)), fond)
+    return fond
+
+
+def write_files(folder: Path, files: dict) -> Path:
+    for name, data in files.items():
+        path = folder / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return folder
+
+
+class IngestTest(TestCase):
+    """Class for testing ingest into content store"""
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.root = Path(folder.name)
+        settings = override_settings(OPEX_EXPORT_ROOT=self.root / 'opex',
+                                     OPEX_CONTENT_ROOT=self.root / 'content',
+                                     CONTENT_STORE_ROOT=self.root / 'store')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.first = create_fond('F1', 1)
+        self.second = create_fond('F2', 2)
+        self.source = write_files(self.root / 'source', {
+            '1a/scan.pdf': SCAN,
+            '1a/foto.jpg': PHOTO,
+            '2a/copy.pdf': SCAN,
+            '9a/scan.pdf': SCAN,
+        })
+
+    def test_ingest(self):
+        """Test that repeated content is stored once and linked into content folders"""
+        result = ingest_folder(self.first, self.source)
+
+        self.assertEqual({key: result[key] for key in ('files', 'new', 'duplicates')},
+                         {'files': 3, 'new': 2, 'duplicates': 1})
+        self.assertEqual(result['saved_bytes'], len(SCAN))
+        self.assertEqual(result['errors'], {str(self.source / '9a'): UNKNOWN_INVENTORY_MSG})
+
+        scan = ContentObject.objects.get(size=len(SCAN))
+        self.assertEqual(scan.path.read_bytes(), SCAN)
+        content = self.root / 'content' / 'F1'
+        self.assertTrue(os.path.samefile(content / '1a' / 'scan.pdf', scan.path))
+        self.assertTrue(os.path.samefile(content / '2a' / 'copy.pdf', scan.path))
+        self.assertEqual(ContentReference.objects.filter(content=scan).count(), 2)
+
+    def test_ingest_again(self):
+        """Test that known files are neither hashed nor copied again"""
+        ingest_folder(self.first, self.source)
+        write_files(self.root / 'second', {'1a/scan.pdf': SCAN})
+        ingest_folder(self.second, self.root / 'second')
+
+        with mock.patch('exports.fixity.hash_file') as hash_file:
+            result = ingest_folder(self.first, self.source)
+        hash_file.assert_not_called()
+        self.assertEqual((result['files'], result['new']), (3, 0))
+        # Referenced files are not duplicates of themselves
+        self.assertEqual((result['duplicates'], result['saved_bytes']), (0, 0))
+        self.assertEqual(ContentObject.objects.count(), 2)
+
+    def test_unreadable_file(self):
+        """Test that file which can't be read is reported and others are ingested"""
+        inventory = Inventory.objects.get(fond=self.first, number=1)
+        missing = self.source / '1a' / 'missing.pdf'
+
+        result = ingest_files([(inventory, self.source / '1a' / 'scan.pdf'), (inventory, missing)],
+                              self.first)
+
+        self.assertEqual((result['files'], result['new']), (1, 1))
+        self.assertEqual(list(result['errors']), [str(missing)])
+        self.assertEqual(ContentReference.objects.filter(inventory=inventory).count(), 1)
+
+    def test_export(self):
+        """Test that export takes fixities from index and TAR sends content once"""
+        ingest_folder(self.first, self.source)
+
+        with mock.patch('exports.fixity.hash_file') as hash_file:
+            package = build_package(self.first.institution.project, self.root / 'opex',
+                                    workers=1)
+        hash_file.assert_not_called()
+        self.assertIn(ContentObject.objects.get(size=len(SCAN)).sha256,
+                      (package / 'F1' / '2a' / '2a.opex').read_text())
+
+        data = b''.join(iter_archive(package, 'tar'))
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            members = {member.name: member for member in archive.getmembers()}
+            scans = [members['F1/F1/1a/scan.pdf'], members['F1/F1/2a/copy.pdf']]
+            self.assertEqual(sorted(member.type for member in scans),
+                             [tarfile.REGTYPE, tarfile.LNKTYPE])
+            self.assertEqual(archive.extractfile('F1/F1/2a/copy.pdf').read(), SCAN)
+
+    def test_report(self):
+        """Test that saved bytes are counted per project and in total"""
+        ingest_folder(self.first, self.source)
+        write_files(self.root / 'second', {'1a/scan.pdf': SCAN})
+        ingest_folder(self.second, self.root / 'second')
+
+        report = savings_report()
+        self.assertEqual([(project['project'], project['saved_bytes'])
+                          for project in report['projects']],
+                         [('F1', len(SCAN)), ('F2', 0)])
+        self.assertEqual(report['total'], {
+            'files': 4,
+            'objects': 2,
+            'referenced_bytes': 3 * len(SCAN) + len(PHOTO),
+            'stored_bytes': len(SCAN) + len(PHOTO),
+            'saved_bytes': 2 * len(SCAN),
+        })
+
+        out = io.StringIO()
+        call_command('dedup_report', stdout=out)
+        self.assertIn('Total', out.getvalue())
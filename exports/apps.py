@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ExportsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'exports'
+
+    def ready(self):
+        # Register receivers which mark OPEX manifests as stale
+        from exports import signals  # noqa: F401
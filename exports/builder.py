@@ -0,0 +1,251 @@
+"""Module contains parallel OPEX package builder.
+
+Package is split into inventory ranges of project's fond which are
+exported by separate processes into staging folder. When all parts are
+ready, staging folder replaces final package folder.
+
+Incremental build writes again only manifests marked in
+'stale_manifests' table, see 'exports.signals'. Archives made of
+previous package are removed, see 'exports.packaging'.
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from exports.constants import EXPORT_CHUNK_SIZE, EXPORT_RANGES_PER_WORKER, OPEX_EXTENSION
+from exports.models import StaleManifest
+from exports.packaging import remove_archives
+from exports.opex import (
+    content_folder,
+    export_inventories,
+    fond_folder,
+    inventory_folder,
+    project_folder,
+    write_fond_manifest,
+    write_project_manifest,
+)
+from fonds.models import Fond
+from helpers.processes import init_worker
+from inventories.models import Inventory
+from project.models import Project
+from project.shards import use_project
+
+
+def inventory_ranges(fond: Fond, parts: int) -> List[Tuple[int, int]]:
+    """Split fond's inventories into primary key ranges.
+
+    Args:
+        fond: Fond instance.
+        parts: Number of ranges.
+
+    Returns:
+        List of (first, last) primary key pairs, both inclusive.
+    """
+    bounds = Inventory.objects.filter(fond=fond).aggregate(first=Min('pk'), last=Max('pk'))
+    first, last = bounds['first'], bounds['last']
+    if first is None:
+        return []
+
+    step = max((last - first + 1) // parts, 1)
+    ranges = []
+    start = first
+    while start <= last:
+        end = min(start + step - 1, last)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def export_range(fond_pk: int, first: int, last: int, fond_path: str) -> int:
+    """Export inventory folders with primary key in given range.
+
+    Returns:
+        Number of exported inventory lists.
+    """
+    # Worker process reads from project database, see 'project.shards'
+    with use_project(fond_pk):
+        fond = Fond.objects.get(pk=fond_pk)
+        inventories = (Inventory.objects
+                       .filter(fond=fond, pk__range=(first, last))
+                       .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+        return export_inventories(inventories, fond_path, content_folder(fond))
+
+
+def _replace_folder(staging: Path, final: Path) -> None:
+    """Put staging folder in place of final folder"""
+    previous = None
+    if final.exists():
+        previous = final.with_name(f'.{final.name}.previous')
+        if previous.exists():
+            shutil.rmtree(previous)
+        os.replace(final, previous)
+    os.replace(staging, final)
+    if previous is not None:
+        shutil.rmtree(previous)
+
+
+def _write_atomic(path: Path, write, instance) -> None:
+    """Write manifest into temporary file and put it in place of old one"""
+    temporary = path.with_name(f'.{path.name}.tmp')
+    with open(temporary, 'wb') as out:
+        write(instance, out)
+    os.replace(temporary, path)
+
+
+def build_package(project: Project,
+                  target: Union[str, Path],
+                  workers: Optional[int] = None,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  incremental: bool = False) -> Path:
+    """Build OPEX package of project using process pool.
+
+    Args:
+        project: Project instance.
+        target: Folder in which project folder is created.
+        workers: Number of worker processes, by default number of CPUs.
+          If 1, package is built in current process.
+        progress: Function called with number of exported
+          and total number of inventory lists after every finished part.
+        incremental: Write only stale manifests if package already exists.
+
+    Returns:
+        Path of project folder.
+    """
+    with use_project(project.pk):
+        return _build(project, target, workers, progress, incremental)
+
+
+def _build(project: Project,
+           target: Union[str, Path],
+           workers: Optional[int],
+           progress: Optional[Callable[[int, int], None]],
+           incremental: bool) -> Path:
+    workers = workers or os.cpu_count() or 1
+    target = Path(target)
+    target.mkdir(parents=True, exist_ok=True)
+    final = target / project_folder(project)
+
+    # Manifests marked after this moment stay stale for next build.
+    started = timezone.now()
+    stale = StaleManifest.objects.filter(project_id=project.pk, marked_at__lte=started)
+
+    if not (incremental and _update_package(project, final, stale, progress)):
+        _build_package(project, final, workers, progress)
+
+    stale.delete()
+    remove_archives(final)
+    return final
+
+
+def _build_package(project: Project,
+                   final: Path,
+                   workers: int,
+                   progress: Optional[Callable[[int, int], None]]) -> None:
+    # Staging folder is in the same folder, so it can be renamed atomically.
+    staging = Path(tempfile.mkdtemp(prefix=f'.{final.name}.', dir=final.parent))
+    try:
+        with open(staging / f'{final.name}{OPEX_EXTENSION}', 'wb') as out:
+            write_project_manifest(project, out)
+
+        fond = Fond.objects.filter(institution_id=project.pk).first()
+        if fond is not None:
+            _build_fond(fond, staging, workers, progress)
+
+        _replace_folder(staging, final)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _update_package(project: Project,
+                    final: Path,
+                    stale,
+                    progress: Optional[Callable[[int, int], None]]) -> bool:
+    """Write stale manifests of existing package.
+
+    Returns:
+        False if package can't be updated and should be built again.
+    """
+    fond = Fond.objects.filter(institution_id=project.pk).first()
+    fond_path = final / fond_folder(fond) if fond else None
+    if fond_path is None or not fond_path.is_dir():
+        return False
+
+    if stale.filter(kind=StaleManifest.PROJECT).exists():
+        _write_atomic(final / f'{final.name}{OPEX_EXTENSION}', write_project_manifest, project)
+
+    if stale.filter(kind=StaleManifest.FOND).exists():
+        _write_atomic(fond_path / f'{fond_folder(fond)}{OPEX_EXTENSION}',
+                      write_fond_manifest, fond)
+        _remove_deleted_inventories(fond, fond_path)
+
+    pks = (stale.filter(kind=StaleManifest.INVENTORY)
+           .values_list('object_pk', flat=True)
+           .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    total = stale.filter(kind=StaleManifest.INVENTORY).count()
+    done = 0
+    while chunk := list(islice(pks, EXPORT_CHUNK_SIZE)):
+        inventories = list(Inventory.objects.filter(pk__in=chunk, fond=fond))
+        for inventory in inventories:
+            # Folder is written again, so removed content files disappear.
+            shutil.rmtree(fond_path / inventory_folder(inventory.number, inventory.postfix),
+                          ignore_errors=True)
+        export_inventories(inventories, fond_path, content_folder(fond))
+
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+
+    return True
+
+
+def _remove_deleted_inventories(fond: Fond, fond_path: Path) -> None:
+    """Remove folders of inventory lists which are not in fond anymore"""
+    names = {inventory_folder(number, postfix) for number, postfix in
+             Inventory.objects.filter(fond=fond)
+             .values_list('number', 'postfix')
+             .iterator(chunk_size=EXPORT_CHUNK_SIZE)}
+    with os.scandir(fond_path) as entries:
+        for entry in entries:
+            if entry.is_dir() and entry.name not in names:
+                shutil.rmtree(entry.path)
+
+
+def _build_fond(fond: Fond,
+                staging: Path,
+                workers: int,
+                progress: Optional[Callable[[int, int], None]]) -> None:
+    fond_path = staging / fond_folder(fond)
+    fond_path.mkdir()
+    with open(fond_path / f'{fond_folder(fond)}{OPEX_EXTENSION}', 'wb') as out:
+        write_fond_manifest(fond, out)
+
+    total = Inventory.objects.filter(fond=fond).count()
+    ranges = inventory_ranges(fond, workers * EXPORT_RANGES_PER_WORKER)
+    done = 0
+
+    if workers == 1:
+        for first, last in ranges:
+            done += export_range(fond.pk, first, last, str(fond_path))
+            if progress:
+                progress(done, total)
+        return
+
+    # Child processes must not share parent's database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(export_range, fond.pk, first, last, str(fond_path))
+                   for first, last in ranges]
+        for future in as_completed(futures):
+            done += future.result()
+            if progress:
+                progress(done, total)
@@ -0,0 +1,51 @@
+"""Constants used in 'exports' app"""
+
+# OPEX manifest namespaces
+OPEX_NAMESPACE = 'http://www.openpreservationexchange.org/opex/v1.2'
+DESCRIPTION_NAMESPACE = 'urn:opex-project:description:v1'
+
+OPEX_EXTENSION = '.opex'
+
+# Number of rows read from database at once while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+# Number of inventory ranges per worker process, more ranges
+# than workers keep all processes busy until the end
+EXPORT_RANGES_PER_WORKER = 4
+
+# Fixity algorithms (hashlib name against OPEX name)
+FIXITY_ALGORITHMS = {'sha256': 'SHA-256', 'md5': 'MD5'}
+
+# Size of one read while hashing file
+HASH_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Number of paths looked up in fixity cache with one query
+FIXITY_LOOKUP_CHUNK = 500
+
+# Inventory fields which are listed in fond manifest
+FOND_MANIFEST_FIELDS = {'number', 'postfix', 'fond', 'fond_id'}
+
+# Name of job task which builds OPEX package
+BUILD_PACKAGE = 'exports.build_package'
+
+# Archive formats of packaged OPEX output and their content types
+PACKAGE_FORMATS = {'zip': 'application/zip', 'tar': 'application/x-tar'}
+
+# Size of one read of packaged file
+PACKAGE_CHUNK_SIZE = 1024 * 1024
+
+# Number of hard linked files remembered while TAR archive is written,
+# later links to them are written as link entries without content
+PACKAGE_LINK_CACHE = 100000
+
+# Extensions of files which are already compressed, such files
+# are stored in ZIP archive without compressing them again
+COMPRESSED_EXTENSIONS = frozenset((
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.jp2',
+    '.mp3', '.mp4', '.m4a', '.m4v', '.mov', '.avi', '.mkv', '.ogg', '.webm',
+    '.zip', '.gz', '.bz2', '.xz', '.7z', '.rar', '.docx', '.xlsx', '.pptx',
+    '.odt', '.ods', '.asice', '.edoc', '.pdf',
+))
+
+# Entry size from which ZIP64 records are used
+ZIP64_LIMIT = (1 << 31) - 1
@@ -0,0 +1,121 @@
+"""Module contains fixity calculation of content files.
+
+Fixity values are cached in 'fixities' table by file path together with
+file size, modification time and inode, so unchanged files are never
+read again. All algorithms are calculated in one read of a file and
+files can be hashed by several processes.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+from django.utils import timezone
+
+from exports.constants import FIXITY_ALGORITHMS, FIXITY_LOOKUP_CHUNK, HASH_BUFFER_SIZE
+from exports.models import FixityRecord
+from helpers.processes import init_worker
+
+FileKey = Tuple[int, int, int]
+
+
+def file_key(path: Union[str, Path]) -> FileKey:
+    """Return size, modification time and inode of file"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def hash_file(path: Union[str, Path],
+              algorithms: Iterable[str] = tuple(FIXITY_ALGORITHMS)) -> Dict[str, str]:
+    """Calculate several hashes of file in one read.
+
+    File is read into one reused buffer, hashlib releases GIL
+    while hashing large chunks.
+
+    Args:
+        path: Path to file.
+        algorithms: hashlib algorithm names.
+
+    Returns:
+        Dictionary with algorithm name as key and hex digest as value.
+    """
+    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+
+    with open(path, 'rb', buffering=0) as file:
+        while True:
+            read = file.readinto(buffer)
+            if not read:
+                break
+            chunk = view[:read]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+
+def _hash_task(path: str) -> Tuple[str, FileKey, Dict[str, str]]:
+    """Hash file in worker process"""
+    key = file_key(path)
+    return path, key, hash_file(path)
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def compute_fixities(paths: Iterable[Union[str, Path]],
+                     workers: int = 1) -> Dict[str, Dict[str, str]]:
+    """Return fixity values of files using cache.
+
+    Args:
+        paths: Paths to files.
+        workers: Number of processes which hash files not found in cache.
+
+    Returns:
+        Dictionary with absolute file path as key and dictionary
+        with algorithm name and hex digest as value.
+    """
+    keys = {os.path.abspath(path): None for path in paths}
+    for path in keys:
+        keys[path] = file_key(path)
+
+    fixities = {}
+    for chunk in _chunks(list(keys), FIXITY_LOOKUP_CHUNK):
+        for record in FixityRecord.objects.filter(path__in=chunk):
+            if (record.size, record.mtime_ns, record.inode) == keys[record.path]:
+                fixities[record.path] = {algorithm: getattr(record, algorithm)
+                                         for algorithm in FIXITY_ALGORITHMS}
+
+    missing = [path for path in keys if path not in fixities]
+    if not missing:
+        return fixities
+
+    if workers > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            chunksize = max(len(missing) // (workers * 4), 1)
+            hashed = list(pool.map(_hash_task, missing, chunksize=chunksize))
+    else:
+        hashed = [_hash_task(path) for path in missing]
+
+    now = timezone.now()
+    records = []
+    for path, (size, mtime_ns, inode), hashes in hashed:
+        fixities[path] = hashes
+        records.append(FixityRecord(path=path, size=size, mtime_ns=mtime_ns,
+                                    inode=inode, checked_at=now, **hashes))
+
+    FixityRecord.objects.bulk_create(
+        records,
+        batch_size=FIXITY_LOOKUP_CHUNK,
+        update_conflicts=True,
+        unique_fields=['path'],
+        update_fields=['size', 'mtime_ns', 'inode', *FIXITY_ALGORITHMS, 'checked_at'])
+
+    return fixities
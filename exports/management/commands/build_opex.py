@@ -0,0 +1,59 @@
+"""Management command which builds OPEX package of project"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from exports.builder import build_package
+from exports.constants import BUILD_PACKAGE
+from jobs.models import Job
+from project.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Builds OPEX package of project using several processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', help='Project name')
+        parser.add_argument('--target', default=settings.OPEX_EXPORT_ROOT,
+                            help='Folder in which package is created')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes, default is number of CPUs')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Write only manifests changed since previous build')
+        parser.add_argument('--background', action='store_true',
+                            help='Queue build as job for run_workers instead of building now')
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(name=options['project'])
+        except Project.DoesNotExist:
+            raise CommandError(f'Project "{options["project"]}" does not exist')
+
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('Number of workers should be positive')
+
+        if options['background']:
+            job = Job.enqueue(BUILD_PACKAGE, {
+                'project_id': project.pk,
+                'target': str(options['target']),
+                'workers': options['workers'],
+                'incremental': options['incremental'],
+            })
+            self.stdout.write(self.style.SUCCESS(f'Build queued as job {job.pk}'))
+            return
+
+        started = time.monotonic()
+
+        def progress(done: int, total: int) -> None:
+            if options['verbosity'] > 0:
+                self.stdout.write(f'{done}/{total} inventory lists exported')
+
+        path = build_package(project, options['target'],
+                             workers=options['workers'],
+                             progress=progress,
+                             incremental=options['incremental'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Package {path} built in {time.monotonic() - started:.1f} s'))
@@ -0,0 +1,68 @@
+"""Management command which measures fixity calculation speed"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exports.fixity import hash_file
+from helpers.processes import init_worker
+
+
+class Command(BaseCommand):
+    help = 'Measures hashing speed of content files in MB/s per core'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            help='Files to hash, by default temporary files are generated')
+        parser.add_argument('--files', type=int, default=8,
+                            help='Number of generated files')
+        parser.add_argument('--size', type=int, default=64,
+                            help='Size of generated file in MB')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Maximum number of worker processes')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('Number of workers should be positive')
+
+        with tempfile.TemporaryDirectory() as folder:
+            paths = [str(path) for path in options['paths']]
+            if not paths:
+                paths = self._generate(Path(folder), options['files'], options['size'])
+
+            total_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+            workers = 1
+            while workers <= options['workers']:
+                self._measure(paths, total_mb, workers)
+                if workers == options['workers']:
+                    break
+                workers = min(workers * 2, options['workers'])
+
+    def _generate(self, folder: Path, files: int, size: int) -> list:
+        paths = []
+        block = os.urandom(1024 * 1024)
+        for index in range(files):
+            path = folder / f'{index}.bin'
+            with open(path, 'wb') as file:
+                for _ in range(size):
+                    file.write(block)
+            paths.append(str(path))
+        return paths
+
+    def _measure(self, paths: list, total_mb: float, workers: int) -> None:
+        started = time.perf_counter()
+        if workers == 1:
+            for path in paths:
+                hash_file(path)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+                list(pool.map(hash_file, paths))
+        elapsed = time.perf_counter() - started
+
+        speed = total_mb / elapsed
+        self.stdout.write(f'workers={workers} {speed:.1f} MB/s, '
+                          f'{speed / workers:.1f} MB/s per core')
@@ -0,0 +1,41 @@
+"""Management command which packs built OPEX package into archive"""
+
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from exports.constants import PACKAGE_FORMATS
+from exports.opex import project_folder
+from exports.packaging import archive_path, write_archive
+from project.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Packs built OPEX package of project into ZIP or TAR archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', help='Project name')
+        parser.add_argument('--format', dest='archive_format', default='zip',
+                            choices=sorted(PACKAGE_FORMATS), help='Archive format')
+        parser.add_argument('--output', default=None,
+                            help='Archive path, by default archive is put next to package '
+                                 'and served by download view')
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(name=options['project'])
+        except Project.DoesNotExist:
+            raise CommandError(f'Project "{options["project"]}" does not exist')
+
+        folder = Path(settings.OPEX_EXPORT_ROOT) / project_folder(project)
+        if not folder.is_dir():
+            raise CommandError(f'Package {folder} does not exist, build it with build_opex')
+
+        path = options['output'] or archive_path(project, options['archive_format'])
+        started = time.monotonic()
+        size = write_archive(folder, path, options['archive_format'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archive {path} ({size} bytes) written in {time.monotonic() - started:.1f} s'))
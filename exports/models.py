@@ -0,0 +1,69 @@
+"""Module contains exports app models"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class FixityRecord(models.Model):
+    """Represents 'fixities' table in database.
+
+    Cached fixity values of content file. Values are valid
+    while file size, modification time and inode are the same.
+    """
+    path = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    inode = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    md5 = models.CharField(max_length=32)
+    checked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'fixities'
+
+    def __str__(self):
+        return f'{self.path}, {self.sha256}'
+
+
+class StaleManifest(models.Model):
+    """Represents 'stale_manifests' table in database.
+
+    OPEX manifests which should be written again by incremental export.
+    Project, institution and fond share primary key with project,
+    so 'project_id' is known for every record.
+    """
+    PROJECT = 'project'
+    FOND = 'fond'
+    INVENTORY = 'inventory'
+    KINDS = [(PROJECT, 'Project'), (FOND, 'Fond'), (INVENTORY, 'Inventory')]
+
+    project_id = models.BigIntegerField(db_index=True)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_pk = models.BigIntegerField()
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stale_manifests'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_pk'], name='unique_stale_manifest'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_pk}'
+
+    @staticmethod
+    def mark(records) -> None:
+        """Mark manifests as stale.
+
+        Args:
+            records: Iterable of (project_id, kind, object_pk) tuples.
+        """
+        now = timezone.now()
+        # Time of already marked manifests is updated, so export
+        # which is running now doesn't clear changes made after it started.
+        StaleManifest.objects.bulk_create(
+            [StaleManifest(project_id=project_id, kind=kind, object_pk=object_pk, marked_at=now)
+             for project_id, kind, object_pk in set(records)],
+            update_conflicts=True,
+            unique_fields=['kind', 'object_pk'],
+            update_fields=['project_id', 'marked_at'])
@@ -0,0 +1,389 @@
+"""Module contains OPEX manifest generator.
+
+Manifests are written with incremental XML writer, so no DOM tree is
+built and database rows are read in chunks. Package layout is::
+
+    <project>/<project>.opex
+    <project>/<fond>/<fond>.opex
+    <project>/<fond>/<inventory>/<inventory>.opex
+    <project>/<fond>/<inventory>/<content files>
+
+Content files of electronic inventory lists are taken from
+'OPEX_CONTENT_ROOT/<fond>/<inventory>/'.
+"""
+
+import datetime
+import os
+import re
+import shutil
+from itertools import chain, islice
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Union
+from xml.sax.saxutils import XMLGenerator
+
+from django.conf import settings
+
+from dedup.models import ContentReference
+from exports.constants import (
+    DESCRIPTION_NAMESPACE,
+    EXPORT_CHUNK_SIZE,
+    FIXITY_ALGORITHMS,
+    OPEX_EXTENSION,
+    OPEX_NAMESPACE,
+)
+from exports.fixity import compute_fixities
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from inventories.units import Unit, units_by_inventory
+from project.models import Project
+
+_UNSAFE_CHARACTERS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+class ContentFile(NamedTuple):
+    """Content file of inventory list folder"""
+    path: Path
+    size: int
+    fixities: Dict[str, str]
+
+
+class OpexWriter:
+    """Thin wrapper around 'XMLGenerator' for writing OPEX elements"""
+
+    def __init__(self, out: BinaryIO):
+        self._xml = XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+
+    def start_document(self) -> None:
+        self._xml.startDocument()
+        self.start('OPEXMetadata', {'xmlns:opex': OPEX_NAMESPACE})
+
+    def end_document(self) -> None:
+        self.end('OPEXMetadata')
+        self._xml.endDocument()
+
+    def start(self, name: str, attrs: Optional[dict] = None, prefix: str = 'opex') -> None:
+        self._xml.startElement(f'{prefix}:{name}' if prefix else name, attrs or {})
+
+    def end(self, name: str, prefix: str = 'opex') -> None:
+        self._xml.endElement(f'{prefix}:{name}' if prefix else name)
+
+    def element(self, name: str, text, attrs: Optional[dict] = None, prefix: str = 'opex') -> None:
+        """Write element with text, elements without value are skipped"""
+        if text is None:
+            return
+        self.start(name, attrs, prefix)
+        self._xml.characters(_to_text(text))
+        self.end(name, prefix)
+
+    def descriptive_metadata(self,
+                             name: str,
+                             fields: dict,
+                             units: Optional[Iterable[Unit]] = None) -> None:
+        """Write 'DescriptiveMetadata' with one element per field and storage units"""
+        self.start('DescriptiveMetadata')
+        self.start(name, {'xmlns': DESCRIPTION_NAMESPACE}, prefix='')
+        for field, value in fields.items():
+            self.element(field, value, prefix='')
+        if units is not None:
+            self.units(units)
+        self.end(name, prefix='')
+        self.end('DescriptiveMetadata')
+
+    def units(self, units: Iterable[Unit]) -> None:
+        """Write storage units, nothing is written if there are none"""
+        units = iter(units)
+        first = next(units, None)
+        if first is None:
+            return
+        self.start('StorageUnits', prefix='')
+        for unit in chain([first], units):
+            self.start('StorageUnit', prefix='')
+            self.element('Number', unit.number, prefix='')
+            self.element('Title', unit.title or None, prefix='')
+            self.element('StartDate', unit.start_date, prefix='')
+            self.element('EndDate', unit.end_date, prefix='')
+            self.element('Sheets', unit.sheets, prefix='')
+            self.end('StorageUnit', prefix='')
+        self.end('StorageUnits', prefix='')
+
+    def fixities(self, files: List[ContentFile]) -> None:
+        """Write fixity values of content files"""
+        self.start('Fixities')
+        for file in files:
+            for algorithm, value in file.fixities.items():
+                self.start('Fixity', {'path': file.path.name,
+                                      'type': FIXITY_ALGORITHMS[algorithm],
+                                      'value': value})
+                self.end('Fixity')
+        self.end('Fixities')
+
+    def files(self, files: List[ContentFile]) -> None:
+        """Write manifest with given content files"""
+        self.start('Manifest')
+        self.start('Files')
+        for file in files:
+            self.element('File', file.path.name, {'type': 'content', 'size': str(file.size)})
+        self.end('Files')
+        self.end('Manifest')
+
+    def folders(self, names: Iterable[str]) -> None:
+        """Write manifest with given folder names"""
+        self.start('Manifest')
+        self.start('Folders')
+        for name in names:
+            self.element('Folder', name)
+        self.end('Folders')
+        self.end('Manifest')
+
+
+def _to_text(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def folder_name(value) -> str:
+    """Return name which can be used as folder name in package"""
+    return _UNSAFE_CHARACTERS.sub('_', str(value)).strip('._') or '_'
+
+
+def project_folder(project: Project) -> str:
+    return folder_name(project.name)
+
+
+def fond_folder(fond: Fond) -> str:
+    return folder_name(fond.fond_code)
+
+
+def inventory_folder(number: int, postfix: str) -> str:
+    return folder_name(f'{number}{postfix}')
+
+
+def content_folder(fond: Fond) -> Path:
+    """Return folder with content files of fond's inventory lists"""
+    return Path(settings.OPEX_CONTENT_ROOT) / fond_folder(fond)
+
+
+def content_files(inventory: Inventory, fond_content: Path) -> List[Path]:
+    """Return content files of electronic inventory list.
+
+    Args:
+        inventory: Inventory instance.
+        fond_content: Content folder of inventory's fond.
+    """
+    if not inventory.electronic:
+        return []
+    folder = fond_content / inventory_folder(inventory.number, inventory.postfix)
+    if not folder.is_dir():
+        return []
+    return sorted(path for path in folder.iterdir() if path.is_file())
+
+
+def _fond_inventories(fond: Fond):
+    return Inventory.objects.filter(fond=fond).order_by('number', 'postfix')
+
+
+def write_project_manifest(project: Project, out: BinaryIO) -> None:
+    """Write OPEX manifest of project folder.
+
+    Args:
+        project: Project instance.
+        out: Binary file-like object.
+    """
+    institution = Institution.objects.filter(project=project).first()
+    fond = Fond.objects.filter(institution_id=project.pk).first()
+
+    writer = OpexWriter(out)
+    writer.start_document()
+    writer.start('Transfer')
+    writer.element('SourceID', f'project-{project.pk}')
+    writer.folders([fond_folder(fond)] if fond else [])
+    writer.end('Transfer')
+
+    writer.start('Properties')
+    writer.element('Title', project.name)
+    if institution:
+        writer.element('Description', institution.name)
+    writer.end('Properties')
+
+    if institution:
+        writer.descriptive_metadata('Institution', {
+            'RegNr': institution.reg_nr,
+            'Name': institution.name,
+            'Creator': institution.creator,
+            'CreatorPosition': institution.creator_position,
+            'Signer': institution.signer,
+            'SignerPosition': institution.signer_position,
+        })
+    writer.end_document()
+
+
+def write_fond_manifest(fond: Fond, out: BinaryIO) -> None:
+    """Write OPEX manifest of fond folder.
+
+    Inventory folders are read in chunks, so manifest size
+    does not affect memory usage.
+
+    Args:
+        fond: Fond instance.
+        out: Binary file-like object.
+    """
+    inventories = (_fond_inventories(fond)
+                   .values_list('number', 'postfix')
+                   .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+    writer = OpexWriter(out)
+    writer.start_document()
+    writer.start('Transfer')
+    writer.element('SourceID', fond.fond_code)
+    writer.folders(inventory_folder(number, postfix) for number, postfix in inventories)
+    writer.end('Transfer')
+
+    writer.start('Properties')
+    writer.element('Title', fond.fond_title)
+    writer.element('Description', fond.arch_title)
+    writer.end('Properties')
+
+    writer.descriptive_metadata('Fond', {
+        'FondCode': fond.fond_code,
+        'ArchiveAbbreviation': fond.arch_abbreviation,
+        'ArchiveTitle': fond.arch_title,
+        'FondNumber': fond.fond_number,
+        'FondTitle': fond.fond_title,
+        'Subfond': fond.subfond,
+    })
+    writer.end_document()
+
+
+def write_inventory_manifest(inventory: Inventory,
+                             out: BinaryIO,
+                             files: Optional[List[ContentFile]] = None,
+                             units: Optional[Iterable[Unit]] = None) -> None:
+    """Write OPEX manifest of inventory list folder.
+
+    Args:
+        inventory: Inventory instance.
+        out: Binary file-like object.
+        files: Content files of inventory list.
+        units: Storage units of inventory list, see 'inventories.units'.
+    """
+    writer = OpexWriter(out)
+    writer.start_document()
+    writer.start('Transfer')
+    writer.element('SourceID', f'{inventory.fond_id}-{inventory.number}{inventory.postfix}')
+    if files:
+        writer.fixities(files)
+        writer.files(files)
+    writer.end('Transfer')
+
+    writer.start('Properties')
+    writer.element('Title', f'{inventory.number}{inventory.postfix}.US')
+    writer.end('Properties')
+
+    writer.descriptive_metadata('Inventory', {
+        'Number': inventory.number,
+        'Postfix': inventory.postfix or None,
+        'Type': inventory.type or None,
+        'Electronic': inventory.electronic,
+        'LastGv': inventory.last_gv,
+        'StartDate': inventory.start_date,
+        'EndDate': inventory.end_date,
+        'StorageTerm': inventory.storage_term or None,
+        'ItemsPerPeriod': inventory.items_per_period,
+        'TotalItems': inventory.total_items,
+    }, units)
+    writer.end_document()
+
+
+def _write_file(path: Path, write, instance) -> None:
+    with open(path, 'wb') as out:
+        write(instance, out)
+
+
+def _place_file(source: Path, destination: Path) -> None:
+    """Link content file into package, copy if link is not possible"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def export_inventories(inventories: Iterable[Inventory],
+                       fond_path: Union[str, Path],
+                       fond_content: Optional[Path] = None) -> int:
+    """Write inventory list folders into fond folder.
+
+    Inventories are handled in chunks, fixity values of content
+    files are calculated and storage units are read for whole
+    chunk at once. Units are made of ranges while manifest is written.
+
+    Args:
+        inventories: Inventory instances, usually chunked queryset iterator.
+        fond_path: Path of fond folder.
+        fond_content: Content folder of fond, see 'content_folder'.
+
+    Returns:
+        Number of written inventory manifests.
+    """
+    fond_path = Path(fond_path)
+    inventories = iter(inventories)
+    count = 0
+
+    while chunk := list(islice(inventories, EXPORT_CHUNK_SIZE)):
+        files = {}
+        if fond_content is not None:
+            files = {inventory.pk: content_files(inventory, fond_content) for inventory in chunk}
+        # Ingested files are not hashed again, see 'dedup.store'
+        fixities = ContentReference.known_fixities(files)
+        fixities.update(compute_fixities(path for paths in files.values() for path in paths
+                                         if os.path.abspath(path) not in fixities))
+        units = units_by_inventory([inventory.pk for inventory in chunk])
+
+        for inventory in chunk:
+            name = inventory_folder(inventory.number, inventory.postfix)
+            folder = fond_path / name
+            folder.mkdir(parents=True, exist_ok=True)
+
+            inventory_files = []
+            for path in files.get(inventory.pk, []):
+                _place_file(path, folder / path.name)
+                inventory_files.append(ContentFile(path, path.stat().st_size,
+                                                   fixities[os.path.abspath(path)]))
+
+            with open(folder / f'{name}{OPEX_EXTENSION}', 'wb') as out:
+                write_inventory_manifest(inventory, out, inventory_files, units.get(inventory.pk))
+            count += 1
+
+    return count
+
+
+def export_project(project: Project, target: Union[str, Path]) -> Path:
+    """Write OPEX package of project into target folder.
+
+    Args:
+        project: Project instance.
+        target: Folder in which project folder is created.
+
+    Returns:
+        Path of project folder.
+    """
+    project_path = Path(target) / project_folder(project)
+    project_path.mkdir(parents=True, exist_ok=True)
+    _write_file(project_path / f'{project_folder(project)}{OPEX_EXTENSION}',
+                write_project_manifest, project)
+
+    fond = Fond.objects.filter(institution_id=project.pk).first()
+    if fond is None:
+        return project_path
+
+    fond_path = project_path / fond_folder(fond)
+    fond_path.mkdir(exist_ok=True)
+    _write_file(fond_path / f'{fond_folder(fond)}{OPEX_EXTENSION}', write_fond_manifest, fond)
+    export_inventories(_fond_inventories(fond).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+                       fond_path,
+                       content_folder(fond))
+
+    return project_path
@@ -0,0 +1,310 @@
+"""Module contains streaming packaging of built OPEX package.
+
+Package folder is written into ZIP or TAR archive as a stream of
+chunks, so archive is never kept in memory and content files are not
+copied into temporary folder. Files are read in 'PACKAGE_CHUNK_SIZE'
+parts and ZIP central directory is collected in temporary file, so
+memory usage does not depend on package size.
+
+ZIP entries use data descriptors, because archive can be written to
+stream which can't be seeked (HTTP response), and ZIP64 records where
+sizes or offsets exceed ZIP limits. Already compressed content files
+are stored without compression. In TAR archive content file which
+is linked several times, as deduplicated files are, is sent once.
+"""
+
+import os
+import struct
+import tarfile
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from django.conf import settings
+
+from exports.constants import (
+    COMPRESSED_EXTENSIONS,
+    PACKAGE_CHUNK_SIZE,
+    PACKAGE_FORMATS,
+    PACKAGE_LINK_CACHE,
+    ZIP64_LIMIT,
+)
+from exports.opex import project_folder
+from project.models import Project
+
+# ZIP record signatures
+_LOCAL_HEADER = 0x04034b50
+_DATA_DESCRIPTOR = 0x08074b50
+_CENTRAL_HEADER = 0x02014b50
+_ZIP64_END = 0x06064b50
+_ZIP64_LOCATOR = 0x07064b50
+_END = 0x06054b50
+
+# Sizes are written after data and names are UTF-8
+_ZIP_FLAGS = 0x08 | 0x800
+_STORED = 0
+_DEFLATED = 8
+_ZIP_VERSION = 20
+_ZIP64_VERSION = 45
+# Unix, so external attributes hold file mode
+_MADE_BY = 3 << 8
+_FILE_MODE = 0o100644
+_MAX_32 = 0xFFFFFFFF
+_MAX_16 = 0xFFFF
+
+
+class PackageEntry(NamedTuple):
+    """File of package folder.
+
+    'link' is device and inode of file with several hard links,
+    such as deduplicated content files, see 'dedup.store'.
+    """
+    name: str
+    path: Path
+    size: int
+    mtime: float
+    link: Optional[Tuple[int, int]] = None
+
+
+def package_entries(folder: Union[str, Path]) -> Iterator[PackageEntry]:
+    """Yield files of package folder.
+
+    Folders are scanned lazily without sorting, so even a fond folder
+    with millions of inventory folders is not listed into memory.
+    Hidden files are temporary files of builder and are skipped.
+
+    Args:
+        folder: Package folder, its name is the first part of entry names.
+    """
+    folder = Path(folder)
+
+    def scan(path: str, name: str) -> Iterator[PackageEntry]:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                entry_name = f'{name}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    yield from scan(entry.path, entry_name)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    link = (stat.st_dev, stat.st_ino) if stat.st_nlink > 1 else None
+                    yield PackageEntry(entry_name, Path(entry.path), stat.st_size,
+                                       stat.st_mtime, link)
+
+    yield from scan(str(folder), folder.name)
+
+
+def _dos_datetime(mtime: float):
+    """Return modification date and time in ZIP format"""
+    moment = time.localtime(mtime)
+    if moment.tm_year < 1980:
+        return (1 << 5) | 1, 0
+    date = ((moment.tm_year - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday
+    clock = (moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2)
+    return date, clock
+
+
+def _read_chunks(entry: PackageEntry, chunk_size: int) -> Iterator[bytes]:
+    """Read exactly 'entry.size' bytes of file"""
+    remaining = entry.size
+    with open(entry.path, 'rb') as source:
+        while remaining:
+            data = source.read(min(chunk_size, remaining))
+            if not data:
+                raise ValueError(f'{entry.path} changed while it was packaged')
+            remaining -= len(data)
+            yield data
+
+
+def _central_header(name: bytes, method: int, date: int, clock: int, crc: int,
+                    compressed: int, size: int, offset: int, zip64: bool) -> bytes:
+    """Return central directory record of ZIP entry"""
+    extra_values = []
+    if zip64:
+        extra_values += [size, compressed]
+        size = compressed = _MAX_32
+    if offset >= _MAX_32:
+        extra_values.append(offset)
+        offset = _MAX_32
+    extra = b''
+    if extra_values:
+        extra = struct.pack(f'<HH{len(extra_values)}Q', 1, 8 * len(extra_values), *extra_values)
+    version = _ZIP64_VERSION if extra_values else _ZIP_VERSION
+    return struct.pack('<IHHHHHHIIIHHHHHII', _CENTRAL_HEADER, _MADE_BY | version, version,
+                       _ZIP_FLAGS, method, clock, date, crc, compressed, size, len(name),
+                       len(extra), 0, 0, 0, _FILE_MODE << 16, offset) + name + extra
+
+
+def _end_records(count: int, directory_offset: int, directory_size: int) -> bytes:
+    """Return end of central directory records"""
+    records = b''
+    if count >= _MAX_16 or directory_offset >= _MAX_32 or directory_size >= _MAX_32:
+        records += struct.pack('<IQHHIIQQQQ', _ZIP64_END, 44, _MADE_BY | _ZIP64_VERSION,
+                               _ZIP64_VERSION, 0, 0, count, count,
+                               directory_size, directory_offset)
+        records += struct.pack('<IIQI', _ZIP64_LOCATOR, 0, directory_offset + directory_size, 1)
+    count = min(count, _MAX_16)
+    return records + struct.pack('<IHHHHIIH', _END, 0, 0, count, count,
+                                 min(directory_size, _MAX_32),
+                                 min(directory_offset, _MAX_32), 0)
+
+
+def iter_zip(entries: Iterable[PackageEntry],
+             chunk_size: int = PACKAGE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield ZIP archive of files as chunks of bytes.
+
+    Args:
+        entries: Files of archive, see 'package_entries'.
+        chunk_size: Size of one read of file.
+    """
+    offset = 0
+    count = 0
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size) as directory:
+        for entry in entries:
+            name = entry.name.encode('utf-8')
+            zip64 = entry.size >= ZIP64_LIMIT
+            compress = Path(entry.name).suffix.lower() not in COMPRESSED_EXTENSIONS
+            method = _DEFLATED if compress else _STORED
+            date, clock = _dos_datetime(entry.mtime)
+
+            extra = struct.pack('<HHQQ', 1, 16, 0, 0) if zip64 else b''
+            unknown_size = _MAX_32 if zip64 else 0
+            header = struct.pack('<IHHHHHIIIHH', _LOCAL_HEADER,
+                                 _ZIP64_VERSION if zip64 else _ZIP_VERSION,
+                                 _ZIP_FLAGS, method, clock, date, 0,
+                                 unknown_size, unknown_size, len(name), len(extra)) + name + extra
+            yield header
+
+            crc = size = compressed = 0
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if compress else None
+            for data in _read_chunks(entry, chunk_size):
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                if compressor is not None:
+                    data = compressor.compress(data)
+                if data:
+                    compressed += len(data)
+                    yield data
+            if compressor is not None:
+                data = compressor.flush()
+                if data:
+                    compressed += len(data)
+                    yield data
+
+            if not zip64 and max(size, compressed) >= _MAX_32:
+                raise ValueError(f'{entry.path} changed while it was packaged')
+            yield struct.pack('<IIQQ' if zip64 else '<IIII',
+                              _DATA_DESCRIPTOR, crc, compressed, size)
+
+            directory.write(_central_header(name, method, date, clock, crc,
+                                            compressed, size, offset, zip64))
+            offset += len(header) + compressed + (24 if zip64 else 16)
+            count += 1
+
+        directory_size = directory.tell()
+        directory.seek(0)
+        while data := directory.read(chunk_size):
+            yield data
+    yield _end_records(count, offset, directory_size)
+
+
+def iter_tar(entries: Iterable[PackageEntry],
+             chunk_size: int = PACKAGE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield uncompressed TAR archive (POSIX pax format) of files as chunks of bytes.
+
+    File which is hard link to already written file is written as
+    link entry without content, so duplicate content files are sent
+    once. Up to 'PACKAGE_LINK_CACHE' linked files are remembered.
+
+    Args:
+        entries: Files of archive, see 'package_entries'.
+        chunk_size: Size of one read of file.
+    """
+    offset = 0
+    written: Dict[Tuple[int, int], str] = {}
+    for entry in entries:
+        info = tarfile.TarInfo(entry.name)
+        info.mtime = int(entry.mtime)
+        info.mode = 0o644
+        linked = written.get(entry.link) if entry.link else None
+        if linked is not None:
+            info.type = tarfile.LNKTYPE
+            info.linkname = linked
+        else:
+            info.size = entry.size
+            if entry.link and len(written) < PACKAGE_LINK_CACHE:
+                written[entry.link] = entry.name
+        header = info.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8')
+        yield header
+        offset += len(header)
+        if linked is not None:
+            continue
+
+        yield from _read_chunks(entry, chunk_size)
+        padding = -entry.size % tarfile.BLOCKSIZE
+        if padding:
+            yield tarfile.NUL * padding
+        offset += entry.size + padding
+
+    # Archive ends with two empty blocks and is padded to whole record
+    end = 2 * tarfile.BLOCKSIZE
+    end += -(offset + end) % tarfile.RECORDSIZE
+    yield tarfile.NUL * end
+
+
+def iter_archive(folder: Union[str, Path],
+                 archive_format: str = 'zip',
+                 chunk_size: int = PACKAGE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield archive of package folder as chunks of bytes.
+
+    Args:
+        folder: Package folder, see 'exports.builder.build_package'.
+        archive_format: 'zip' or 'tar'.
+        chunk_size: Size of one read of file.
+    """
+    if archive_format not in PACKAGE_FORMATS:
+        raise ValueError(f'Unknown archive format "{archive_format}"')
+    writer = iter_zip if archive_format == 'zip' else iter_tar
+    return writer(package_entries(folder), chunk_size)
+
+
+def write_archive(folder: Union[str, Path],
+                  path: Union[str, Path],
+                  archive_format: str = 'zip') -> int:
+    """Write archive of package folder into file.
+
+    Archive is written into temporary file next to 'path' and
+    renamed when it is complete, so unfinished archive is never
+    served as finished one.
+
+    Returns:
+        Size of archive in bytes.
+    """
+    path = Path(path)
+    temporary = path.with_name(f'.{path.name}.part')
+    size = 0
+    try:
+        with open(temporary, 'wb') as out:
+            for data in iter_archive(folder, archive_format):
+                out.write(data)
+                size += len(data)
+        os.replace(temporary, path)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    return size
+
+
+def archive_path(project: Project, archive_format: str) -> Path:
+    """Return path of finished archive of project's package"""
+    return Path(settings.OPEX_EXPORT_ROOT) / f'{project_folder(project)}.{archive_format}'
+
+
+def remove_archives(folder: Union[str, Path]) -> None:
+    """Remove finished archives of package folder, as they are out of date"""
+    folder = Path(folder)
+    for archive_format in PACKAGE_FORMATS:
+        folder.with_name(f'{folder.name}.{archive_format}').unlink(missing_ok=True)
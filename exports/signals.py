@@ -0,0 +1,112 @@
+"""Module contains signal receivers which mark OPEX manifests as stale"""
+
+from itertools import islice
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from exports.constants import EXPORT_CHUNK_SIZE, FOND_MANIFEST_FIELDS
+from exports.models import StaleManifest
+from fonds.models import Fond
+from helpers.signals import bulk_created, queryset_updated
+from institutions.models import Institution
+from inventories.models import Inventory, StorageUnit, UnitRange
+from project.models import Project
+
+PROJECT, FOND, INVENTORY = StaleManifest.PROJECT, StaleManifest.FOND, StaleManifest.INVENTORY
+
+
+def _project_records(pks):
+    return [(pk, PROJECT, pk) for pk in pks]
+
+
+def _fond_records(pks):
+    # Fond folder name is listed in project manifest.
+    return [record for pk in pks for record in ((pk, FOND, pk), (pk, PROJECT, pk))]
+
+
+def _inventory_records(inventories, listing_changed=True):
+    """Records for (pk, fond_id) pairs of inventory lists"""
+    records = []
+    for pk, fond_id in inventories:
+        records.append((fond_id, INVENTORY, pk))
+        if listing_changed:
+            records.append((fond_id, FOND, fond_id))
+    return records
+
+
+def _unit_records(inventory_ids):
+    """Records of inventory lists whose storage units changed"""
+    inventory_ids = iter(set(inventory_ids))
+    records = []
+    while chunk := list(islice(inventory_ids, EXPORT_CHUNK_SIZE)):
+        records += _inventory_records(Inventory.objects.filter(pk__in=chunk)
+                                      .values_list('pk', 'fond_id'), listing_changed=False)
+    return records
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Institution)
+@receiver(post_delete, sender=Institution)
+def mark_project(sender, instance, **kwargs):
+    StaleManifest.mark(_project_records([instance.pk]))
+
+
+@receiver(post_delete, sender=Project)
+def forget_project(sender, instance, **kwargs):
+    # Package of deleted project is not exported anymore.
+    StaleManifest.objects.filter(project_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Fond)
+@receiver(post_delete, sender=Fond)
+def mark_fond(sender, instance, **kwargs):
+    StaleManifest.mark(_fond_records([instance.pk]))
+
+
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+def mark_inventory(sender, instance, **kwargs):
+    StaleManifest.mark(_inventory_records([(instance.pk, instance.fond_id)]))
+
+
+@receiver(post_save, sender=UnitRange)
+@receiver(post_save, sender=StorageUnit)
+@receiver(post_delete, sender=UnitRange)
+@receiver(post_delete, sender=StorageUnit)
+def mark_units(sender, instance, **kwargs):
+    StaleManifest.mark(_unit_records([instance.inventory_id]))
+
+
+@receiver(bulk_created)
+def mark_bulk_created(sender, instances, **kwargs):
+    pks = [instance.pk for instance in instances if instance.pk is not None]
+    if sender is Inventory:
+        StaleManifest.mark(_inventory_records(
+            (instance.pk, instance.fond_id) for instance in instances
+            if instance.pk is not None))
+    elif sender in (UnitRange, StorageUnit):
+        StaleManifest.mark(_unit_records(instance.inventory_id for instance in instances))
+    elif sender is Fond:
+        StaleManifest.mark(_fond_records(pks))
+    elif sender in (Project, Institution):
+        StaleManifest.mark(_project_records(pks))
+
+
+@receiver(queryset_updated)
+def mark_updated(sender, pks, fields, **kwargs):
+    if sender is Inventory:
+        listing_changed = bool(FOND_MANIFEST_FIELDS.intersection(fields))
+        pks = iter(pks)
+        while chunk := list(islice(pks, EXPORT_CHUNK_SIZE)):
+            inventories = Inventory.objects.filter(pk__in=chunk).values_list('pk', 'fond_id')
+            StaleManifest.mark(_inventory_records(inventories, listing_changed))
+    elif sender in (UnitRange, StorageUnit):
+        pks = iter(pks)
+        while chunk := list(islice(pks, EXPORT_CHUNK_SIZE)):
+            StaleManifest.mark(_unit_records(sender.objects.filter(pk__in=chunk)
+                                             .values_list('inventory_id', flat=True)))
+    elif sender is Fond:
+        StaleManifest.mark(_fond_records(pks))
+    elif sender in (Project, Institution):
+        StaleManifest.mark(_project_records(pks))
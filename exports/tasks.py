@@ -0,0 +1,27 @@
+"""Module contains exports app tasks run by job workers"""
+
+from django.conf import settings
+
+from exports.builder import build_package
+from exports.constants import BUILD_PACKAGE
+from jobs.registry import task
+from jobs.worker import JobContext
+from project.models import Project
+
+
+@task(BUILD_PACKAGE)
+def build_package_task(job: JobContext) -> dict:
+    """Build OPEX package of project.
+
+    Package is built in staging folder, so interrupted build
+    is simply started again, incremental build writes only
+    manifests which are still stale.
+    """
+    payload = job.payload
+    project = Project.objects.get(pk=payload['project_id'])
+    path = build_package(project,
+                         payload.get('target') or settings.OPEX_EXPORT_ROOT,
+                         workers=payload.get('workers'),
+                         progress=job.progress,
+                         incremental=payload.get('incremental', False))
+    return {'path': str(path)}
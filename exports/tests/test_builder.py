@@ -0,0 +1,87 @@
+"""Module contains tests for exports.builder"""
+
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from exports.builder import inventory_ranges
+from exports.models import StaleManifest
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.models import Project
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+class BuildOpexTest(TestCase):
+    """Class for testing build_opex command"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.add_project('Build')
+        cls.institution = Institution.add_institution(1, 'Iestāde', project=cls.project)
+        cls.fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                 False, cls.institution)
+        Inventory.bulk_import_from_vvais(
+            ({**INVENTORY_LIST, 'number': number} for number in range(1, 11)), cls.fond)
+
+    def test_inventory_ranges(self):
+        """Test that ranges cover all inventories without overlapping"""
+        ranges = inventory_ranges(self.fond, 3)
+
+        pks = set(Inventory.objects.values_list('pk', flat=True))
+        covered = [pk for first, last in ranges for pk in range(first, last + 1)]
+        self.assertEqual(len(covered), len(set(covered)))
+        self.assertTrue(pks <= set(covered))
+
+    def test_build_opex(self):
+        """Test that command replaces previous package"""
+        with tempfile.TemporaryDirectory() as target:
+            stale = Path(target) / 'Build' / 'stale.txt'
+            stale.parent.mkdir()
+            stale.write_text('old')
+
+            out = io.StringIO()
+            call_command('build_opex', 'Build', target=target, workers=1, stdout=out)
+
+            self.assertIn('10/10 inventory lists exported', out.getvalue())
+            self.assertFalse(stale.exists())
+            self.assertEqual(len(list((Path(target) / 'Build' / 'F1').glob('*/*.opex'))), 10)
+            self.assertEqual([path.name for path in Path(target).iterdir()], ['Build'])
+
+    def test_incremental(self):
+        """Test that incremental build writes only stale manifests"""
+        with tempfile.TemporaryDirectory() as target:
+            call_command('build_opex', 'Build', target=target, workers=1, stdout=io.StringIO())
+            self.assertFalse(StaleManifest.objects.exists())
+
+            fond_path = Path(target) / 'Build' / 'F1'
+            untouched = fond_path / '2a' / '2a.opex'
+            untouched.write_text('not rebuilt')
+
+            Inventory.objects.filter(number=1).update(total_items=99)
+            Inventory.objects.filter(number=3).delete()
+            Institution.bulk_update(self.project.pk, {'creator': 'Jānis'})
+
+            call_command('build_opex', 'Build', target=target, workers=1,
+                         incremental=True, stdout=io.StringIO())
+
+            self.assertEqual(untouched.read_text(), 'not rebuilt')
+            self.assertIn('<TotalItems>99</TotalItems>',
+                          (fond_path / '1a' / '1a.opex').read_text())
+            self.assertFalse((fond_path / '3a').exists())
+            self.assertNotIn('<opex:Folder>3a</opex:Folder>',
+                             (fond_path / 'F1.opex').read_text())
+            self.assertIn('Jānis', (Path(target) / 'Build' / 'Build.opex').read_text())
+            self.assertFalse(StaleManifest.objects.exists())
@@ -0,0 +1,47 @@
+"""Module contains tests for exports.fixity"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from exports.fixity import compute_fixities, hash_file
+from exports.models import FixityRecord
+
+
+class FixityTest(TestCase):
+    """Class for testing fixity calculation"""
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = Path(folder.name) / 'scan.pdf'
+        self.path.write_bytes(b'content' * 1000)
+
+    def test_hash_file(self):
+        """Test that all algorithms are calculated"""
+        data = self.path.read_bytes()
+        self.assertEqual(hash_file(self.path), {
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'md5': hashlib.md5(data).hexdigest(),
+        })
+
+    def test_cache(self):
+        """Test that unchanged files are not hashed again"""
+        first = compute_fixities([self.path])
+        self.assertEqual(FixityRecord.objects.count(), 1)
+
+        with patch('exports.fixity.hash_file') as mock_hash:
+            second = compute_fixities([self.path])
+        mock_hash.assert_not_called()
+        self.assertEqual(first, second)
+
+        # Changed file is hashed again.
+        self.path.write_bytes(b'changed')
+        os.utime(self.path, ns=(0, 0))
+        third = compute_fixities([self.path])
+        self.assertEqual(third[str(self.path)]['md5'], hashlib.md5(b'changed').hexdigest())
+        self.assertEqual(FixityRecord.objects.count(), 1)
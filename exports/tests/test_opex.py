@@ -0,0 +1,112 @@
+"""Module contains tests for exports.opex"""
+
+import io
+import tempfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+from django.test import TestCase, override_settings
+
+from exports.constants import DESCRIPTION_NAMESPACE, OPEX_NAMESPACE
+from exports.opex import export_project, write_fond_manifest
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from inventories.units import edit_unit, generate_units
+from project.models import Project
+
+OPEX = {'opex': OPEX_NAMESPACE, 'd': DESCRIPTION_NAMESPACE}
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+class OpexExportTest(TestCase):
+    """Class for testing OPEX manifest generation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.add_project('Export')
+        cls.institution = Institution.add_institution(1, 'Iestāde', project=cls.project)
+        cls.fond = Fond.add_fond('LVA/F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                 False, cls.institution)
+        Inventory.bulk_import_from_vvais(
+            ({**INVENTORY_LIST, 'number': number} for number in (2, 1, 3)), cls.fond)
+
+    def test_fond_manifest(self):
+        """Test that fond manifest lists inventory folders in order"""
+        out = io.BytesIO()
+        write_fond_manifest(self.fond, out)
+
+        root = ElementTree.fromstring(out.getvalue())
+        folders = [folder.text for folder in
+                   root.findall('opex:Transfer/opex:Manifest/opex:Folders/opex:Folder', OPEX)]
+        self.assertEqual(folders, ['1a', '2a', '3a'])
+        self.assertEqual(root.findtext('opex:Properties/opex:Title', namespaces=OPEX),
+                         'Valsts meži')
+        self.assertEqual(root.findtext('opex:DescriptiveMetadata/d:Fond/d:Subfond',
+                                       namespaces=OPEX), 'false')
+
+    def test_export_project(self):
+        """Test that whole package tree is written"""
+        with tempfile.TemporaryDirectory() as target:
+            project_path = export_project(self.project, target)
+
+            self.assertEqual(project_path, Path(target) / 'Export')
+            root = ElementTree.parse(project_path / 'Export.opex').getroot()
+            self.assertEqual(
+                root.findtext('opex:Transfer/opex:Manifest/opex:Folders/opex:Folder',
+                              namespaces=OPEX),
+                'LVA_F1')
+
+            inventory_path = project_path / 'LVA_F1' / '2a' / '2a.opex'
+            root = ElementTree.parse(inventory_path).getroot()
+            self.assertEqual(root.findtext('opex:DescriptiveMetadata/d:Inventory/d:TotalItems',
+                                           namespaces=OPEX), '60')
+
+    def test_content_files(self):
+        """Test that content files and fixities of electronic inventory are exported"""
+        with tempfile.TemporaryDirectory() as content, \
+                tempfile.TemporaryDirectory() as target, \
+                override_settings(OPEX_CONTENT_ROOT=content):
+            folder = Path(content) / 'LVA_F1' / '1a'
+            folder.mkdir(parents=True)
+            (folder / 'scan.pdf').write_bytes(b'pdf')
+
+            project_path = export_project(self.project, target)
+
+            inventory_path = project_path / 'LVA_F1' / '1a'
+            self.assertEqual((inventory_path / 'scan.pdf').read_bytes(), b'pdf')
+            root = ElementTree.parse(inventory_path / '1a.opex').getroot()
+            file = root.find('opex:Transfer/opex:Manifest/opex:Files/opex:File', OPEX)
+            self.assertEqual((file.text, file.get('size')), ('scan.pdf', '3'))
+            fixities = root.findall('opex:Transfer/opex:Fixities/opex:Fixity', OPEX)
+            self.assertEqual({fixity.get('type') for fixity in fixities}, {'SHA-256', 'MD5'})
+
+    def test_storage_units(self):
+        """Test that storage units are listed in inventory manifest"""
+        inventory = Inventory.objects.get(fond=self.fond, number=1)
+        generate_units(Inventory.objects.filter(pk=inventory.pk), title='Lieta')
+        edit_unit(inventory.pk, 2, title='Fotogrāfijas', sheets=4)
+
+        with tempfile.TemporaryDirectory() as target:
+            project_path = export_project(self.project, target)
+
+            root = ElementTree.parse(project_path / 'LVA_F1' / '1a' / '1a.opex').getroot()
+            units = root.findall('opex:DescriptiveMetadata/d:Inventory/d:StorageUnits/'
+                                 'd:StorageUnit', OPEX)
+            self.assertEqual([unit.findtext('d:Number', namespaces=OPEX) for unit in units],
+                             [str(number) for number in range(1, 56)])
+            self.assertEqual(units[1].findtext('d:Title', namespaces=OPEX), 'Fotogrāfijas')
+            self.assertEqual(units[1].findtext('d:Sheets', namespaces=OPEX), '4')
+            self.assertEqual(units[2].findtext('d:Title', namespaces=OPEX), 'Lieta')
+
+            root = ElementTree.parse(project_path / 'LVA_F1' / '2a' / '2a.opex').getroot()
+            self.assertIsNone(root.find('opex:DescriptiveMetadata/d:Inventory/d:StorageUnits',
+                                        OPEX))
@@ -0,0 +1,116 @@
+"""Module contains tests for exports.packaging"""
+
+import io
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import TestCase, override_settings
+
+from exports.builder import build_package
+from exports.packaging import iter_archive
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.models import Project
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+class PackagingTest(TestCase):
+    """Class for testing archives of OPEX package"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        root = Path(self.folder.name)
+        self.settings = override_settings(OPEX_EXPORT_ROOT=root / 'opex',
+                                          OPEX_CONTENT_ROOT=root / 'content')
+        self.settings.enable()
+
+        self.project = Project.add_project('Archive')
+        institution = Institution.add_institution(1, 'Iestāde', project=self.project)
+        fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži', False, institution)
+        Inventory.bulk_import_from_vvais(
+            ({**INVENTORY_LIST, 'number': number} for number in (1, 2)), fond)
+
+        content = root / 'content' / 'F1' / '1a'
+        content.mkdir(parents=True)
+        (content / 'foto.jpg').write_bytes(b'\xff\xd8' + bytes(range(256)) * 40)
+        (content / 'apraksts.txt').write_text('Apraksts ' * 1000, encoding='utf-8')
+
+        self.package = build_package(self.project, root / 'opex', workers=1)
+        self.files = {f'Archive/{path.relative_to(self.package).as_posix()}': path.read_bytes()
+                      for path in self.package.rglob('*') if path.is_file()}
+
+    def tearDown(self):
+        self.settings.disable()
+        self.folder.cleanup()
+
+    def test_zip(self):
+        """Test that ZIP archive holds all files and keeps media uncompressed"""
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_archive(self.package, 'zip'))))
+
+        self.assertIsNone(archive.testzip())
+        self.assertEqual({name: archive.read(name) for name in archive.namelist()}, self.files)
+        self.assertEqual(archive.getinfo('Archive/F1/1a/foto.jpg').compress_type,
+                         zipfile.ZIP_STORED)
+        text = archive.getinfo('Archive/F1/1a/apraksts.txt')
+        self.assertEqual(text.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(text.compress_size, text.file_size)
+
+    def test_zip64(self):
+        """Test that ZIP64 records can be read"""
+        with mock.patch('exports.packaging.ZIP64_LIMIT', 0), \
+                mock.patch('exports.packaging._MAX_16', 2):
+            data = b''.join(iter_archive(self.package, 'zip', chunk_size=100))
+        archive = zipfile.ZipFile(io.BytesIO(data))
+
+        self.assertIsNone(archive.testzip())
+        self.assertEqual({name: archive.read(name) for name in archive.namelist()}, self.files)
+
+    def test_tar(self):
+        """Test that TAR archive holds all files"""
+        data = b''.join(iter_archive(self.package, 'tar', chunk_size=100))
+        self.assertEqual(len(data) % tarfile.RECORDSIZE, 0)
+
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            self.assertEqual({member.name: archive.extractfile(member).read()
+                              for member in archive.getmembers()}, self.files)
+
+    def test_download(self):
+        """Test that finished archive is sent as file and missing one is streamed"""
+        self.client.force_login(User.objects.create_user('archivist'))
+        url = f'/exports/projects/{self.project.pk}/package/'
+
+        response = self.client.get(url, {'format': 'tar'})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Archive.tar"')
+        streamed = b''.join(response.streaming_content)
+
+        call_command('package_opex', 'Archive', '--format', 'tar', stdout=io.StringIO())
+        response = self.client.get(url, {'format': 'tar'})
+        self.assertIsInstance(response, FileResponse)
+        with tarfile.open(fileobj=io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(len(archive.getmembers()), len(self.files))
+        response.close()
+        self.assertEqual(len(streamed) % tarfile.RECORDSIZE, 0)
+
+        # Rebuilt package makes finished archive out of date
+        build_package(self.project, self.package.parent, workers=1)
+        self.assertFalse((self.package.parent / 'Archive.tar').exists())
+
+        self.assertEqual(self.client.get(url, {'format': 'rar'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from exports import views
+
+app_name = 'exports'
+
+urlpatterns = [
+    path('projects/<int:project_id>/package/', views.download_package, name='download-package'),
+]
@@ -0,0 +1,57 @@
+"""Module contains exports app views"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET
+
+from exports.constants import PACKAGE_FORMATS
+from exports.opex import project_folder
+from exports.packaging import archive_path, iter_archive
+from project.models import Project
+
+
+@require_GET
+def download_package(request: HttpRequest, project_id: int) -> HttpResponse:
+    """Download OPEX package of project as archive.
+
+    Archive format is given with 'format' query parameter, 'zip' by
+    default. Archive written by 'package_opex' command is returned as
+    file, so server can send it with sendfile. If there is no such
+    archive, it is made from package folder while it is sent.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    archive_format = request.GET.get('format', 'zip')
+    if archive_format not in PACKAGE_FORMATS:
+        return JsonResponse({'error': f'Format should be one of: {", ".join(PACKAGE_FORMATS)}'},
+                            status=400)
+
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        return JsonResponse({'error': 'Project does not exist'}, status=404)
+
+    filename = f'{project_folder(project)}.{archive_format}'
+    try:
+        return FileResponse(open(archive_path(project, archive_format), 'rb'),
+                            as_attachment=True, filename=filename,
+                            content_type=PACKAGE_FORMATS[archive_format])
+    except FileNotFoundError:
+        pass
+
+    folder = Path(settings.OPEX_EXPORT_ROOT) / project_folder(project)
+    if not folder.is_dir():
+        return JsonResponse({'error': 'Package is not built'}, status=404)
+
+    response = StreamingHttpResponse(iter_archive(folder, archive_format),
+                                     content_type=PACKAGE_FORMATS[archive_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
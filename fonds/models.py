@@ -7,7 +7,16 @@ from django.db import models, OperationalError
 from retry import retry
 
 from fonds.constants import FOND_EXISTS_MSG
-from helpers.constants import DELAY, TRIES, UNEXPECTED_ERROR_MSG, WRONG_VALUE_PROVIDED
+from helpers.constants import (
+    BACKOFF,
+    DELAY,
+    JITTER,
+    TRIES,
+    UNEXPECTED_ERROR_MSG,
+    WRONG_VALUE_PROVIDED
+)
+from helpers.instrumentation import instrumented
+from helpers.querysets import TrackedQuerySet
 from institutions.models import Institution
 
 logger = logging.getLogger(__name__)
@@ -27,6 +36,8 @@ class Fond(models.Model):
         primary_key=True,
     )
 
+    objects = TrackedQuerySet.as_manager()
+
     class Meta:
         db_table = 'fonds'
 
@@ -35,7 +46,8 @@ class Fond(models.Model):
         return f'{self.fond_code}'
     
     @staticmethod
-    @retry(OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    @instrumented()
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
     def add_fond(
         fond_code: str,
         arch_abbreviation: str,
@@ -59,8 +71,10 @@ class Fond(models.Model):
             Fond instance if new fond created, 
             else returns message with worning
         """
-        # Pārbauda vai fonds ar doto uzskaites kodu eksistē
-        fond_exists = Fond.objects.filter(fond_code=fond_code).exists()
+        from project.shards import exists_in_projects
+
+        # Pārbauda vai fonds ar doto uzskaites kodu eksistē, arī projektu datubāzēs
+        fond_exists = exists_in_projects(Fond, fond_code=fond_code)
         if fond_exists:
             return FOND_EXISTS_MSG
      
@@ -1,8 +1,21 @@
 """Konstantes kuras tiek izmantotas visā projektā"""
 
-# DB retry parameteri
+# DB retry parameteri. Gaidīšanu uz bloķētu datubāzi veic SQLite
+# (SQLITE_BUSY_TIMEOUT), tāpēc atkārtojumi ir īsi un ar nejaušu nobīdi,
+# lai vairāki procesi neatkārtotu pieprasījumus vienlaicīgi.
 TRIES = 3
-DELAY = 1
+DELAY = 0.05
+BACKOFF = 2
+JITTER = (0, 0.1)
+
+# SQLite parametri
+SQLITE_BUSY_TIMEOUT = 5000  # ms
+WRITE_QUEUE_MAX_BATCH = 100
+# Django pieņem 999 parametrus vienā vaicājumā (vecāku SQLite robeža),
+# tāpēc 'bulk_create' sadala lielus ievietojumus. SQLite kopš 3.32
+# pieļauj 32766, lielāka robeža netiek izmantota, lai vaicājumi
+# nebūtu pārāk gari.
+SQLITE_MAX_QUERY_PARAMS = 32766
 
 # Logger messages
 UNEXPECTED_ERROR_MSG = 'Unexpected exception occured'
@@ -12,3 +25,24 @@ WRONG_VALUE_PROVIDED = 'Nepareizā vērtība'
 VVAIS_TYPE = ['foto', 'skaņas', 'tekstuāls', 'video', 'datubāze']
 VVAIS_MEDIA = ['papīrs', 'elektronisks']
 VVAIS_STORAGE_TERM = ['Pastāvīgi glabājamās lietas', 'Ilgstoši glabājamās lietas']
+
+# Projekta koka modeļi, kas tiek glabāti projekta atsevišķā datubāzē
+# (skatīt 'helpers.routers'). Projekta rinda tiek kopēta arī tur,
+# lai ārējās atslēgas uz to būtu derīgas.
+SHARDED_MODELS = frozenset((
+    'institutions.institution',
+    'fonds.fond',
+    'inventories.inventory',
+    'inventories.unitrange',
+    'inventories.storageunit',
+    'inventories.vvaisupload',
+    'aggregates.fondsummary',
+    'exports.stalemanifest',
+    'dedup.contentreference',
+))
+SHARD_MIRRORED_MODELS = frozenset(('project.project',))
+# Kopējās datubāzes modeļi, uz kuriem atsaucas projekta datubāzes rindas
+# bez ārējās atslēgas ierobežojuma. Satura krātuve ir kopēja visiem
+# projektiem, lai vienāds saturs tiktu glabāts vienreiz.
+SHARD_CATALOG_MODELS = frozenset(('dedup.contentobject',))
+SHARD_ALIAS_PREFIX = 'project_'
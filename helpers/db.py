@@ -0,0 +1,207 @@
+"""Database helpers for SQLite backend.
+
+SQLite allows only one writer at a time. Connections are configured
+to use WAL journal, so readers don't block the writer, and to wait for
+a lock instead of failing at once. Writes from several threads of one
+process can be sent through 'WriteQueue', which runs them in one writer
+thread and commits queued writes together in one transaction.
+"""
+
+import contextvars
+import logging
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from retry.api import retry_call
+
+from helpers.constants import (
+    BACKOFF,
+    DELAY,
+    JITTER,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_MAX_QUERY_PARAMS,
+    TRIES,
+    WRITE_QUEUE_MAX_BATCH,
+)
+from helpers.instrumentation import count_queued_queries
+from helpers.routers import current_database
+
+logger = logging.getLogger(__name__)
+
+
+def configure_sqlite(sender, connection, **kwargs) -> None:
+    """Set up new SQLite connection, receiver of 'connection_created' signal"""
+    if connection.vendor != 'sqlite':
+        return
+    # Bulk inserts and lookups use limit of linked SQLite, not 999
+    limit = connection.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    connection.features.max_query_params = min(limit, SQLITE_MAX_QUERY_PARAMS)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}')
+
+
+class WriteQueue:
+    """Runs database writes in one writer thread.
+
+    Writes which are waiting in queue are run in one transaction,
+    each in its own savepoint, so failure of one write doesn't
+    roll back others.
+    """
+
+    def __init__(self, using: str = 'default', max_batch: int = WRITE_QUEUE_MAX_BATCH):
+        self.using = using
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """Put write into queue.
+
+        Returns:
+            Future with result of function, result is set
+            when transaction is committed.
+        """
+        future = Future()
+        self._start()
+        # Write is run in context of caller, see 'helpers.routers'
+        context = contextvars.copy_context()
+        self._queue.put((future, context.run, (function, *args), kwargs))
+        return future
+
+    def run(self, function: Callable, *args, **kwargs):
+        """Run write in writer thread and wait for result.
+
+        If caller is already in transaction, write is run at once,
+        as writer thread can't take part in caller's transaction.
+        """
+        if connections[self.using].in_atomic_block:
+            return function(*args, **kwargs)
+        return self.submit(function, *args, **kwargs).result()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work,
+                                                name='sqlite-writer',
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Run queued writes, then stop writer thread and close its connection"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def _work(self) -> None:
+        # Queries of writes are counted for instrumented callers
+        with connections[self.using].execute_wrapper(count_queued_queries):
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                # None is put into queue by 'stop'
+                writes = [write for write in batch if write is not None]
+                if writes:
+                    self._run_batch(writes)
+                if len(writes) < len(batch):
+                    connections[self.using].close()
+                    return
+
+    def _run_batch(self, batch: list) -> None:
+        delay = DELAY
+        for attempt in range(1, TRIES + 1):
+            try:
+                results = self._commit(batch)
+                break
+            except OperationalError as error:
+                if attempt == TRIES:
+                    for future, *_ in batch:
+                        future.set_exception(error)
+                    return
+                logger.warning('%s, retrying in %s seconds...', error, delay)
+                time.sleep(delay)
+                delay = delay * BACKOFF + random.uniform(*JITTER)
+            except Exception as error:
+                logger.error('Write batch failed', exc_info=True)
+                for future, *_ in batch:
+                    future.set_exception(error)
+                return
+
+        for (future, *_), (succeeded, result) in zip(batch, results):
+            if succeeded:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    def _commit(self, batch: list) -> list:
+        """Run all writes of batch in one transaction"""
+        results = []
+        with transaction.atomic(using=self.using):
+            for _, function, args, kwargs in batch:
+                try:
+                    with transaction.atomic(using=self.using):
+                        results.append((True, function(*args, **kwargs)))
+                except OperationalError:
+                    # Database is locked, whole batch is retried.
+                    raise
+                except Exception as error:
+                    results.append((False, error))
+        return results
+
+
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+
+
+def get_write_queue(using: str = 'default') -> WriteQueue:
+    """Return shared write queue of database"""
+    with _write_queues_lock:
+        if using not in _write_queues:
+            _write_queues[using] = WriteQueue(using)
+        return _write_queues[using]
+
+
+def close_write_queue(using: str) -> None:
+    """Stop write queue of database, e.g. before its file is detached"""
+    with _write_queues_lock:
+        write_queue = _write_queues.pop(using, None)
+    if write_queue is not None:
+        write_queue.stop()
+
+
+def run_write(function: Callable, *args, using: Optional[str] = None, **kwargs):
+    """Run database write through write queue if it is turned on.
+
+    Write queue is used for SQLite database when setting
+    'SQLITE_WRITE_QUEUE' is True, otherwise function is called directly.
+    Database is the one of current context by default, so every project
+    shard has its own writer.
+
+    Locked database is retried here or by write queue, so function
+    itself should not be decorated with '@retry': retrying inside
+    shared transaction of writer would hold the whole queue.
+    """
+    using = using or current_database()
+    if (getattr(settings, 'SQLITE_WRITE_QUEUE', False)
+            and connections[using].vendor == 'sqlite'):
+        return get_write_queue(using).run(function, *args, **kwargs)
+    if connections[using].in_atomic_block:
+        # Transaction of caller is retried by caller
+        return function(*args, **kwargs)
+    return retry_call(function, fargs=args, fkwargs=kwargs, exceptions=OperationalError,
+                      tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
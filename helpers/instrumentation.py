@@ -0,0 +1,317 @@
+"""Per-operation instrumentation of model helpers.
+
+Functions decorated with 'instrumented' record for every call number
+of SQL queries, time spent in database, wall time and number of
+retries. Values are aggregated in process into histograms with fixed
+bucket bounds, so recording is a few additions under a lock and can
+be left on in production. It is on when setting 'OPEX_INSTRUMENTATION'
+is true.
+
+Retries are counted from queries failed with 'OperationalError',
+which is the exception '@retry' reacts to. Decorator should be put
+above '@retry', so all attempts are inside one call.
+
+Queries are counted on connections of calling thread and, for writes
+sent to SQLite write queue ('helpers.db.run_write'), on connection of
+writer thread, which runs them in context of caller.
+
+Collected metrics are read with 'get_metrics' or, if setting
+'OPEX_METRICS_DIR' is set, written there at process exit, one file
+per process, and shown by 'opex_metrics' management command.
+"""
+
+import atexit
+import bisect
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of histogram buckets, last bucket has no upper bound
+TIME_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)  # ms
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+METRICS = {
+    'wall_ms': TIME_BUCKETS,
+    'db_ms': TIME_BUCKETS,
+    'queries': COUNT_BUCKETS,
+    'retries': COUNT_BUCKETS,
+}
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds"""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'total', 'max')
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, data: dict) -> None:
+        """Add values of histogram serialized with 'as_dict'"""
+        if tuple(data['bounds']) != self.bounds:
+            raise ValueError('Histograms have different bucket bounds')
+        self.buckets = [own + other for own, other in zip(self.buckets, data['buckets'])]
+        self.count += data['count']
+        self.total += data['total']
+        self.max = max(self.max, data['max'])
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return upper bound of bucket which contains given percentile.
+
+        Value above the last bound is estimated with maximum value.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            'bounds': list(self.bounds),
+            'buckets': list(self.buckets),
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+        }
+
+
+class OperationMetrics:
+    """Histograms of one operation"""
+
+    __slots__ = ('calls', 'errors', 'histograms')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.histograms = {name: Histogram(bounds) for name, bounds in METRICS.items()}
+
+    def merge(self, data: dict) -> None:
+        self.calls += data['calls']
+        self.errors += data['errors']
+        for name, histogram in data['histograms'].items():
+            self.histograms[name].merge(histogram)
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'histograms': {name: histogram.as_dict()
+                           for name, histogram in self.histograms.items()},
+        }
+
+
+class Registry:
+    """Process wide collection of operation metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, OperationMetrics] = {}
+        self._exit_registered = False
+        self._file_name: Optional[str] = None
+        self._file_pid: Optional[int] = None
+
+    def record(self, name: str, wall_ms: float, db_ms: float,
+               queries: int, retries: int, failed: bool) -> None:
+        with self._lock:
+            operation = self._operations.get(name)
+            if operation is None:
+                operation = self._operations[name] = OperationMetrics()
+                if not self._exit_registered:
+                    atexit.register(self.flush)
+                    self._exit_registered = True
+            operation.calls += 1
+            operation.errors += failed
+            histograms = operation.histograms
+            histograms['wall_ms'].add(wall_ms)
+            histograms['db_ms'].add(db_ms)
+            histograms['queries'].add(queries)
+            histograms['retries'].add(retries)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: operation.as_dict()
+                    for name, operation in self._operations.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations.clear()
+
+    def flush(self) -> Optional[Path]:
+        """Write metrics of process into 'OPEX_METRICS_DIR'"""
+        directory = getattr(settings, 'OPEX_METRICS_DIR', None)
+        snapshot = self.snapshot()
+        if not directory or not snapshot:
+            return None
+        path = Path(directory) / self.file_name()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(snapshot), encoding='utf-8')
+            os.replace(temporary, path)
+        except OSError:
+            logger.warning('Metrics were not written', exc_info=True)
+            return None
+        return path
+
+    def file_name(self) -> str:
+        """Return name of metrics file, unique for every process.
+
+        Process ids are reused, so name has start time and random part
+        as well; forked process gets its own name.
+        """
+        pid = os.getpid()
+        if self._file_pid != pid:
+            started = time.strftime('%Y%m%d%H%M%S')
+            self._file_name = f'metrics-{started}-{pid}-{uuid.uuid4().hex[:8]}.json'
+            self._file_pid = pid
+        return self._file_name
+
+
+registry = Registry()
+
+
+class _QueryCounter:
+    """Database execute wrapper which counts queries of one call"""
+
+    __slots__ = ('queries', 'db_seconds', 'failed')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.failed = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        return _count((self,), execute, sql, params, many, context)
+
+
+# Counters of instrumented calls in progress, seen by writer thread
+_counters: contextvars.ContextVar[Tuple[_QueryCounter, ...]] = contextvars.ContextVar(
+    'instrumentation_counters', default=())
+
+
+def _count(counters, execute, sql, params, many, context):
+    started = time.perf_counter()
+    failed = False
+    try:
+        return execute(sql, params, many, context)
+    except OperationalError:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        for counter in counters:
+            counter.queries += 1
+            counter.db_seconds += seconds
+            counter.failed += failed
+
+
+def count_queued_queries(execute, sql, params, many, context):
+    """Execute wrapper of writer thread, counts queries for calls which sent writes"""
+    counters = _counters.get()
+    if not counters:
+        return execute(sql, params, many, context)
+    return _count(counters, execute, sql, params, many, context)
+
+
+def instrumented(name: Optional[str] = None) -> Callable:
+    """Decorator which records metrics of every call.
+
+    Args:
+        name: Name of operation, default is qualified name of function.
+    """
+    def decorator(function: Callable) -> Callable:
+        operation = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not getattr(settings, 'OPEX_INSTRUMENTATION', False):
+                return function(*args, **kwargs)
+
+            counter = _QueryCounter()
+            failed = False
+            lock_failure = False
+            started = time.perf_counter()
+            token = _counters.set((*_counters.get(), counter))
+            try:
+                with contextlib.ExitStack() as stack:
+                    # Every configured and attached database, see 'helpers.routers'
+                    for alias in list(connections.settings):
+                        stack.enter_context(connections[alias].execute_wrapper(counter))
+                    return function(*args, **kwargs)
+            except OperationalError:
+                failed = lock_failure = True
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _counters.reset(token)
+                # Last failed attempt was not retried
+                retries = max(counter.failed - lock_failure, 0)
+                registry.record(operation,
+                                (time.perf_counter() - started) * 1000,
+                                counter.db_seconds * 1000,
+                                counter.queries,
+                                retries,
+                                failed)
+        return wrapper
+    return decorator
+
+
+def get_metrics() -> Dict[str, dict]:
+    """Return metrics collected in this process"""
+    return registry.snapshot()
+
+
+def reset_metrics() -> None:
+    """Remove metrics collected in this process"""
+    registry.reset()
+
+
+def merge_metrics(snapshots: Iterable[Dict[str, dict]]) -> Dict[str, OperationMetrics]:
+    """Merge metrics of several processes"""
+    operations = {}
+    for snapshot in snapshots:
+        for name, data in snapshot.items():
+            operations.setdefault(name, OperationMetrics()).merge(data)
+    return operations
+
+
+def read_metrics_files(directory: Path) -> List[Dict[str, dict]]:
+    """Return metrics written by processes into directory"""
+    snapshots = []
+    for path in sorted(Path(directory).glob('metrics-*.json')):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            logger.warning('Metrics file %s was not read', path, exc_info=True)
+    return snapshots
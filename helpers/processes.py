@@ -0,0 +1,17 @@
+"""Helpers for work split between several processes"""
+
+
+def init_worker() -> None:
+    """Prepare process pool worker.
+
+    Django is set up when worker is started with 'spawn' and every
+    worker opens its own database connection instead of
+    using connections inherited from parent process.
+    """
+    import django
+    from django.apps import apps
+    from django.db import connections
+
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
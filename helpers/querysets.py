@@ -0,0 +1,46 @@
+"""Querysets shared by project models"""
+
+from django.db import models, transaction
+
+from helpers.signals import bulk_created, queryset_updated
+
+
+class TrackedQuerySet(models.QuerySet):
+    """QuerySet which reports bulk changes.
+
+    'update()' and 'bulk_create()' don't send 'post_save', so this
+    queryset sends 'queryset_updated' and 'bulk_created' signals instead.
+    'bulk_update()' uses 'update()' and is reported as well.
+    Previous values of updated foreign keys are sent too, so receivers
+    know where moved rows were.
+    """
+
+    def update(self, **kwargs):
+        if not queryset_updated.has_listeners(self.model):
+            return super().update(**kwargs)
+
+        fields = [self.model._meta.get_field(name) for name in kwargs]
+        relations = [field for field in fields if field.is_relation]
+        # Updated rows are the selected ones, no write can come between
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = list(self.values_list('pk', *(field.attname for field in relations)))
+            if not rows:
+                return 0
+            updated = super().update(**kwargs)
+            queryset_updated.send(
+                sender=self.model,
+                pks=[row[0] for row in rows],
+                fields=[field.name for field in fields],
+                previous={field.name: {row[index] for row in rows}
+                          for index, field in enumerate(relations, start=1)})
+        return updated
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            bulk_created.send(sender=self.model, instances=objs)
+        return objs
+
+    bulk_create.alters_data = True
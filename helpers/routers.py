@@ -0,0 +1,107 @@
+"""Database router of per-project shard databases.
+
+When 'OPEX_SHARDING' is on, project can have its own SQLite database
+(shard), see 'project.shards'. Queries of project tree models
+('SHARDED_MODELS') go to database which is chosen for current context:
+
+    with using_database('project_5'):
+        Inventory.objects.filter(fond_id=5).count()
+
+Database is kept in context variable, so it is the same in async
+code and in writer thread of 'helpers.db.run_write'. Outside of such
+block, and for other models, 'default' database is used. Projects
+are independent, so writes of different projects don't wait for one
+SQLite lock.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from helpers.constants import (
+    SHARD_ALIAS_PREFIX,
+    SHARD_CATALOG_MODELS,
+    SHARD_MIRRORED_MODELS,
+    SHARDED_MODELS,
+)
+
+_database: ContextVar[Optional[str]] = ContextVar('opex_database', default=None)
+
+
+def current_database() -> str:
+    """Return database of project tree models in current context"""
+    return _database.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def using_database(alias: Optional[str]) -> Iterator[str]:
+    """Send queries of project tree models to database while block runs"""
+    token = _database.set(alias)
+    try:
+        yield alias or DEFAULT_DB_ALIAS
+    finally:
+        _database.reset(token)
+
+
+def is_shard(alias: str) -> bool:
+    return alias.startswith(SHARD_ALIAS_PREFIX)
+
+
+def add_database(alias: str, path: Union[str, Path]) -> None:
+    """Make SQLite database file available as connection alias.
+
+    Settings of 'default' database are used, only file is different.
+    """
+    if alias in connections.settings:
+        return
+    connections.settings[alias] = {**connections.settings[DEFAULT_DB_ALIAS], 'NAME': str(path)}
+
+
+def remove_database(alias: str) -> None:
+    """Close connections of this thread and write queue, forget database alias.
+
+    Writer thread of 'helpers.db.WriteQueue' keeps its own connection,
+    so queue is stopped, otherwise its writes would go to old file.
+    """
+    from helpers.db import close_write_queue
+
+    if alias not in connections.settings:
+        return
+    close_write_queue(alias)
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+class ProjectShardRouter:
+    """Sends project tree models to database of current context"""
+
+    def _database(self, model, **hints) -> Optional[str]:
+        if model._meta.label_lower not in SHARDED_MODELS:
+            return None
+        instance = hints.get('instance')
+        if (instance is not None and instance._state.db is not None
+                and instance._meta.label_lower in SHARDED_MODELS):
+            # Related objects are read from database of instance
+            return instance._state.db
+        return _database.get()
+
+    db_for_read = _database
+    db_for_write = _database
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # Project row of shard is copy of catalog row, content
+        # objects are only in catalog and shared by all projects
+        labels = {obj1._meta.label_lower, obj2._meta.label_lower}
+        if labels & (SHARD_MIRRORED_MODELS | SHARD_CATALOG_MODELS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> Optional[bool]:
+        if not is_shard(db):
+            return None
+        label = f'{app_label}.{model_name}'
+        return label in SHARDED_MODELS or label in SHARD_MIRRORED_MODELS
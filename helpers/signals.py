@@ -0,0 +1,10 @@
+"""Signals sent for changes which do not send Django model signals"""
+
+from django.dispatch import Signal
+
+# Sent after 'QuerySet.update()' with arguments 'pks', 'fields' and 'previous',
+# which has sets of foreign key values before update by updated field name
+queryset_updated = Signal()
+
+# Sent after 'QuerySet.bulk_create()' with argument 'instances'
+bulk_created = Signal()
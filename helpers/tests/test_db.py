@@ -0,0 +1,82 @@
+"""Module contains tests for helpers.db"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import OperationalError, transaction
+from django.test import TransactionTestCase, override_settings
+
+from helpers.db import WriteQueue, run_write
+from helpers.instrumentation import get_metrics, instrumented, reset_metrics
+from project.models import Project
+
+
+class WriteQueueTest(TransactionTestCase):
+    """Class for testing WriteQueue"""
+
+    def test_writes_from_threads(self):
+        """Test that writes of several threads are committed"""
+        write_queue = WriteQueue()
+
+        def create(index):
+            return write_queue.run(Project.objects.create, name=f'Project {index}').name
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            names = list(pool.map(create, range(20)))
+
+        self.assertEqual(names, [f'Project {index}' for index in range(20)])
+        self.assertEqual(Project.objects.count(), 20)
+
+    def test_failed_write(self):
+        """Test that failed write doesn't roll back other writes of batch"""
+        write_queue = WriteQueue()
+        Project.objects.create(name='Existing')
+
+        first = write_queue.submit(Project.objects.create, name='New')
+        second = write_queue.submit(Project.objects.create, name='Existing')
+
+        self.assertEqual(first.result().name, 'New')
+        with self.assertRaises(Exception):
+            second.result()
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_in_transaction(self):
+        """Test that write is run at once inside transaction"""
+        write_queue = WriteQueue()
+        with transaction.atomic():
+            project = write_queue.run(Project.objects.create, name='Inline')
+            self.assertTrue(Project.objects.filter(pk=project.pk).exists())
+        self.assertIsNone(write_queue._thread)
+
+    @override_settings(SQLITE_WRITE_QUEUE=False)
+    def test_retry_without_queue(self):
+        """Test that locked write is retried when write queue is off"""
+        attempts = []
+
+        def create():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return Project.objects.create(name='Retried')
+
+        self.assertEqual(run_write(create).name, 'Retried')
+        self.assertEqual(len(attempts), 2)
+
+    @override_settings(OPEX_INSTRUMENTATION=True, OPEX_METRICS_DIR=None)
+    def test_instrumented_write(self):
+        """Test that queries of queued write are counted for instrumented caller"""
+        write_queue = WriteQueue()
+        self.addCleanup(write_queue.stop)
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+        @instrumented('test.queued')
+        def create():
+            return write_queue.run(Project.objects.create, name='Queued')
+
+        create()
+        # Other writes of writer thread are not counted
+        write_queue.run(Project.objects.create, name='Other')
+
+        queries = get_metrics()['test.queued']['histograms']['queries']['total']
+        # Savepoint and INSERT of write, transaction of batch is not run in context of write
+        self.assertEqual(queries, 2)
@@ -0,0 +1,117 @@
+"""Module contains tests for helpers.instrumentation"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from retry import retry
+
+from helpers.instrumentation import (
+    Histogram,
+    get_metrics,
+    instrumented,
+    registry,
+    reset_metrics,
+)
+from project.models import Project
+
+
+@instrumented('test.flaky')
+@retry(OperationalError, tries=3, delay=0)
+def flaky(attempts: list) -> int:
+    """Fails with OperationalError on first attempt"""
+    attempts.append(1)
+    with connection.cursor() as cursor:
+        if len(attempts) == 1:
+            cursor.execute('SELECT * FROM missing_table')
+        cursor.execute('SELECT 1')
+    return len(attempts)
+
+
+@override_settings(OPEX_INSTRUMENTATION=True, OPEX_METRICS_DIR=None)
+class InstrumentationTest(TestCase):
+    """Class for testing instrumentation of model helpers"""
+
+    def setUp(self):
+        reset_metrics()
+
+    def tearDown(self):
+        reset_metrics()
+
+    def test_add_project(self):
+        """Test that queries of model helper are counted"""
+        Project.add_project('Projekts')
+        Project.add_project('Projekts')
+
+        metrics = get_metrics()['Project.add_project']
+        self.assertEqual(metrics['calls'], 2)
+        self.assertEqual(metrics['errors'], 0)
+        # exists(), INSERT and stale manifest mark, then only exists()
+        self.assertEqual(metrics['histograms']['queries']['total'], 4)
+        self.assertEqual(metrics['histograms']['retries']['total'], 0)
+        self.assertGreater(metrics['histograms']['wall_ms']['total'], 0)
+
+    def test_retries(self):
+        """Test that retried attempts are counted"""
+        self.assertEqual(flaky([]), 2)
+
+        metrics = get_metrics()['test.flaky']
+        self.assertEqual(metrics['calls'], 1)
+        self.assertEqual(metrics['histograms']['retries']['total'], 1)
+        # Failed query of first attempt and 'SELECT 1' of second
+        self.assertEqual(metrics['histograms']['queries']['total'], 2)
+
+    @override_settings(OPEX_INSTRUMENTATION=False)
+    def test_disabled(self):
+        """Test that nothing is recorded when instrumentation is off"""
+        Project.add_project('Projekts')
+        self.assertEqual(get_metrics(), {})
+
+    def test_command(self):
+        """Test that metrics files of processes are merged"""
+        Project.add_project('Projekts')
+        with tempfile.TemporaryDirectory() as folder:
+            with override_settings(OPEX_METRICS_DIR=folder):
+                registry.flush()
+            out = StringIO()
+            call_command('opex_metrics', '--dir', folder, '--json', stdout=out)
+
+        # Metrics of this process are read both from file and in process
+        metrics = json.loads(out.getvalue())['Project.add_project']
+        self.assertEqual(metrics['calls'], 2)
+
+    def test_file_name(self):
+        """Test that process writes one file, named apart from earlier processes"""
+        Project.add_project('Projekts')
+        with tempfile.TemporaryDirectory() as folder:
+            with override_settings(OPEX_METRICS_DIR=folder):
+                first = registry.flush()
+                self.assertEqual(registry.flush(), first)
+            self.assertRegex(first.name, rf'^metrics-\d{{14}}-{os.getpid()}-[0-9a-f]{{8}}\.json$')
+
+    def test_default(self):
+        """Test that instrumentation is off unless it is turned on"""
+        with override_settings():
+            del settings.OPEX_INSTRUMENTATION
+            Project.add_project('Projekts')
+        self.assertEqual(get_metrics(), {})
+
+
+class HistogramTest(SimpleTestCase):
+    """Class for testing Histogram"""
+
+    def test_percentile(self):
+        """Test that percentile is upper bound of bucket"""
+        histogram = Histogram((1, 10, 100))
+        for value in [0.5] * 90 + [50] * 9 + [500]:
+            histogram.add(value)
+
+        self.assertEqual(histogram.buckets, [90, 0, 9, 1])
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(95), 100)
+        self.assertEqual(histogram.percentile(100), 500)
@@ -0,0 +1,39 @@
+"""Module contains tests for helpers.querysets"""
+
+from unittest import mock
+
+from django.test import TestCase
+
+from helpers.signals import queryset_updated
+from project.models import Project
+from institutions.models import Institution
+
+
+class TrackedQuerySetTest(TestCase):
+    """Class for testing TrackedQuerySet"""
+
+    def setUp(self):
+        for index in range(3):
+            Institution.add_institution(index, f'Iestāde {index}',
+                                        project=Project.add_project(f'Projekts {index}'))
+
+    def test_update(self):
+        """Test that updated primary keys and fields are sent"""
+        sent = []
+
+        def receiver(sender, pks, fields, **kwargs):
+            sent.append((sender, sorted(pks), fields))
+
+        queryset_updated.connect(receiver)
+        self.addCleanup(queryset_updated.disconnect, receiver)
+        rows = Institution.objects.filter(reg_nr__gte=1).update(signer='Ozols')
+
+        self.assertEqual(rows, 2)
+        self.assertIn((Institution, [2, 3], ['signer']), sent)
+
+    def test_update_without_receivers(self):
+        """Test that primary keys are not selected when nobody listens"""
+        with mock.patch.object(queryset_updated, 'receivers', []):
+            with self.assertNumQueries(1):
+                rows = Institution.objects.update(signer='Ozols')
+        self.assertEqual(rows, 3)
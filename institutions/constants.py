@@ -1,3 +1,16 @@
 """Konstantes kuras tiek izmantotas 'institutions' aplikācijā"""
 
 INSTITUTION_EXISTS_MSG = 'Institūcijā ar šo reģistrācijas numuru vai nosaukumu jau eksistē'
+
+# Lauki, kurus atjauno no kartējuma faila ('reg_nr' un 'name' netiek mainīti)
+INSTITUTION_UPDATE_FIELDS = ('creator', 'creator_position', 'signer', 'signer_position')
+
+# Lauki, pēc kuriem kartējumā atrod institūciju
+INSTITUTION_KEYS = ('reg_nr', 'name', 'pk')
+
+# Institūciju skaits, ko atjauno ar vienu UPDATE vaicājumu
+INSTITUTION_UPDATE_CHUNK = 100
+
+INSTITUTION_MISSING_MSG = 'Institūcija neeksistē'
+UNKNOWN_FIELD_MSG = 'Lauku nevar atjaunot'
+VALUE_TOO_LONG_MSG = 'Vērtība ir pārāk gara'
@@ -0,0 +1,60 @@
+"""Management command which updates institutions from mapping file"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from institutions.constants import (
+    INSTITUTION_KEYS,
+    INSTITUTION_MISSING_MSG,
+    INSTITUTION_UPDATE_CHUNK,
+)
+from institutions.mapping import read_mapping
+from institutions.models import Institution
+
+
+class Command(BaseCommand):
+    help = ('Updates creator and signer data of institutions from CSV or JSON mapping '
+            'of institution key to fields, only changed institutions are written')
+
+    def add_arguments(self, parser):
+        parser.add_argument('mapping', help='CSV or JSON mapping file')
+        parser.add_argument('--key', default='reg_nr', choices=INSTITUTION_KEYS,
+                            help='Field by which institutions are found')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Show changes without saving them')
+        parser.add_argument('--batch-size', type=int, default=INSTITUTION_UPDATE_CHUNK,
+                            help='Number of institutions written with one UPDATE')
+        parser.add_argument('--json', action='store_true', help='Print result as JSON')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size should be positive')
+        try:
+            mapping = read_mapping(options['mapping'], options['key'])
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        started = time.monotonic()
+        result = Institution.update_from_mapping(mapping, key=options['key'],
+                                                 dry_run=options['dry_run'],
+                                                 batch_size=options['batch_size'])
+        if options['json']:
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+            return
+
+        for value, changes in result['changed'].items():
+            for field, (old, new) in changes.items():
+                self.stdout.write(f'{value}: {field}: "{old}" -> "{new}"')
+        for value in result['missing']:
+            self.stderr.write(f'{value}: {INSTITUTION_MISSING_MSG}')
+        for value, errors in result['errors'].items():
+            for field, error in errors.items():
+                self.stderr.write(f'{value}: {field}: {error}')
+
+        action = 'would be changed' if options['dry_run'] else 'changed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(result["changed"])} institutions {action}, '
+            f'{len(result["unchanged"])} unchanged, {len(result["missing"])} missing, '
+            f'{len(result["errors"])} with errors ({time.monotonic() - started:.1f} s)'))
@@ -0,0 +1,76 @@
+"""Modulī atrodas institūciju kartējuma failu lasītāji.
+
+Kartējums ir vārdnīca, kur atslēga ir institūcijas atslēga (piemēram,
+reģistrācijas numurs) un vērtība ir vārdnīca ar atjaunojamiem laukiem.
+
+CSV failā pirmā rinda ir galvene ar atslēgas kolonnu un lauku
+kolonnām, tukša šūna nozīmē, ka lauks netiek mainīts. JSON failā ir
+objekts {atslēga: {lauks: vērtība}} vai saraksts ar objektiem, kuros
+ir atslēgas lauks. JSON vērtība null nozīmē, ka lauks netiek mainīts.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Union
+
+from django.core.exceptions import ValidationError
+
+from institutions.models import Institution
+
+
+def _key(value, key: str):
+    """Pārveido atslēgu uz lauka tipu, piemēram, 'reg_nr' uz int
+
+    Raises:
+        ValueError: Vērtību nevar pārveidot.
+    """
+    field = Institution._meta.pk if key == 'pk' else Institution._meta.get_field(key)
+    try:
+        return field.to_python(value.strip() if isinstance(value, str) else value)
+    except ValidationError:
+        raise ValueError(f'Invalid {key} value "{value}"')
+
+
+def read_csv_mapping(path: Union[str, Path], key: str = 'reg_nr') -> Dict[object, dict]:
+    """Nolasa kartējumu no CSV faila.
+
+    Raises:
+        ValueError: Galvenē nav atslēgas kolonnas vai atslēga nav derīga.
+    """
+    with open(path, encoding='utf-8-sig', newline='') as mapping_file:
+        reader = csv.DictReader(mapping_file)
+        if key not in (reader.fieldnames or []):
+            raise ValueError(f'CSV file has no "{key}" column')
+        return {_key(row.pop(key), key): {field: value for field, value in row.items()
+                                          if field is not None and value not in (None, '')}
+                for row in reader}
+
+
+def read_json_mapping(path: Union[str, Path], key: str = 'reg_nr') -> Dict[object, dict]:
+    """Nolasa kartējumu no JSON faila.
+
+    Raises:
+        ValueError: Fails nav kartējums vai atslēga nav derīga.
+    """
+    with open(path, encoding='utf-8-sig') as mapping_file:
+        data = json.load(mapping_file)
+
+    if isinstance(data, list):
+        if not all(isinstance(row, dict) and key in row for row in data):
+            raise ValueError(f'Every JSON object should have "{key}" field')
+        data = {row[key]: {field: value for field, value in row.items() if field != key}
+                for row in data}
+    if not isinstance(data, dict) or not all(isinstance(row, dict) for row in data.values()):
+        raise ValueError('JSON file should contain object or list of objects')
+
+    return {_key(value, key): {field: field_value for field, field_value in row.items()
+                               if field_value is not None}
+            for value, row in data.items()}
+
+
+def read_mapping(path: Union[str, Path], key: str = 'reg_nr') -> Dict[object, dict]:
+    """Nolasa kartējumu no CSV vai JSON faila pēc faila paplašinājuma"""
+    if Path(path).suffix.lower() == '.json':
+        return read_json_mapping(path, key)
+    return read_csv_mapping(path, key)
@@ -1,14 +1,31 @@
 """Modulī atrodas 'institutions' aplikācijas modeļi."""
 
 import logging
-from typing import Union
+from typing import Dict, List, Union
 
-from django.db import models, OperationalError
+from django.db import models, router, transaction, OperationalError
 from retry import retry
 
 from project.models import Project
-from helpers.constants import TRIES, DELAY, UNEXPECTED_ERROR_MSG, WRONG_VALUE_PROVIDED
-from institutions.constants import INSTITUTION_EXISTS_MSG
+from helpers.constants import (
+    TRIES,
+    DELAY,
+    BACKOFF,
+    JITTER,
+    UNEXPECTED_ERROR_MSG,
+    WRONG_VALUE_PROVIDED
+)
+from helpers.db import run_write
+from helpers.instrumentation import instrumented
+from helpers.querysets import TrackedQuerySet
+from helpers.routers import using_database
+from institutions.constants import (
+    INSTITUTION_EXISTS_MSG,
+    INSTITUTION_UPDATE_CHUNK,
+    INSTITUTION_UPDATE_FIELDS,
+    UNKNOWN_FIELD_MSG,
+    VALUE_TOO_LONG_MSG,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +45,8 @@ class Institution(models.Model):
         primary_key=True,
     )
 
+    objects = TrackedQuerySet.as_manager()
+
     class Meta:
         db_table = 'institutions'
     
@@ -35,7 +54,8 @@ class Institution(models.Model):
         return f'{self.name}, {self.reg_nr}'
     
     @staticmethod
-    @retry(OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    @instrumented()
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
     def add_institution(reg_nr: int,
                         name: str,
                         project: Project) -> Union[str, 'Institution']:
@@ -50,9 +70,11 @@ class Institution(models.Model):
             Institution instance if new institution created, 
             else returns message with worning
         """
-        # Pārbauda vai institūcija jau eksistē
-        inst_reg = Institution.objects.filter(reg_nr=reg_nr).exists()
-        inst_name = Institution.objects.filter(name=name).exists()
+        from project.shards import exists_in_projects
+
+        # Pārbauda vai institūcija jau eksistē, arī projektu datubāzēs
+        inst_reg = exists_in_projects(Institution, reg_nr=reg_nr)
+        inst_name = exists_in_projects(Institution, name=name)
 
         if inst_reg or inst_name:
             return INSTITUTION_EXISTS_MSG
@@ -71,7 +93,7 @@ class Institution(models.Model):
         return institution
 
     @staticmethod
-    @retry(OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
     def bulk_update(inst_id: int, new_data: dict) -> None:
         """Atjauno institūcijas datus.
 
@@ -81,4 +103,101 @@ class Institution(models.Model):
             new_data: Vārdnīca ar jauniem datiem
         """
         
-        Institution.objects.filter(id=inst_id).update(**new_data)
+        Institution.objects.filter(pk=inst_id).update(**new_data)
+
+    @staticmethod
+    @instrumented()
+    def update_from_mapping(mapping: Dict[object, dict],
+                            key: str = 'reg_nr',
+                            dry_run: bool = False,
+                            batch_size: int = INSTITUTION_UPDATE_CHUNK) -> dict:
+        """Atjauno institūciju datus no kartējuma.
+
+        Pašreizējās vērtības nolasa vienā reizē ar 'in_bulk', salīdzina
+        ar kartējumu un raksta tikai mainītās institūcijas ar 'bulk_update',
+        kas katrai daļai ir viens UPDATE ... CASE vaicājums.
+        Institūcija ar kļūdainu lauku netiek mainīta.
+
+        Args:
+            mapping: Vārdnīca, kur atslēga ir institūcijas 'key' lauka
+              vērtība un vērtība ir vārdnīca ar jaunām lauku vērtībām.
+            key: Lauks, pēc kura atrod institūciju: 'reg_nr', 'name' vai 'pk'.
+            dry_run: Ja True, izmaiņas tikai atrod, bet nesaglabā.
+            batch_size: Institūciju skaits vienā UPDATE vaicājumā.
+
+        Returns:
+            Vārdnīca ar 'changed' (atslēga: {lauks: [vecā, jaunā vērtība]}),
+            'unchanged' un 'missing' (atslēgu saraksti)
+            un 'errors' (atslēga: {lauks: kļūda}).
+        """
+        from project.shards import project_databases
+
+        result = {'changed': {}, 'unchanged': [], 'missing': [], 'errors': {}}
+        remaining = mapping
+        # Projektu institūcijas var būt arī projektu datubāzēs
+        for alias in project_databases():
+            with using_database(alias):
+                part = Institution._update_in_database(remaining, key, dry_run, batch_size)
+            result['changed'].update(part['changed'])
+            result['unchanged'] += part['unchanged']
+            result['errors'].update(part['errors'])
+            remaining = {value: mapping[value] for value in part['missing']}
+            if not remaining:
+                break
+        result['missing'] = list(remaining)
+        return result
+
+    @staticmethod
+    def _update_in_database(mapping: Dict[object, dict],
+                            key: str,
+                            dry_run: bool,
+                            batch_size: int) -> dict:
+        """Atjauno pašreizējās datubāzes institūcijas, skatīt 'update_from_mapping'"""
+        result = {'changed': {}, 'unchanged': [], 'missing': [], 'errors': {}}
+        institutions = (Institution.objects
+                        .only(key, *INSTITUTION_UPDATE_FIELDS)
+                        .in_bulk(list(mapping), field_name=key))
+
+        changed_institutions = []
+        changed_fields = set()
+        for value, new_data in mapping.items():
+            institution = institutions.get(value)
+            if institution is None:
+                result['missing'].append(value)
+                continue
+
+            errors = {}
+            changes = {}
+            for field, new_value in new_data.items():
+                if field not in INSTITUTION_UPDATE_FIELDS:
+                    errors[field] = UNKNOWN_FIELD_MSG
+                    continue
+                new_value = str(new_value)
+                if len(new_value) > Institution._meta.get_field(field).max_length:
+                    errors[field] = VALUE_TOO_LONG_MSG
+                elif getattr(institution, field) != new_value:
+                    changes[field] = [getattr(institution, field), new_value]
+
+            if errors:
+                result['errors'][value] = errors
+            elif changes:
+                result['changed'][value] = changes
+                for field, (_, new_value) in changes.items():
+                    setattr(institution, field, new_value)
+                changed_institutions.append(institution)
+                changed_fields.update(changes)
+            else:
+                result['unchanged'].append(value)
+
+        if changed_institutions and not dry_run:
+            run_write(Institution._update_changed, changed_institutions,
+                      sorted(changed_fields), batch_size)
+        return result
+
+    @staticmethod
+    def _update_changed(institutions: List['Institution'],
+                        fields: List[str],
+                        batch_size: int) -> int:
+        """Saglabā mainītās institūcijas vienā transakcijā"""
+        with transaction.atomic(using=router.db_for_write(Institution)):
+            return Institution.objects.bulk_update(institutions, fields, batch_size=batch_size)
@@ -0,0 +1,86 @@
+"""Module contains tests for institution updates from mapping"""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from institutions.constants import UNKNOWN_FIELD_MSG, VALUE_TOO_LONG_MSG
+from institutions.models import Institution
+from project.models import Project
+
+
+class MappingUpdateTest(TestCase):
+    """Class for testing batch update of institutions"""
+
+    def setUp(self):
+        for index in range(1, 6):
+            project = Project.add_project(f'Projekts {index}')
+            Institution.add_institution(index, f'Iestāde {index}', project=project)
+        Institution.objects.filter(reg_nr__in=[1, 2]).update(signer='Anna')
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = Path(folder.name)
+
+    def test_update(self):
+        """Test that changes are read once and written with one UPDATE"""
+        mapping = {
+            1: {'signer': 'Anna', 'creator': 'Jānis'},
+            2: {'signer': 'Anna'},
+            3: {'signer': 'Pēteris', 'signer_position': 'Direktors'},
+            4: {'name': 'Cits', 'signer': 'Ieva'},
+            5: {'creator': 'J' * 31},
+            9: {'signer': 'Ieva'},
+        }
+        with CaptureQueriesContext(connection) as queries:
+            result = Institution.update_from_mapping(mapping)
+
+        self.assertEqual(result, {
+            'changed': {1: {'creator': ['', 'Jānis']},
+                        3: {'signer': ['', 'Pēteris'], 'signer_position': ['', 'Direktors']}},
+            'unchanged': [2],
+            'missing': [9],
+            'errors': {4: {'name': UNKNOWN_FIELD_MSG}, 5: {'creator': VALUE_TOO_LONG_MSG}},
+        })
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "institutions"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('CASE', updates[0]['sql'])
+        self.assertEqual(Institution.objects.get(reg_nr=3).signer_position, 'Direktors')
+        self.assertEqual(Institution.objects.get(reg_nr=4).signer, '')
+
+    def test_dry_run(self):
+        """Test that dry run doesn't save changes"""
+        result = Institution.update_from_mapping({'Iestāde 3': {'signer': 'Ieva'}},
+                                                 key='name', dry_run=True)
+        self.assertEqual(result['changed'], {'Iestāde 3': {'signer': ['', 'Ieva']}})
+        self.assertEqual(Institution.objects.get(reg_nr=3).signer, '')
+
+    def test_command(self):
+        """Test command with CSV and JSON mapping"""
+        csv_path = self.folder / 'mapping.csv'
+        csv_path.write_text('reg_nr,signer,creator\n1,Anna,\n3,Ieva,Jānis\nx,Ieva,\n',
+                            encoding='utf-8')
+        with self.assertRaisesMessage(CommandError, 'Invalid reg_nr value "x"'):
+            call_command('update_institutions', str(csv_path), stdout=io.StringIO())
+
+        csv_path.write_text('reg_nr,signer,creator\n1,Anna,\n3,Ieva,Jānis\n', encoding='utf-8')
+        out = io.StringIO()
+        call_command('update_institutions', str(csv_path), stdout=out)
+        self.assertIn('3: signer: "" -> "Ieva"', out.getvalue())
+        self.assertIn('1 institutions changed, 1 unchanged', out.getvalue())
+        self.assertEqual(Institution.objects.get(reg_nr=3).creator, 'Jānis')
+
+        json_path = self.folder / 'mapping.json'
+        json_path.write_text(json.dumps([{'reg_nr': 3, 'signer': 'Anna', 'creator': None}]),
+                             encoding='utf-8')
+        out = io.StringIO()
+        call_command('update_institutions', str(json_path), '--json', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['changed'],
+                         {'3': {'signer': ['Ieva', 'Anna']}})
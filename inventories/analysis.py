@@ -0,0 +1,268 @@
+"""Module contains consistency analysis of inventory lists of fond.
+
+Columns of all inventory lists of fond are read once into NumPy
+arrays and every check is done with sorting and comparison of
+neighbouring values, so analysis takes O(n log n) time and
+no queries per inventory list.
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from django.db import connections, router
+from django.db.models import FloatField, Func
+
+from fonds.models import Fond
+from inventories.constants import ANALYSIS_CHUNK_SIZE, ANALYSIS_EXAMPLES
+from inventories.models import Inventory
+
+# Annotations are selected after model fields, so dates are last
+FIELDS = ('pk', 'number', 'postfix', 'items_per_period', 'total_items', 'start_day', 'end_day')
+
+# Julian day number of 1970-01-01, from which NumPy counts dates
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+
+class FondColumns(NamedTuple):
+    """Columns of inventory lists of fond.
+
+    Postfixes are stored as indexes in 'postfixes', missing dates
+    as NaT and missing numbers of items as NaN.
+    """
+    pk: np.ndarray
+    number: np.ndarray
+    postfix: np.ndarray
+    postfixes: List[str]
+    start_date: np.ndarray
+    end_date: np.ndarray
+    items_per_period: np.ndarray
+    total_items: np.ndarray
+
+    def __len__(self):
+        return len(self.pk)
+
+
+class FondReport(NamedTuple):
+    """Result of fond analysis.
+
+    gaps: Array of missing number ranges, one [first, last] row per gap.
+    duplicates: Array of inventory list positions with repeated
+      number and postfix, grouped by number.
+    overlaps: Array of [earlier, later] position pairs of inventory
+      lists whose date ranges overlap.
+    items_mismatch: Array of positions of inventory lists
+      whose 'items_per_period' does not match 'total_items'.
+    """
+    columns: FondColumns
+    gaps: np.ndarray
+    duplicates: np.ndarray
+    overlaps: np.ndarray
+    items_mismatch: np.ndarray
+
+    @property
+    def valid(self) -> bool:
+        return not (len(self.gaps) or len(self.duplicates)
+                    or len(self.overlaps) or len(self.items_mismatch))
+
+    def label(self, position: int) -> str:
+        """Inventory list number with postfix, as written in reports"""
+        columns = self.columns
+        return f'{columns.number[position]}{columns.postfixes[columns.postfix[position]]}'
+
+    def as_dict(self, limit: Optional[int] = ANALYSIS_EXAMPLES) -> dict:
+        """Return JSON serializable report.
+
+        Args:
+            limit: Maximum number of listed problems of every kind,
+              None lists all of them. Counts are always full.
+        """
+        def head(values: np.ndarray) -> np.ndarray:
+            return values if limit is None else values[:limit]
+
+        return {
+            'inventories': len(self.columns),
+            'valid': self.valid,
+            'gaps': {
+                'count': len(self.gaps),
+                'missing_numbers': int((self.gaps[:, 1] - self.gaps[:, 0] + 1).sum()),
+                'ranges': head(self.gaps).tolist(),
+            },
+            'duplicates': {
+                'count': len(self.duplicates),
+                'inventories': [self.label(position) for position in head(self.duplicates)],
+            },
+            'overlaps': {
+                'count': len(self.overlaps),
+                'pairs': [[self.label(first), self.label(second)]
+                          for first, second in head(self.overlaps)],
+            },
+            'items_mismatch': {
+                'count': len(self.items_mismatch),
+                'inventories': [self.label(position) for position in head(self.items_mismatch)],
+            },
+        }
+
+
+def _days(values: tuple) -> np.ndarray:
+    """Convert Julian days from SQLite to dates, NULL to NaT"""
+    days = np.array(values, dtype=np.float64) - UNIX_EPOCH_JULIAN_DAY
+    dates = np.full(len(days), np.datetime64('NaT'), dtype='datetime64[D]')
+    known = ~np.isnan(days)
+    dates[known] = days[known].astype(np.int64)
+    return dates
+
+
+def load_fond(fond: Fond, chunk_size: int = ANALYSIS_CHUNK_SIZE) -> FondColumns:
+    """Read inventory lists of fond into arrays.
+
+    Rows are streamed from cursor in chunks, so only one chunk of
+    Python tuples exists at a time besides the arrays. Dates are read
+    as Julian day numbers, because creating 'datetime.date' objects
+    for every row takes longer than the rest of the analysis.
+    """
+    inventories = Inventory.objects.filter(fond=fond).order_by()
+    count = inventories.count()
+    query = inventories.annotate(
+        start_day=Func('start_date', function='JULIANDAY', output_field=FloatField()),
+        end_day=Func('end_date', function='JULIANDAY', output_field=FloatField()),
+    ).values_list(*FIELDS).query
+
+    pk = np.empty(count, dtype=np.int64)
+    number = np.empty(count, dtype=np.int64)
+    postfix = np.empty(count, dtype=np.int32)
+    start_date = np.empty(count, dtype='datetime64[D]')
+    end_date = np.empty(count, dtype='datetime64[D]')
+    items_per_period = np.empty(count, dtype=np.float64)
+    total_items = np.empty(count, dtype=np.float64)
+
+    postfixes: Dict[str, int] = {}
+    offset = 0
+    sql, params = query.sql_with_params()
+    with connections[router.db_for_read(Inventory)].cursor() as cursor:
+        cursor.execute(sql, params)
+        while chunk := cursor.fetchmany(chunk_size):
+            # Table may grow between count and read
+            chunk = chunk[:count - offset]
+            if not chunk:
+                break
+            end = offset + len(chunk)
+            pks, numbers, chunk_postfixes, per_period, totals, starts, ends = zip(*chunk)
+
+            pk[offset:end] = pks
+            number[offset:end] = numbers
+            postfix[offset:end] = [postfixes.setdefault(value, len(postfixes))
+                                   for value in chunk_postfixes]
+            start_date[offset:end] = _days(starts)
+            end_date[offset:end] = _days(ends)
+            items_per_period[offset:end] = np.array(per_period, dtype=np.float64)
+            total_items[offset:end] = np.array(totals, dtype=np.float64)
+            offset = end
+
+    return FondColumns(pk[:offset], number[:offset], postfix[:offset], list(postfixes),
+                       start_date[:offset], end_date[:offset],
+                       items_per_period[:offset], total_items[:offset])
+
+
+def find_gaps(number: np.ndarray) -> np.ndarray:
+    """Find missing inventory numbers.
+
+    Numbering starts with 1, so numbers before the first
+    used number are missing too.
+
+    Returns:
+        Array with [first, last] missing number of every gap.
+    """
+    numbers = np.unique(np.concatenate(([0], number)))
+    starts = np.flatnonzero(np.diff(numbers) > 1)
+    return np.column_stack((numbers[starts] + 1, numbers[starts + 1] - 1))
+
+
+def find_duplicates(number: np.ndarray, postfix: np.ndarray) -> np.ndarray:
+    """Find inventory lists with the same number and postfix.
+
+    Returns:
+        Positions of all inventory lists in repeated pairs,
+        ordered by number and postfix.
+    """
+    order = np.lexsort((postfix, number))
+    numbers, postfixes = number[order], postfix[order]
+    same = (numbers[1:] == numbers[:-1]) & (postfixes[1:] == postfixes[:-1])
+
+    repeated = np.zeros(len(order), dtype=bool)
+    repeated[1:] |= same
+    repeated[:-1] |= same
+    return order[repeated]
+
+
+def find_overlaps(start_date: np.ndarray, end_date: np.ndarray) -> np.ndarray:
+    """Find inventory lists whose date ranges overlap.
+
+    Inventory lists are ordered by start date. Range overlaps when it
+    starts before the latest end of all earlier ranges, and it is paired
+    with the range which has that end. So every overlapping inventory
+    list is reported once instead of with all ranges it overlaps.
+    Inventory lists without dates or with end before start are skipped.
+
+    Returns:
+        Array with [earlier, later] positions of every overlap.
+    """
+    dated = np.flatnonzero(~np.isnat(start_date) & ~np.isnat(end_date)
+                           & (start_date <= end_date))
+    order = dated[np.lexsort((end_date[dated], start_date[dated]))]
+    if len(order) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+
+    starts = start_date[order].astype(np.int64)
+    ends = end_date[order].astype(np.int64)
+    latest_end = np.maximum.accumulate(ends)
+
+    # Position of range with the latest end so far
+    positions = np.arange(len(order))
+    latest = np.maximum.accumulate(np.where(ends == latest_end, positions, 0))
+
+    later = np.flatnonzero(starts[1:] <= latest_end[:-1]) + 1
+    return np.column_stack((order[latest[later - 1]], order[later]))
+
+
+def find_items_mismatch(items_per_period: np.ndarray, total_items: np.ndarray,
+                        start_date: np.ndarray, end_date: np.ndarray) -> np.ndarray:
+    """Find inventory lists with inconsistent number of items.
+
+    Period is one calendar year. Number of items in period can't
+    exceed total number of items, and, as it is average rounded down,
+    total number of items must be less than (items_per_period + 1)
+    times number of years between start and end date.
+
+    Returns:
+        Positions of inconsistent inventory lists.
+    """
+    known = ~np.isnan(items_per_period) & ~np.isnan(total_items)
+    mismatch = known & (items_per_period > total_items)
+
+    dated = known & ~np.isnat(start_date) & ~np.isnat(end_date) & (start_date <= end_date)
+    years = (end_date.astype('datetime64[Y]').astype(np.int64)
+             - start_date.astype('datetime64[Y]').astype(np.int64) + 1)
+    with np.errstate(invalid='ignore'):
+        mismatch |= dated & (total_items >= (items_per_period + 1) * years)
+    return np.flatnonzero(mismatch)
+
+
+def analyze_fond(fond: Fond) -> FondReport:
+    """Check consistency of all inventory lists of fond.
+
+    Args:
+        fond: Fond instance.
+
+    Returns:
+        FondReport with numbering gaps, duplicate numbers,
+        overlapping date ranges and inconsistent numbers of items.
+    """
+    columns = load_fond(fond)
+    return FondReport(
+        columns=columns,
+        gaps=find_gaps(columns.number),
+        duplicates=find_duplicates(columns.number, columns.postfix),
+        overlaps=find_overlaps(columns.start_date, columns.end_date),
+        items_mismatch=find_items_mismatch(columns.items_per_period, columns.total_items,
+                                           columns.start_date, columns.end_date),
+    )
@@ -1,5 +1,59 @@
 """Konstantes kuras tiek izmantotas 'inventories' aplikācijā"""
 
 INVENTORY_EXISTS_MSG = 'Uzskaites saraksts ar šo numuru jau eksistē'
+INVENTORY_REPEATED_MSG = 'Uzskaites saraksts ar šo numuru atskaitē jau ir'
 INVENTORY_WRONG_VALUE = 'Nepieļaujama vērtība'
-NO_VALUE = 'No value'
\ No newline at end of file
+NO_VALUE = 'No value'
+
+# Number of rows imported in one transaction
+IMPORT_BATCH_SIZE = 1000
+
+# VVAIS report column names and corresponding 'Inventory' fields
+VVAIS_COLUMNS = {
+    'Uzskaites saraksta numurs': 'number',
+    'Postfikss': 'postfix',
+    'Dokumentu veids': 'type',
+    'Datu nesējs': 'electronic',
+    'Pēdējās glabāšanas vienības numurs': 'last_gv',
+    'Sākuma datums': 'start_date',
+    'Beigu datums': 'end_date',
+    'Glabāšanas termiņš': 'storage_term',
+    'Glabāšanas vienību skaits periodā': 'items_per_period',
+    'Glabāšanas vienību skaits kopā': 'total_items',
+}
+
+# Date formats used in VVAIS reports
+VVAIS_DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d')
+
+# Size of chunk in which uploaded report is written to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Name of job task which imports uploaded report
+IMPORT_VVAIS_UPLOAD = 'inventories.import_vvais_upload'
+
+# Content types of uploaded VVAIS reports
+UPLOAD_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+}
+UPLOAD_FORMAT_ERROR = 'Report should be CSV or XLSX file'
+UPLOAD_SIZE_ERROR = 'Report is too large'
+
+# Number of rows read at once in fond analysis
+ANALYSIS_CHUNK_SIZE = 10000
+
+# Number of listed problems of every kind in analysis report
+ANALYSIS_EXAMPLES = 20
+
+# Fields of VVAIS report row which make its fingerprint, see 'inventories.sync'
+FINGERPRINT_FIELDS = ('type', 'electronic', 'last_gv', 'start_date', 'end_date',
+                      'storage_term', 'items_per_period', 'total_items')
+
+# Storage unit fields which are shared by units of range
+UNIT_FIELDS = ('title', 'start_date', 'end_date', 'sheets')
+
+# Number of inventory lists handled in one transaction while units are generated
+UNIT_BATCH_SIZE = 1000
+
+# Number of ranges and units read from database at once
+UNIT_CHUNK_SIZE = 2000
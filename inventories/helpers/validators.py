@@ -1,6 +1,8 @@
 """Module contains validation functions for Inventory class"""
 
-from typing import Tuple, Union
+import datetime
+from operator import itemgetter
+from typing import Callable, Iterable, List, Sequence, Tuple, Union
 from helpers.constants import VVAIS_STORAGE_TERM, VVAIS_TYPE
 from inventories.constants import (
     INVENTORY_WRONG_VALUE,
@@ -47,6 +49,16 @@ def validate_storage_term(storage_term: str) -> Union[None, str]:
     if not storage_term in VVAIS_STORAGE_TERM:
         return INVENTORY_WRONG_VALUE
 
+def validate_inventory_date(date: datetime.date) -> Union[None, str]:
+    """Validate inventory start or end date"""
+    if not isinstance(date, datetime.date):
+        return INVENTORY_WRONG_VALUE
+
+def validate_items_per_period(items_per_period: int) -> Union[None, str]:
+    """Validate inventory number of items per period"""
+    if not isinstance(items_per_period, int):
+        return INVENTORY_WRONG_VALUE
+
 # Dictionary with Inventory fields name as key
 # and function name against which field should be checked as value
 validation_dict = {'number': validate_inventory_number,
@@ -57,12 +69,19 @@ validation_dict = {'number': validate_inventory_number,
                    'total_items': validate_total_item,
                    'storage_term': validate_storage_term}
 
+# Same as 'validation_dict', but for fields which are not
+# required and are validated only if provided
+optional_validation_dict = {'start_date': validate_inventory_date,
+                            'end_date': validate_inventory_date,
+                            'items_per_period': validate_items_per_period}
+
 
 def validate_invenotry(inventory: dict) -> Tuple[bool, dict]:
     """Validate inventory fields values
 
     Validates this fields: number, type, media, last_gv, storage_term,
-      total_items, postfix
+      total_items, postfix and, if provided, start_date, end_date,
+      items_per_period
     
     Args:
         inventory: Dictionary where key is 'Inventory' class fields.
@@ -88,10 +107,159 @@ def validate_invenotry(inventory: dict) -> Tuple[bool, dict]:
         result = function(field_value)
         if result is not None:
             errors[field] = result
+
+    # Run through optional fields which are provided.
+    optional_fields = []
+    for field, function in optional_validation_dict.items():
+        field_value = inventory.get(field)
+        if field_value is None:
+            continue
+
+        optional_fields.append(field)
+        result = function(field_value)
+        if result is not None:
+            errors[field] = result
     
     # Check if there is errors.
     if errors:
         return False, errors
     
     validated_inventory = {field:inventory.get(field) for field in validation_dict.keys()}
-    return True, validated_inventory
\ No newline at end of file
+    validated_inventory.update({field:inventory[field] for field in optional_fields})
+    return True, validated_inventory
+
+
+# Compiled validation plan for 'validate_inventories'.
+# Checks run over whole column of values and return indexes of
+# values which should be checked again row by row.
+_MISSING = object()
+_INT_TYPES = frozenset((int, bool))
+_DATE_TYPES = frozenset((datetime.date, datetime.datetime))
+_VVAIS_TYPE = frozenset(VVAIS_TYPE)
+_VVAIS_STORAGE_TERM = frozenset(VVAIS_STORAGE_TERM)
+
+
+def _check_types(values: Sequence, exact_types: frozenset) -> Iterable[int]:
+    """Return indexes of values which type is not one of exact types"""
+    if set(map(type, values)) <= exact_types:
+        return ()
+    return [index for index, value in enumerate(values)
+            if type(value) not in exact_types]
+
+
+def _check_distinct(values: Sequence, is_valid: Callable) -> Iterable[int]:
+    """Return indexes of invalid values checking every distinct value once"""
+    try:
+        invalid = {value for value in set(values) if not is_valid(value)}
+    except TypeError:
+        # Unhashable values, check row by row.
+        return [index for index, value in enumerate(values) if not is_valid(value)]
+    if not invalid:
+        return ()
+    return [index for index, value in enumerate(values) if value in invalid]
+
+
+def _in_choices(choices: frozenset) -> Callable:
+    """Return function which checks that value is one of choices"""
+    def is_valid(value) -> bool:
+        try:
+            return value in choices
+        except TypeError:
+            return False
+    return is_valid
+
+
+def _check_postfix(values: Sequence) -> Iterable[int]:
+    """Return indexes of invalid postfixes"""
+    return _check_distinct(values, lambda postfix: validate_inventory_postfix(postfix) is None)
+
+
+# Field name, column check, single value validation function.
+# Column check is only a fast filter, values which it returns are
+# validated with the same function as in 'validate_invenotry'.
+_VALIDATION_PLAN = (
+    ('number', lambda values: _check_types(values, _INT_TYPES), validate_inventory_number),
+    ('postfix', _check_postfix, validate_inventory_postfix),
+    ('type', lambda values: _check_distinct(values, _in_choices(_VVAIS_TYPE)),
+     validate_inventory_type),
+    ('electronic', lambda values: _check_types(values, frozenset((bool,))),
+     validate_inventory_media),
+    ('last_gv', lambda values: _check_types(values, _INT_TYPES), validate_inventory_last_gv),
+    ('total_items', lambda values: _check_types(values, _INT_TYPES), validate_total_item),
+    ('storage_term', lambda values: _check_distinct(values, _in_choices(_VVAIS_STORAGE_TERM)),
+     validate_storage_term),
+)
+
+_REQUIRED_FIELDS = tuple(field for field, _, _ in _VALIDATION_PLAN)
+_get_required_fields = itemgetter(*_REQUIRED_FIELDS)
+
+_OPTIONAL_VALIDATION_PLAN = (
+    ('start_date', _DATE_TYPES, validate_inventory_date),
+    ('end_date', _DATE_TYPES, validate_inventory_date),
+    ('items_per_period', _INT_TYPES, validate_items_per_period),
+)
+
+
+def validate_inventories(inventories: Sequence[dict]) -> List[Tuple[bool, dict]]:
+    """Validate many inventories at once
+
+    Gives the same result as calling 'validate_invenotry' for every
+    inventory, but every field is checked for whole column of values
+    in one pass and classifiers are checked only once per distinct value.
+
+    Args:
+        inventories: List of dictionaries where key is 'Inventory' class fields.
+
+    Returns:
+        List with result of 'validate_invenotry' for every inventory.
+    """
+    errors = [{} for _ in inventories]
+
+    # Rows as tuples of required field values and the same values by columns.
+    try:
+        rows = list(map(_get_required_fields, inventories))
+    except KeyError:
+        rows = [tuple(inventory.get(field, _MISSING) for field in _REQUIRED_FIELDS)
+                for inventory in inventories]
+    columns = list(zip(*rows)) or [() for _ in _REQUIRED_FIELDS]
+
+    for (field, check_column, function), values in zip(_VALIDATION_PLAN, columns):
+        for index in check_column(values):
+            value = values[index]
+            if value is _MISSING or value == NO_VALUE:
+                errors[index][field] = NO_VALUE
+                continue
+
+            result = function(value)
+            if result is not None:
+                errors[index][field] = result
+
+    optional_columns = []
+    for field, exact_types, function in _OPTIONAL_VALIDATION_PLAN:
+        values = [inventory.get(field) for inventory in inventories]
+        if set(map(type, values)) <= {type(None)}:
+            continue
+        optional_columns.append((field, values))
+
+        for index in _check_types(values, exact_types | {type(None)}):
+            value = values[index]
+            if value is None:
+                continue
+
+            result = function(value)
+            if result is not None:
+                errors[index][field] = result
+
+    results = []
+    for index, (row_errors, row_values) in enumerate(zip(errors, rows)):
+        if row_errors:
+            results.append((False, row_errors))
+            continue
+
+        validated_inventory = dict(zip(_REQUIRED_FIELDS, row_values))
+        for field, values in optional_columns:
+            if values[index] is not None:
+                validated_inventory[field] = values[index]
+        results.append((True, validated_inventory))
+
+    return results
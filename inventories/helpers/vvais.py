@@ -0,0 +1,168 @@
+"""Module contains streaming reader for VVAIS reports"""
+
+import csv
+import datetime
+import hashlib
+import json
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional, Union
+
+from helpers.constants import VVAIS_MEDIA
+from inventories.constants import FINGERPRINT_FIELDS, VVAIS_COLUMNS, VVAIS_DATE_FORMATS
+
+INT_FIELDS = ('number', 'last_gv', 'items_per_period', 'total_items')
+DATE_FIELDS = ('start_date', 'end_date')
+
+# Lower case column name (or field name itself) against field name
+_COLUMNS = {column.casefold(): field for column, field in VVAIS_COLUMNS.items()}
+_COLUMNS.update({field: field for field in VVAIS_COLUMNS.values()})
+
+# 'papīrs' -> False, 'elektronisks' -> True
+_MEDIA = {media.casefold(): bool(index) for index, media in enumerate(VVAIS_MEDIA)}
+
+
+def _to_int(value):
+    """Convert value to int, return value unchanged if not possible"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _to_media(value):
+    """Convert VVAIS media name to 'electronic' value"""
+    if isinstance(value, str):
+        return _MEDIA.get(value.casefold(), value)
+    return value
+
+
+def _to_date(value):
+    """Convert value to date, return value unchanged if not possible"""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        for date_format in VVAIS_DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+    return value
+
+
+# Field name against function which converts raw value
+_CONVERTERS = {field: _to_int for field in INT_FIELDS}
+_CONVERTERS.update({field: _to_date for field in DATE_FIELDS})
+_CONVERTERS['electronic'] = _to_media
+
+
+def _map_rows(rows: Iterable[tuple]) -> Iterator[dict]:
+    """Map raw report rows to dictionaries with 'Inventory' fields.
+
+    First row is header. Unknown columns and empty cells are skipped,
+    so missing values are reported by validation.
+    Values which can't be converted are left as they are
+    and are reported by validation as well.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    fields = [_COLUMNS.get(str(column or '').strip().casefold())
+              for column in header]
+
+    for row in rows:
+        inventory = {}
+        for field, value in zip(fields, row):
+            if field is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '':
+                continue
+
+            converter = _CONVERTERS.get(field)
+            inventory[field] = converter(value) if converter else value
+
+        # Skip fully empty rows
+        if inventory:
+            yield inventory
+
+
+def _read_csv(report: IO[str]) -> Iterator[tuple]:
+    """Yield CSV rows, delimiter is detected from first lines"""
+    sample = report.read(4096)
+    report.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(report, dialect)
+
+
+def _read_xlsx(report: Union[str, Path, IO[bytes]]) -> Iterator[tuple]:
+    """Yield rows of first XLSX worksheet without loading whole workbook"""
+    # openpyxl is needed only for XLSX reports
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(report, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_vvais_report(report: Union[str, Path, IO],
+                      file_format: Optional[str] = None) -> Iterator[dict]:
+    """Read VVAIS report row by row.
+
+    Rows are yielded lazily, so memory usage does not depend on
+    report size and result can be passed directly to
+    'Inventory.bulk_import_from_vvais'.
+
+    Args:
+        report: Path to report or opened file. CSV file should be
+          opened in text mode, XLSX file in binary mode.
+        file_format: 'csv' or 'xlsx'. If not provided, format is
+          taken from file extension, default is 'csv'.
+
+    Yields:
+        Dictionary with 'Inventory' fields as keys and its values.
+    """
+    if file_format is None:
+        name = report if isinstance(report, (str, Path)) else getattr(report, 'name', '')
+        file_format = 'xlsx' if str(name).lower().endswith('.xlsx') else 'csv'
+
+    if file_format == 'xlsx':
+        yield from _map_rows(_read_xlsx(report))
+    elif isinstance(report, (str, Path)):
+        with open(report, encoding='utf-8-sig', newline='') as csv_file:
+            yield from _map_rows(_read_csv(csv_file))
+    else:
+        yield from _map_rows(_read_csv(report))
+
+
+def _fingerprint_value(value):
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def fingerprint(row: dict) -> str:
+    """Return fingerprint of validated VVAIS report row.
+
+    Missing optional fields are the same as empty ones, so report
+    row and inventory list with the same values have the same
+    fingerprint, see 'inventories.sync'.
+    """
+    values = [_fingerprint_value(row.get(field)) for field in FINGERPRINT_FIELDS]
+    data = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,59 @@
+"""Management command which checks consistency of inventory lists of fond"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventories.analysis import analyze_fond
+from inventories.constants import ANALYSIS_EXAMPLES
+from project.shards import find_fond, use_project
+
+
+class Command(BaseCommand):
+    help = ('Finds numbering gaps, duplicate numbers, overlapping dates '
+            'and inconsistent numbers of items in inventory lists of fond')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fond', help='Fond code')
+        parser.add_argument('--limit', type=int, default=ANALYSIS_EXAMPLES,
+                            help='Number of listed problems of every kind, 0 lists all')
+        parser.add_argument('--json', action='store_true', help='Print report as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            fond = find_fond(options['fond'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        if fond is None:
+            raise CommandError(f'Fond "{options["fond"]}" does not exist')
+
+        started = time.monotonic()
+        with use_project(fond.pk):
+            report = analyze_fond(fond).as_dict(limit=options['limit'] or None)
+        elapsed = time.monotonic() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f'{report["inventories"]} inventory lists analysed in {elapsed:.1f} s')
+        gaps = report['gaps']
+        self.stdout.write(f'Numbering gaps: {gaps["count"]} '
+                          f'({gaps["missing_numbers"]} missing numbers)')
+        for first, last in gaps['ranges']:
+            self.stdout.write(f'  {first}' if first == last else f'  {first}-{last}')
+        self.stdout.write(f'Duplicate numbers: {report["duplicates"]["count"]}')
+        for label in report['duplicates']['inventories']:
+            self.stdout.write(f'  {label}')
+        self.stdout.write(f'Overlapping dates: {report["overlaps"]["count"]}')
+        for first, second in report['overlaps']['pairs']:
+            self.stdout.write(f'  {first} / {second}')
+        self.stdout.write(f'Inconsistent numbers of items: {report["items_mismatch"]["count"]}')
+        for label in report['items_mismatch']['inventories']:
+            self.stdout.write(f'  {label}')
+
+        if report['valid']:
+            self.stdout.write(self.style.SUCCESS('No problems found'))
+        else:
+            self.stdout.write(self.style.WARNING('Problems found'))
@@ -0,0 +1,54 @@
+"""Management command which syncs inventory lists of fond with VVAIS report"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventories.helpers.vvais import read_vvais_report
+from inventories.sync import sync_from_vvais
+from project.shards import find_fond, use_project
+
+
+class Command(BaseCommand):
+    help = ('Makes inventory lists of fond the same as corrected VVAIS report, '
+            'only new, changed and, with --delete, missing rows are written')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fond', help='Fond code')
+        parser.add_argument('report', help='CSV or XLSX report')
+        parser.add_argument('--delete', action='store_true',
+                            help='Delete inventory lists which are not in report')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Show changes without writing them')
+        parser.add_argument('--json', action='store_true', help='Print result as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            fond = find_fond(options['fond'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        if fond is None:
+            raise CommandError(f'Fond "{options["fond"]}" does not exist')
+
+        started = time.monotonic()
+        try:
+            with use_project(fond.pk):
+                result = sync_from_vvais(read_vvais_report(options['report']), fond,
+                                         delete=options['delete'],
+                                         dry_run=options['dry_run'])
+        except OSError as error:
+            raise CommandError(str(error))
+        elapsed = time.monotonic() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+            return
+
+        for row, row_errors in result['errors'].items():
+            self.stderr.write(f'Row {row + 1}: {row_errors}')
+        self.stdout.write(f'{result["inserted"]} inserted, {result["updated"]} updated, '
+                          f'{result["deleted"]} deleted, {result["unchanged"]} unchanged, '
+                          f'{len(result["errors"])} rows with errors ({elapsed:.1f} s)')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, nothing was written'))
@@ -1,15 +1,24 @@
 """Module contains inventories app models"""
 
 import logging
-from typing import Union
+import uuid
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
 
-from django.db import models, OperationalError
+from django.conf import settings
+from django.db import models, router, transaction, OperationalError
+from django.utils import timezone
 from retry import retry
 
 from fonds.models import Fond
-from helpers.constants import TRIES, DELAY
-from inventories.constants import INVENTORY_EXISTS_MSG
-from inventories.helpers.validators import validate_invenotry
+from helpers.constants import TRIES, DELAY, BACKOFF, JITTER
+from helpers.db import run_write
+from helpers.instrumentation import instrumented
+from helpers.querysets import TrackedQuerySet
+from inventories.constants import IMPORT_BATCH_SIZE, INVENTORY_EXISTS_MSG
+from inventories.helpers.validators import validate_invenotry, validate_inventories
+from inventories.helpers.vvais import fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -26,16 +35,36 @@ class Inventory(models.Model):
     storage_term = models.CharField(max_length=20, blank=True)
     items_per_period = models.IntegerField(blank=True, null=True)
     total_items = models.IntegerField(blank=True, null=True)
-    fond = models.ForeignKey(Fond, on_delete=models.CASCADE)
+    # Lookups by fond use index of 'unique_inventory_number' constraint
+    fond = models.ForeignKey(Fond, on_delete=models.CASCADE, db_index=False)
+    # Validation state, row is checked again when changed after
+    # it was validated, see 'project.validation'
+    changed_at = models.DateTimeField(default=timezone.now)
+    validated_at = models.DateTimeField(blank=True, null=True)
+    validation_errors = models.JSONField(blank=True, null=True)
+    # Fingerprint of imported VVAIS report row, re-import writes
+    # only rows with different fingerprint, see 'inventories.sync'
+    fingerprint = models.CharField(max_length=32, blank=True, null=True)
+
+    objects = TrackedQuerySet.as_manager()
 
     class Meta:
         db_table = 'inventory_lists'
+        constraints = [
+            models.UniqueConstraint(fields=['fond', 'number', 'postfix'],
+                                    name='unique_inventory_number'),
+        ]
+        indexes = [
+            models.Index(fields=['start_date', 'end_date'], name='inventory_dates_idx'),
+            models.Index(fields=['type'], name='inventory_type_idx'),
+        ]
     
     def __str__(self):
         return f'{self.fond}, {self.number}.US'
     
     @staticmethod
-    @retry(OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    @instrumented()
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
     def add_inventory_from_vvais(inventory: dict, fond: Fond) -> Union[dict, 'Inventory']:
         """Create new inventory list from VVAIS report.
         
@@ -48,20 +77,245 @@ class Inventory(models.Model):
             else returns list where first value is False and 
             second is error messages.
         """
-        # Checks if inventory with the same number already exists.
-        inventory_exists = Inventory.objects.filter(number=inventory['number']).exists()
-        if inventory_exists:
-            return {'inventory': INVENTORY_EXISTS_MSG}
-
         # Get validated invenotry
         vlidated, result = validate_invenotry(inventory)
 
         # Return errors dictionary in validation failed
         if not vlidated:
             return result
+
+        # Checks if inventory with the same number already exists in fond.
+        inventory_exists = Inventory.objects.filter(fond=fond,
+                                                    number=result['number'],
+                                                    postfix=result['postfix']).exists()
+        if inventory_exists:
+            return {'inventory': INVENTORY_EXISTS_MSG}
         
         # Create inventory wrom dictionary if validation succeed
-        inventory_object = Inventory(fond=fond, **result)
+        inventory_object = Inventory(fond=fond, fingerprint=fingerprint(result), **result)
         inventory_object.save()
         return inventory_object
 
+    @staticmethod
+    def bulk_import_from_vvais(
+            inventories: Iterable[dict],
+            fond: Fond,
+            batch_size: int = IMPORT_BATCH_SIZE,
+            progress: Optional[Callable[[int, int, Dict[int, dict]], None]] = None
+    ) -> Tuple[int, Dict[int, dict]]:
+        """Create inventory lists from VVAIS report in batches.
+
+        Rows are read lazily, so 'inventories' can be any iterable.
+        Each batch is validated at once, checked against existing
+        numbers in fond with one query and inserted with 'bulk_create' in one
+        transaction. Inserts go through SQLite write queue.
+
+        Args:
+            inventories: Iterable of dictionaries with inventory fields
+              as keys and its values.
+            fond: Fond instance to which inventory lists belong.
+            batch_size: Number of rows handled in one transaction.
+            progress: Function called with number of handled rows,
+              number of created inventory lists so far and errors
+              of the batch by row index. It is called inside
+              transaction of every batch, so saved progress is
+              committed together with the batch.
+
+        Returns:
+            Tuple where first value is number of created inventory lists
+            and second is dictionary where key is row index and value
+            is error dictionary returned by 'add_inventory_from_vvais'.
+        """
+        created = 0
+        errors = {}
+        offset = 0
+        rows = iter(inventories)
+
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            batch_errors = {}
+            validated_rows = {}
+            for index, (validated, result) in enumerate(validate_inventories(batch)):
+                if validated:
+                    validated_rows[index] = result
+                else:
+                    batch_errors[index] = result
+
+            def batch_progress(batch_created: int, exists_errors: Dict[int, dict]) -> None:
+                # Totals are passed, so repeated call after retry is harmless
+                progress(offset + len(batch), created + batch_created,
+                         {offset + index: error for index, error
+                          in sorted({**batch_errors, **exists_errors}.items())})
+
+            # Only database part of import goes to the writer.
+            batch_created, exists_errors = run_write(
+                Inventory._insert_batch, validated_rows, fond,
+                batch_progress if progress is not None else None)
+            batch_errors.update(exists_errors)
+
+            created += batch_created
+            for index, error in sorted(batch_errors.items()):
+                errors[offset + index] = error
+            offset += len(batch)
+
+        return created, errors
+
+    @staticmethod
+    def _insert_batch(validated_rows: Dict[int, dict],
+                      fond: Fond,
+                      progress: Optional[Callable[[int, Dict[int, dict]], None]] = None
+                      ) -> Tuple[int, Dict[int, dict]]:
+        """Insert one batch of validated inventory lists.
+
+        Args:
+            validated_rows: Dictionary with row index as key
+              and validated inventory as value.
+            fond: Fond instance to which inventory lists belong.
+            progress: Function called in the same transaction with
+              number of created inventory lists and errors of batch.
+
+        Returns:
+            Tuple with number of created inventory lists
+            and dictionary with errors by row index in batch.
+        """
+        errors = {}
+        numbers = {row['number'] for row in validated_rows.values()}
+
+        with transaction.atomic(using=router.db_for_write(Inventory)):
+            # One query for all numbers in batch instead of one per row.
+            existing = set(Inventory.objects
+                           .filter(fond=fond, number__in=numbers)
+                           .values_list('number', 'postfix'))
+
+            new_inventories = []
+            for index, row in validated_rows.items():
+                key = (row['number'], row['postfix'])
+                if key in existing:
+                    errors[index] = {'inventory': INVENTORY_EXISTS_MSG}
+                    continue
+
+                # Same number can appear several times in one report.
+                existing.add(key)
+                new_inventories.append(Inventory(fond=fond, fingerprint=fingerprint(row), **row))
+
+            Inventory.objects.bulk_create(new_inventories)
+
+            if progress is not None:
+                progress(len(new_inventories), errors)
+
+        return len(new_inventories), errors
+
+
+class UnitRange(models.Model):
+    """Represents 'storage_unit_ranges' table in database.
+
+    Storage units of inventory list with consecutive numbers and the
+    same values, kept as one row. Units are made of range only when
+    they are read, see 'inventories.units'. Number of unit is either
+    in one range or in one 'StorageUnit' row.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, db_index=False,
+                                  related_name='unit_ranges')
+    first = models.IntegerField()
+    last = models.IntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    start_date = models.DateField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    sheets = models.IntegerField(blank=True, null=True)
+
+    objects = TrackedQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'storage_unit_ranges'
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'first'], name='unique_unit_range'),
+        ]
+
+    def __str__(self):
+        return f'{self.inventory_id}, {self.first}-{self.last}'
+
+    @property
+    def size(self) -> int:
+        """Number of units in range"""
+        return self.last - self.first + 1
+
+
+class StorageUnit(models.Model):
+    """Represents 'storage_units' table in database.
+
+    Storage unit (glabāšanas vienība) of inventory list with its own
+    values, usually unit of range which was edited.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, db_index=False,
+                                  related_name='storage_units')
+    number = models.IntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    start_date = models.DateField(blank=True, null=True)
+    end_date = models.DateField(blank=True, null=True)
+    sheets = models.IntegerField(blank=True, null=True)
+
+    objects = TrackedQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'storage_units'
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'number'], name='unique_storage_unit'),
+        ]
+
+    def __str__(self):
+        return f'{self.inventory_id}, {self.number}. GV'
+
+
+class VvaisUpload(models.Model):
+    """Represents 'vvais_uploads' table in database.
+
+    Uploaded VVAIS report which is imported in background.
+    Primary key is used as job id in upload API.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    fond = models.ForeignKey(Fond, on_delete=models.CASCADE)
+    file_format = models.CharField(max_length=4)
+    size = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    processed_rows = models.IntegerField(default=0)
+    created_inventories = models.IntegerField(default=0)
+    # Errors of 'validate_invenotry' by row index
+    errors = models.JSONField(default=dict)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'vvais_uploads'
+
+    def __str__(self):
+        return f'{self.fond}, {self.id} ({self.status})'
+
+    @property
+    def path(self) -> Path:
+        """Path to uploaded report"""
+        return Path(settings.VVAIS_UPLOAD_ROOT) / f'{self.id}.{self.file_format}'
+
+    def as_dict(self) -> dict:
+        """Return upload status for API"""
+        return {
+            'id': str(self.id),
+            'fond': self.fond_id,
+            'status': self.status,
+            'size': self.size,
+            'processed_rows': self.processed_rows,
+            'created_inventories': self.created_inventories,
+            'errors': self.errors,
+            'message': self.message,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,195 @@
+"""Module contains sync of fond's inventory lists with corrected VVAIS report.
+
+Every imported row gets a fingerprint, a hash of its values (see
+'FINGERPRINT_FIELDS'), which is kept in 'Inventory.fingerprint'.
+When the same report is sent again, rows are matched with stored
+inventory lists by number and postfix and only rows with different
+fingerprint are written:
+
+    changeset = diff_report(read_vvais_report(path), fond)
+    apply_changeset(changeset, fond)
+
+Inventory lists which are not in report are deleted only when asked
+with 'delete=True', so partial report doesn't remove the rest of fond.
+
+Report is read once and only keys and fingerprints of stored inventory
+lists are loaded, so unchanged rows cost neither reads of whole rows
+nor writes. Fingerprint is of report row which was imported, changes
+made in application don't change it.
+"""
+
+import logging
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from django.db import connections, router, transaction
+
+from fonds.models import Fond
+from helpers.db import run_write
+from inventories.constants import FINGERPRINT_FIELDS, IMPORT_BATCH_SIZE, INVENTORY_REPEATED_MSG
+from inventories.helpers.validators import validate_inventories
+from inventories.helpers.vvais import fingerprint
+from inventories.models import Inventory
+
+logger = logging.getLogger(__name__)
+
+
+class Changeset(NamedTuple):
+    """Changes which make fond's inventory lists the same as report"""
+    # Validated rows with fingerprint
+    insert: List[dict]
+    # (pk, validated row with fingerprint) pairs
+    update: List[Tuple[int, dict]]
+    # Primary keys of inventory lists which are not in report
+    delete: List[int]
+    # (pk, fingerprint) pairs of unchanged inventory lists
+    # which were imported before fingerprints were kept
+    backfill: List[Tuple[int, str]]
+    unchanged: int
+    # Errors of 'validate_invenotry' by row index
+    errors: Dict[int, dict]
+
+    def as_dict(self) -> dict:
+        return {
+            'inserted': len(self.insert),
+            'updated': len(self.update),
+            'deleted': len(self.delete),
+            'unchanged': self.unchanged,
+            'errors': self.errors,
+        }
+
+
+def _stored(fond: Fond) -> Dict[Tuple[int, str], Tuple[int, str, bool]]:
+    """Return (pk, fingerprint, stored) of fond's inventory lists by (number, postfix).
+
+    Only keys and fingerprints are read. Inventory lists without
+    fingerprint get fingerprint of their values, which is not stored.
+    """
+    stored = {}
+    missing = []
+    for pk, number, postfix, value in (Inventory.objects.filter(fond=fond)
+                                       .values_list('pk', 'number', 'postfix', 'fingerprint')
+                                       .iterator()):
+        stored[number, postfix] = (pk, value, True)
+        if value is None:
+            missing.append(pk)
+
+    for index in range(0, len(missing), IMPORT_BATCH_SIZE):
+        for row in (Inventory.objects.filter(pk__in=missing[index:index + IMPORT_BATCH_SIZE])
+                    .values('pk', 'number', 'postfix', *FINGERPRINT_FIELDS)):
+            stored[row['number'], row['postfix']] = (row['pk'], fingerprint(row), False)
+    return stored
+
+
+def diff_report(inventories: Iterable[dict],
+                fond: Fond,
+                delete: bool = False,
+                batch_size: int = IMPORT_BATCH_SIZE) -> Changeset:
+    """Compare VVAIS report with fond's inventory lists.
+
+    Args:
+        inventories: Iterable of report rows, read lazily.
+        fond: Fond of report.
+        delete: If True, inventory lists which are not in report are deleted.
+        batch_size: Number of rows validated at once.
+
+    Returns:
+        Changeset with new, changed and missing rows.
+    """
+    stored = _stored(fond)
+    seen = set()
+    insert, update, backfill = [], [], []
+    unchanged = 0
+    errors = {}
+    offset = 0
+    rows = iter(inventories)
+
+    while batch := list(islice(rows, batch_size)):
+        results = zip(batch, validate_inventories(batch))
+        for index, (report_row, (validated, row)) in enumerate(results, start=offset):
+            if not validated:
+                errors[index] = row
+                # Inventory list of invalid row is kept
+                seen.add((report_row.get('number'), report_row.get('postfix')))
+                continue
+
+            key = (row['number'], row['postfix'])
+            if key in seen:
+                errors[index] = {'inventory': INVENTORY_REPEATED_MSG}
+                continue
+            seen.add(key)
+
+            row['fingerprint'] = fingerprint(row)
+            if key not in stored:
+                insert.append(row)
+                continue
+
+            pk, value, is_stored = stored[key]
+            if row['fingerprint'] != value:
+                update.append((pk, row))
+                continue
+
+            unchanged += 1
+            if not is_stored:
+                # Values are the same, only fingerprint is written
+                backfill.append((pk, value))
+        offset += len(batch)
+
+    deleted = [pk for key, (pk, _, _) in stored.items() if key not in seen] if delete else []
+    return Changeset(insert, update, deleted, backfill, unchanged, errors)
+
+
+def _apply_batch(fond: Fond,
+                 insert: List[dict],
+                 update: List[Tuple[int, dict]],
+                 delete: List[int],
+                 backfill: List[Tuple[int, str]]) -> None:
+    """Write one batch of changeset in one transaction"""
+    with transaction.atomic(using=router.db_for_write(Inventory)):
+        if insert:
+            Inventory.objects.bulk_create([Inventory(fond=fond, **row) for row in insert])
+        if update:
+            # Updated rows are marked changed for validation by 'project.signals'
+            Inventory.objects.bulk_update(
+                [Inventory(pk=pk, fond=fond, **row) for pk, row in update],
+                [*FINGERPRINT_FIELDS, 'fingerprint'])
+        if delete:
+            Inventory.objects.filter(pk__in=delete).delete()
+        if backfill:
+            # Values are not changed, so no signals are sent. One statement
+            # per row is much faster than CASE of 'bulk_update'.
+            with connections[router.db_for_write(Inventory)].cursor() as cursor:
+                cursor.executemany(f'UPDATE {Inventory._meta.db_table} SET fingerprint = %s '
+                                   f'WHERE id = %s', [(value, pk) for pk, value in backfill])
+
+
+def apply_changeset(changeset: Changeset,
+                    fond: Fond,
+                    batch_size: int = IMPORT_BATCH_SIZE) -> None:
+    """Write changeset in batches, each in its own transaction.
+
+    Writes go through SQLite write queue.
+    """
+    batches = max(len(changeset.insert), len(changeset.update),
+                  len(changeset.delete), len(changeset.backfill))
+    for start in range(0, batches, batch_size):
+        end = start + batch_size
+        run_write(_apply_batch, fond, changeset.insert[start:end], changeset.update[start:end],
+                  changeset.delete[start:end], changeset.backfill[start:end])
+
+
+def sync_from_vvais(inventories: Iterable[dict],
+                    fond: Fond,
+                    delete: bool = False,
+                    dry_run: bool = False,
+                    batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Make fond's inventory lists the same as VVAIS report.
+
+    Returns:
+        Dictionary with number of inserted, updated, deleted and
+        unchanged inventory lists and errors by row index.
+    """
+    changeset = diff_report(inventories, fond, delete=delete, batch_size=batch_size)
+    if not dry_run:
+        apply_changeset(changeset, fond, batch_size=batch_size)
+    return changeset.as_dict()
@@ -0,0 +1,15 @@
+"""Module contains inventories app tasks run by job workers"""
+
+from inventories.constants import IMPORT_VVAIS_UPLOAD
+from inventories.uploads import process_upload
+from jobs.registry import task
+from jobs.worker import JobContext
+from project.shards import use_project
+
+
+@task(IMPORT_VVAIS_UPLOAD)
+def import_vvais_upload(job: JobContext) -> dict:
+    """Import uploaded VVAIS report, continues from last committed batch"""
+    # Jobs queued before sharding have no fond in payload
+    with use_project(job.payload.get('fond_id')):
+        return process_upload(job.payload['upload_id'], job)
@@ -0,0 +1,80 @@
+"""Module contains tests for inventories.analysis"""
+
+import datetime
+import io
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.analysis import analyze_fond, find_duplicates, find_overlaps
+from inventories.models import Inventory
+from project.models import Project
+
+
+def dates(*values):
+    return np.array(values, dtype='datetime64[D]')
+
+
+class AnalysisFunctionsTest(SimpleTestCase):
+    """Class for testing vectorized checks"""
+
+    def test_find_duplicates(self):
+        """Test that all inventory lists of repeated pair are found"""
+        number = np.array([3, 1, 3, 2, 3, 1])
+        postfix = np.array([0, 0, 0, 0, 1, 1])
+        self.assertEqual(find_duplicates(number, postfix).tolist(), [0, 2])
+
+    def test_find_overlaps(self):
+        """Test that overlap is paired with range which has the latest end"""
+        start = dates('2000-01-01', '2001-01-01', '2005-01-01', '2003-01-01', 'NaT', '2020-01-01')
+        end = dates('2010-01-01', '2002-01-01', '2006-01-01', '2004-01-01', '2030-01-01',
+                    '2019-01-01')
+        self.assertEqual(find_overlaps(start, end).tolist(), [[0, 1], [0, 3], [0, 2]])
+
+
+class AnalyzeFondTest(TestCase):
+    """Class for testing analysis of fond"""
+
+    def setUp(self):
+        project = Project.add_project('Analīze')
+        institution = Institution.add_institution(1, 'Iestāde', project=project)
+        self.fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                  False, institution)
+        rows = [
+            # number, postfix, start year, end year, items_per_period, total_items
+            (1, 'a', 1990, 1991, 5, 10),
+            (2, 'a', 1992, 1992, 20, 10),
+            (2, 'b', 1992, 1993, 2, 10),
+            (5, 'a', 1991, 1995, None, 10),
+            (8, 'a', None, None, 3, 4),
+        ]
+        Inventory.objects.bulk_create(
+            Inventory(fond=self.fond, number=number, postfix=postfix,
+                      start_date=start and datetime.date(start, 1, 1),
+                      end_date=end and datetime.date(end, 12, 31),
+                      items_per_period=items_per_period, total_items=total_items)
+            for number, postfix, start, end, items_per_period, total_items in rows)
+
+    def test_analyze_fond(self):
+        """Test that all kinds of problems are reported"""
+        report = analyze_fond(self.fond).as_dict()
+
+        self.assertEqual(report['inventories'], 5)
+        self.assertFalse(report['valid'])
+        self.assertEqual(report['gaps'], {'count': 2, 'missing_numbers': 4,
+                                          'ranges': [[3, 4], [6, 7]]})
+        self.assertEqual(report['duplicates'], {'count': 0, 'inventories': []})
+        self.assertEqual(report['overlaps'], {'count': 3, 'pairs': [['1a', '5a'],
+                                                                   ['5a', '2a'],
+                                                                   ['5a', '2b']]})
+        self.assertEqual(report['items_mismatch'], {'count': 2, 'inventories': ['2a', '2b']})
+
+    def test_command(self):
+        """Test that command prints report"""
+        out = io.StringIO()
+        call_command('analyze_fond', 'F1', stdout=out)
+        self.assertIn('5 inventory lists analysed', out.getvalue())
+        self.assertIn('Numbering gaps: 2 (4 missing numbers)', out.getvalue())
@@ -107,4 +107,47 @@ class InventoryModelTest(TestCase):
         self.assertEqual(INVENTORY_LIST['electronic'], inventory_from_db.electronic)
         self.assertEqual(INVENTORY_LIST['last_gv'], inventory_from_db.last_gv)
         self.assertEqual(INVENTORY_LIST['total_items'], inventory_from_db.total_items)
-        self.assertEqual(INVENTORY_LIST['storage_term'], inventory_from_db.storage_term)
\ No newline at end of file
+        self.assertEqual(INVENTORY_LIST['storage_term'], inventory_from_db.storage_term)
+
+class InventoryBulkImportTest(TestCase):
+    """Class for testing Inventory.bulk_import_from_vvais"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.add_project('Bulk')
+        cls.institution = Institution.add_institution(2, 'w', project=cls.project)
+        cls.fond = Fond.add_fond('2',
+                                 'LNA',
+                                 'Valsts arhivs',
+                                 401,
+                                 'Valsts mezi',
+                                 False,
+                                 cls.institution)
+
+    def test_bulk_import(self):
+        """Test that all valid rows are created in batches"""
+        rows = ({**INVENTORY_LIST, 'number': number} for number in range(1, 26))
+
+        created, errors = Inventory.bulk_import_from_vvais(rows, self.fond, batch_size=10)
+
+        self.assertEqual(created, 25)
+        self.assertEqual(errors, {})
+        self.assertEqual(Inventory.objects.filter(fond=self.fond).count(), 25)
+
+    def test_bulk_import_errors(self):
+        """Test that errors are reported by row index"""
+        Inventory.add_inventory_from_vvais(INVENTORY_LIST, fond=self.fond)
+        rows = [
+            {**INVENTORY_LIST, 'number': 3},
+            INVENTORY_LIST,
+            {**INVENTORY_LIST, 'number': 4, 'type': 'audio'},
+            {**INVENTORY_LIST, 'number': 3},
+        ]
+
+        created, errors = Inventory.bulk_import_from_vvais(rows, self.fond, batch_size=2)
+
+        self.assertEqual(created, 1)
+        self.assertEqual(errors[1], {'inventory': INVENTORY_EXISTS_MSG})
+        self.assertIn('type', errors[2])
+        self.assertEqual(errors[3], {'inventory': INVENTORY_EXISTS_MSG})
+        self.assertNotIn(0, errors)
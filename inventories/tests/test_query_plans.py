@@ -0,0 +1,72 @@
+"""Module contains query plan tests of hot inventory queries.
+
+Every query is explained with 'EXPLAIN QUERY PLAN' and test fails if
+SQLite would read whole table or sort rows in temporary b-tree.
+"""
+
+import datetime
+
+from django.test import TestCase
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.models import Project
+
+
+class QueryPlanTest(TestCase):
+    """Class for checking query plans of hot queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.add_project('Plans')
+        cls.institution = Institution.add_institution(1, 'q', project=cls.project)
+        cls.fond = Fond.add_fond('1', 'LNA', 'Valsts arhivs', 400, 'Valsts mezi',
+                                 False, cls.institution)
+
+    def assertUsesIndex(self, queryset):
+        """Assert that query doesn't scan tables or sort rows"""
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            detail = line.split(maxsplit=3)[-1]
+            with self.subTest(detail=detail):
+                self.assertFalse(detail.startswith('SCAN'), plan)
+                self.assertNotIn('TEMP B-TREE', detail, plan)
+
+    def test_inventory_exists(self):
+        """Duplicate check of one inventory list"""
+        self.assertUsesIndex(Inventory.objects.filter(fond=self.fond, number=1, postfix='a'))
+
+    def test_inventory_batch_exists(self):
+        """Duplicate check of import batch"""
+        self.assertUsesIndex(Inventory.objects
+                             .filter(fond=self.fond, number__in=[1, 2, 3])
+                             .values_list('number', 'postfix'))
+
+    def test_fond_inventories(self):
+        """Inventory lists of fond ordered by number"""
+        self.assertUsesIndex(Inventory.objects
+                             .filter(fond=self.fond)
+                             .order_by('number', 'postfix')
+                             .values_list('number', 'postfix'))
+
+    def test_fond_inventory_range(self):
+        """Primary key range of fond used by parallel export"""
+        self.assertUsesIndex(Inventory.objects.filter(fond=self.fond, pk__range=(1, 100)))
+
+    def test_date_range(self):
+        """Inventory lists which start in given period"""
+        self.assertUsesIndex(Inventory.objects.filter(
+            start_date__range=(datetime.date(1990, 1, 1), datetime.date(2000, 1, 1))))
+
+    def test_type(self):
+        """Inventory lists of given type"""
+        self.assertUsesIndex(Inventory.objects.filter(type='foto'))
+
+    def test_fond_by_code(self):
+        """Fond lookup by code"""
+        self.assertUsesIndex(Fond.objects.filter(fond_code='1'))
+
+    def test_institution_by_reg_nr(self):
+        """Institution lookup by registration number"""
+        self.assertUsesIndex(Institution.objects.filter(reg_nr=1))
@@ -0,0 +1,121 @@
+"""Module contains tests for inventories.sync"""
+
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.constants import INVENTORY_REPEATED_MSG
+from inventories.helpers.vvais import fingerprint
+from inventories.models import Inventory
+from inventories.sync import diff_report, sync_from_vvais
+from project.models import Project
+
+ROW = {
+    'number': 1,
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': False,
+    'last_gv': 10,
+    'start_date': datetime.date(1990, 1, 1),
+    'end_date': datetime.date(1995, 12, 31),
+    'total_items': 10,
+    'storage_term': 'Pastāvīgi glabājamās lietas',
+}
+
+
+def report(count: int = 20, **changes) -> list:
+    """Return report rows, 'changes' are values of rows by number"""
+    return [{**ROW, 'number': number, **changes.get(f'n{number}', {})}
+            for number in range(1, count + 1)]
+
+
+class SyncTest(TestCase):
+    """Class for testing sync of fond with VVAIS report"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.add_project('Sync')
+        cls.institution = Institution.add_institution(3, 'e', project=cls.project)
+        cls.fond = Fond.add_fond('3', 'LNA', 'Valsts arhivs', 402, 'Valsts mezi',
+                                 False, cls.institution)
+
+    def setUp(self):
+        Inventory.bulk_import_from_vvais(report(), self.fond)
+
+    def test_fingerprint(self):
+        """Test that missing optional fields and dates as datetimes don't change fingerprint"""
+        row = {**ROW, 'start_date': datetime.datetime(1990, 1, 1), 'items_per_period': None}
+        self.assertEqual(fingerprint(row), fingerprint(ROW))
+        self.assertNotEqual(fingerprint({**ROW, 'total_items': 11}), fingerprint(ROW))
+        self.assertEqual(Inventory.objects.get(fond=self.fond, number=1).fingerprint,
+                         fingerprint(ROW))
+
+    def test_unchanged_report(self):
+        """Test that unchanged report writes nothing"""
+        with CaptureQueriesContext(connection) as queries:
+            result = sync_from_vvais(report(), self.fond)
+
+        self.assertEqual(result, {'inserted': 0, 'updated': 0, 'deleted': 0,
+                                  'unchanged': 20, 'errors': {}})
+        writes = [query['sql'] for query in queries.captured_queries
+                  if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_changes(self):
+        """Test that only new, changed and missing rows are written"""
+        rows = report(21, n2={'total_items': 12}, n3={'type': 'video'})
+        del rows[4]
+
+        result = sync_from_vvais(rows, self.fond, delete=True)
+
+        self.assertEqual(result, {'inserted': 1, 'updated': 2, 'deleted': 1,
+                                  'unchanged': 17, 'errors': {}})
+        inventories = {inventory.number: inventory
+                       for inventory in Inventory.objects.filter(fond=self.fond)}
+        self.assertEqual(sorted(inventories), [*range(1, 5), *range(6, 22)])
+        self.assertEqual(inventories[2].total_items, 12)
+        self.assertEqual(inventories[3].type, 'video')
+        self.assertEqual(inventories[2].fingerprint, fingerprint({**ROW, 'total_items': 12}))
+        self.assertGreater(inventories[2].changed_at, inventories[1].changed_at)
+        self.assertEqual(self.fond.summary.inventories, 20)
+
+    def test_keep_missing_and_dry_run(self):
+        """Test that missing rows are kept unless deleted and dry run writes nothing"""
+        rows = report(10, n1={'total_items': 1})
+
+        result = sync_from_vvais(rows, self.fond, delete=True, dry_run=True)
+        self.assertEqual((result['updated'], result['deleted']), (1, 10))
+        self.assertEqual(Inventory.objects.get(fond=self.fond, number=1).total_items, 10)
+
+        result = sync_from_vvais(rows, self.fond)
+        self.assertEqual((result['updated'], result['deleted']), (1, 0))
+        self.assertEqual(Inventory.objects.filter(fond=self.fond).count(), 20)
+
+    def test_errors(self):
+        """Test that invalid and repeated rows are reported by row index"""
+        rows = report(3)
+        rows[1]['type'] = 'audio'
+        rows.append({**ROW, 'number': 3})
+
+        changeset = diff_report(rows, self.fond, delete=True, batch_size=2)
+
+        self.assertIn('type', changeset.errors[1])
+        self.assertEqual(changeset.errors[3], {'inventory': INVENTORY_REPEATED_MSG})
+        # Row with error is not deleted
+        self.assertEqual(len(changeset.delete), 17)
+
+    def test_backfill(self):
+        """Test that inventory lists without fingerprint get it without being updated"""
+        Inventory.objects.filter(fond=self.fond).update(fingerprint=None)
+        changed_at = Inventory.objects.get(fond=self.fond, number=1).changed_at
+
+        result = sync_from_vvais(report(20, n2={'total_items': 12}), self.fond)
+
+        self.assertEqual((result['unchanged'], result['updated']), (19, 1))
+        inventory = Inventory.objects.get(fond=self.fond, number=1)
+        self.assertEqual(inventory.fingerprint, fingerprint(ROW))
+        self.assertEqual(inventory.changed_at, changed_at)
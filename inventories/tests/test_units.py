@@ -0,0 +1,135 @@
+"""Module contains tests for inventories.units"""
+
+import datetime
+import types
+
+from django.test import TestCase
+
+from exports.models import StaleManifest
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory, StorageUnit, UnitRange
+from inventories.units import (
+    count_units,
+    edit_unit,
+    generate_units,
+    iter_fond_units,
+    iter_units,
+    units_by_inventory,
+)
+from project.models import Project
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': False,
+    'last_gv': 0,
+    'total_items': 10,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+class StorageUnitsTest(TestCase):
+    """Class for testing storage units kept as ranges"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.add_project('Units')
+        cls.institution = Institution.add_institution(4, 'r', project=cls.project)
+        cls.fond = Fond.add_fond('4', 'LNA', 'Valsts arhivs', 403, 'Valsts mezi',
+                                 False, cls.institution)
+        Inventory.bulk_import_from_vvais([
+            {**INVENTORY_LIST, 'number': 1, 'last_gv': 1000},
+            {**INVENTORY_LIST, 'number': 2},
+            {**INVENTORY_LIST, 'number': 3},
+        ], cls.fond)
+        # Inventory list without units
+        Inventory.objects.filter(fond=cls.fond, number=3).update(total_items=None)
+        cls.first, cls.second, cls.third = (Inventory.objects.filter(fond=cls.fond)
+                                            .order_by('number'))
+
+    def test_generate_units(self):
+        """Test that units are generated as one range per inventory list"""
+        date = datetime.date(1990, 1, 1)
+        generated = generate_units(Inventory.objects.filter(fond=self.fond), batch_size=2,
+                                   start_date=date)
+
+        self.assertEqual(generated, 1010)
+        self.assertEqual(UnitRange.objects.count(), 2)
+        self.assertEqual(count_units(Inventory.objects.filter(fond=self.fond)), 1010)
+        unit_range = UnitRange.objects.get(inventory=self.first)
+        self.assertEqual((unit_range.first, unit_range.last, unit_range.start_date),
+                         (1, 1000, date))
+
+        # Only units added since are generated again
+        Inventory.objects.filter(pk=self.second.pk).update(total_items=15)
+        self.assertEqual(generate_units(Inventory.objects.filter(fond=self.fond)), 5)
+        self.assertEqual(list(UnitRange.objects.filter(inventory=self.second)
+                              .order_by('first').values_list('first', 'last')),
+                         [(1, 10), (11, 15)])
+
+        with self.assertRaises(ValueError):
+            generate_units(Inventory.objects.all(), pages=1)
+
+    def test_iter_units(self):
+        """Test that units are made of ranges lazily and in number order"""
+        generate_units(Inventory.objects.filter(fond=self.fond), title='Lieta')
+
+        units = iter_units(self.first.pk)
+        self.assertNotIsInstance(units, (list, tuple))
+        numbers = [unit.number for unit in units]
+        self.assertEqual(numbers, list(range(1, 1001)))
+        self.assertEqual([(unit.inventory_id, unit.number) for unit in iter_fond_units(self.fond)],
+                         [(self.first.pk, number) for number in range(1, 1001)]
+                         + [(self.second.pk, number) for number in range(1, 11)])
+
+        units = units_by_inventory([self.second.pk, self.third.pk])
+        self.assertEqual(list(units), [self.second.pk])
+        self.assertIsInstance(units[self.second.pk], types.GeneratorType)
+        self.assertEqual(len(list(units[self.second.pk])), 10)
+
+    def test_edit_unit(self):
+        """Test that edited unit is taken out of its range"""
+        generate_units(Inventory.objects.filter(pk=self.second.pk), title='Lieta')
+
+        edit_unit(self.second.pk, 4, title='Pārskati', sheets=12)
+        edit_unit(self.second.pk, 1, sheets=3)
+        edit_unit(self.second.pk, 4, sheets=13)
+        edit_unit(self.second.pk, 11, title='Pielikums')
+
+        self.assertEqual(list(UnitRange.objects.filter(inventory=self.second)
+                              .order_by('first').values_list('first', 'last')),
+                         [(2, 3), (5, 10)])
+        self.assertEqual(StorageUnit.objects.filter(inventory=self.second).count(), 3)
+        units = list(iter_units(self.second.pk))
+        self.assertEqual([unit.number for unit in units], list(range(1, 12)))
+        self.assertEqual((units[0].title, units[0].sheets), ('Lieta', 3))
+        self.assertEqual((units[3].title, units[3].sheets), ('Pārskati', 13))
+        self.assertEqual(units[10].title, 'Pielikums')
+        self.assertEqual(count_units(Inventory.objects.filter(pk=self.second.pk)), 11)
+
+    def test_edit_before_generate(self):
+        """Test that units edited before generating are kept and numbers around them generated"""
+        edit_unit(self.second.pk, 4, title='Pārskati')
+        edit_unit(self.second.pk, 12, title='Pielikums')
+
+        self.assertEqual(generate_units(Inventory.objects.filter(pk=self.second.pk),
+                                        title='Lieta'), 9)
+        self.assertEqual(list(UnitRange.objects.filter(inventory=self.second)
+                              .order_by('first').values_list('first', 'last')),
+                         [(1, 3), (5, 10)])
+        units = list(iter_units(self.second.pk))
+        self.assertEqual([unit.number for unit in units], [*range(1, 11), 12])
+        self.assertEqual([unit.title for unit in units if unit.title != 'Lieta'],
+                         ['Pārskati', 'Pielikums'])
+        self.assertEqual(generate_units(Inventory.objects.filter(pk=self.second.pk)), 0)
+
+    def test_stale_manifest(self):
+        """Test that changed units mark inventory manifest as stale"""
+        StaleManifest.objects.all().delete()
+        generate_units(Inventory.objects.filter(pk=self.first.pk))
+        edit_unit(self.second.pk, 1, title='Lieta')
+
+        self.assertEqual(set(StaleManifest.objects.values_list('kind', 'object_pk')),
+                         {(StaleManifest.INVENTORY, self.first.pk),
+                          (StaleManifest.INVENTORY, self.second.pk)})
@@ -0,0 +1,97 @@
+"""Module contains tests for VVAIS report upload"""
+
+import tempfile
+import types
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import VvaisUpload
+from inventories.uploads import process_upload
+from inventories.tests.test_vvais import REPORT
+from jobs.models import Job
+from jobs.worker import run_worker
+from project.models import Project
+
+
+def create_fond() -> Fond:
+    project = Project.add_project('Upload')
+    institution = Institution.add_institution(3, 'e', project=project)
+    return Fond.add_fond('3', 'LNA', 'Valsts arhivs', 402, 'Valsts mezi', False, institution)
+
+
+class UploadTest(TestCase):
+    """Class for testing upload and status views"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.settings = override_settings(VVAIS_UPLOAD_ROOT=self.folder.name)
+        self.settings.enable()
+        self.fond = create_fond()
+        self.client.force_login(User.objects.create_user('archivist'))
+
+    def tearDown(self):
+        self.settings.disable()
+        self.folder.cleanup()
+
+    def upload(self, **kwargs):
+        return self.client.post(f'/inventories/fonds/{self.fond.pk}/vvais/',
+                                REPORT.encode(), content_type='text/csv', **kwargs)
+
+    def test_upload(self):
+        """Test that report is saved and import is queued"""
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 202)
+        upload = VvaisUpload.objects.get(pk=response.json()['id'])
+        job = Job.objects.get(pk=response.json()['job'])
+        self.assertEqual(job.payload, {'upload_id': str(upload.pk), 'fond_id': upload.fond_id})
+        self.assertEqual(upload.status, VvaisUpload.QUEUED)
+        self.assertEqual(upload.path.read_bytes(), REPORT.encode())
+
+        run_worker('worker', once=True)
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['status'], VvaisUpload.DONE)
+        self.assertEqual(status['processed_rows'], 2)
+        self.assertEqual(status['created_inventories'], 1)
+        self.assertEqual(list(status['errors']['1']), ['last_gv'])
+        self.assertFalse(upload.path.exists())
+
+    def test_wrong_request(self):
+        """Test that wrong uploads are refused"""
+        response = self.client.post(f'/inventories/fonds/{self.fond.pk}/vvais/',
+                                    b'x', content_type='application/pdf')
+        self.assertEqual(response.status_code, 415)
+
+        response = self.client.post('/inventories/fonds/999/vvais/',
+                                    b'x', content_type='text/csv')
+        self.assertEqual(response.status_code, 404)
+
+        with override_settings(VVAIS_UPLOAD_MAX_SIZE=10):
+            self.assertEqual(self.upload().status_code, 413)
+
+        self.client.logout()
+        self.assertEqual(self.upload().status_code, 401)
+
+        self.assertFalse(VvaisUpload.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+
+    def test_resume(self):
+        """Test that import resumes after rows saved in upload and adds errors to it"""
+        upload = VvaisUpload.objects.create(fond=self.fond, file_format='csv', processed_rows=1,
+                                            errors={'0': {'type': ['Kļūda']}})
+        upload.path.write_text(REPORT, encoding='utf-8')
+        done = []
+        job = types.SimpleNamespace(checkpoint={'rows': 0}, progress=done.append)
+
+        self.assertEqual(process_upload(upload.pk, job), {'created': 0, 'errors': 2})
+
+        self.assertEqual(done, [2])
+        upload.refresh_from_db()
+        self.assertEqual(upload.processed_rows, 2)
+        self.assertEqual(sorted(upload.errors), ['0', '1'])
+        self.assertEqual(list(upload.errors['1']), ['last_gv'])
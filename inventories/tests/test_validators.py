@@ -0,0 +1,45 @@
+"""Module contains tests for inventories.helpers.validators"""
+
+import datetime
+
+from django.test import SimpleTestCase
+
+from inventories.constants import INVENTORY_WRONG_VALUE, NO_VALUE
+from inventories.helpers.validators import validate_invenotry, validate_inventories
+
+INVENTORY_LIST = {
+    'number': 2,
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+class ValidateInventoriesTest(SimpleTestCase):
+    """Class for testing validate_inventories"""
+
+    def test_same_as_single_validation(self):
+        """Test that result is the same as validate_invenotry for every row"""
+        inventories = [
+            INVENTORY_LIST,
+            {**INVENTORY_LIST, 'start_date': datetime.date(2000, 1, 1), 'comment': 'x'},
+            {**INVENTORY_LIST, 'number': '2', 'postfix': 'ab', 'type': ['foto']},
+            {**INVENTORY_LIST, 'electronic': 1, 'storage_term': NO_VALUE},
+            {**INVENTORY_LIST, 'end_date': '2000-01-01', 'items_per_period': None},
+            {'postfix': 'b'},
+            {},
+        ]
+
+        results = validate_inventories(inventories)
+
+        self.assertEqual(results, [validate_invenotry(row) for row in inventories])
+        self.assertEqual(results[2][1], {'number': INVENTORY_WRONG_VALUE,
+                                         'postfix': INVENTORY_WRONG_VALUE,
+                                         'type': INVENTORY_WRONG_VALUE})
+
+    def test_empty(self):
+        """Test validation of empty list"""
+        self.assertEqual(validate_inventories([]), [])
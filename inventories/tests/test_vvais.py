@@ -0,0 +1,96 @@
+"""Module contains tests for inventories.helpers.vvais"""
+
+import datetime
+import io
+import tempfile
+import types
+from pathlib import Path
+
+from django.test import TestCase
+from openpyxl import Workbook
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.helpers.vvais import read_vvais_report
+from inventories.models import Inventory
+from project.models import Project
+
+REPORT = (
+    'Uzskaites saraksta numurs;Postfikss;Dokumentu veids;Datu nesējs;'
+    'Pēdējās glabāšanas vienības numurs;Sākuma datums;Beigu datums;'
+    'Glabāšanas termiņš;Glabāšanas vienību skaits kopā;Piezīmes\n'
+    '1;a;foto;elektronisks;55;01.02.1990;1995-12-31;'
+    'Pastāvīgi glabājamās lietas;60;x\n'
+    '2;b;video;papīrs;abc;;;Ilgstoši glabājamās lietas;7;\n'
+)
+
+
+
+def csv_rows(report: str) -> list:
+    """Return rows of CSV report, numbers as int like in XLSX cells"""
+    return [[int(value) if value.isdigit() else value or None for value in line.split(';')]
+            for line in report.splitlines()]
+
+
+class VvaisReportTest(TestCase):
+    """Class for testing VVAIS report reader"""
+
+    def test_read_csv(self):
+        """Test that columns are mapped and values converted"""
+        rows = read_vvais_report(io.StringIO(REPORT))
+        self.assertIsInstance(rows, types.GeneratorType)
+
+        first, second = list(rows)
+        self.assertEqual(first, {
+            'number': 1,
+            'postfix': 'a',
+            'type': 'foto',
+            'electronic': True,
+            'last_gv': 55,
+            'start_date': datetime.date(1990, 2, 1),
+            'end_date': datetime.date(1995, 12, 31),
+            'storage_term': 'Pastāvīgi glabājamās lietas',
+            'total_items': 60,
+        })
+        # Values which can't be converted are left for validation.
+        self.assertEqual(second['last_gv'], 'abc')
+        self.assertFalse(second['electronic'])
+        self.assertNotIn('start_date', second)
+
+    def test_read_xlsx(self):
+        """Test that cells of first worksheet are read with their types"""
+        workbook = Workbook()
+        sheet = workbook.active
+        for row in csv_rows(REPORT):
+            sheet.append(row)
+        sheet['F2'] = datetime.datetime(1990, 2, 1)
+        sheet['E3'] = 55.0
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / 'report.xlsx'
+            workbook.save(path)
+            first, second = list(read_vvais_report(path))
+            with open(path, 'rb') as report:
+                self.assertEqual(list(read_vvais_report(report, 'xlsx')), [first, second])
+
+        self.assertEqual(first['number'], 1)
+        self.assertEqual(first['start_date'], datetime.date(1990, 2, 1))
+        self.assertEqual(first['end_date'], datetime.date(1995, 12, 31))
+        self.assertTrue(first['electronic'])
+        self.assertEqual(second['last_gv'], 55)
+        self.assertNotIn('start_date', second)
+
+    def test_import_report(self):
+        """Test that report can be passed to batched import"""
+        project = Project.add_project('Report')
+        institution = Institution.add_institution(3, 'e', project=project)
+        fond = Fond.add_fond('3', 'LNA', 'Valsts arhivs', 402, 'Valsts mezi',
+                             False, institution)
+
+        created, errors = Inventory.bulk_import_from_vvais(
+            read_vvais_report(io.StringIO(REPORT)), fond)
+
+        self.assertEqual(created, 1)
+        self.assertEqual(list(errors[1]), ['last_gv'])
+        inventory = Inventory.objects.get(fond=fond)
+        self.assertEqual(inventory.start_date, datetime.date(1990, 2, 1))
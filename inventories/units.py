@@ -0,0 +1,243 @@
+"""Module contains storage units (glabāšanas vienības) of inventory lists.
+
+Units are kept compactly. Consecutive units with the same values are
+one 'UnitRange' row, only units with their own values are
+'StorageUnit' rows, so units generated from 'last_gv' take one row
+per inventory list however many units it has.
+
+Units are made of ranges only when they are read, in number order:
+
+    for unit in iter_units(inventory.pk):
+        ...
+
+Editing unit of range splits range, so edited unit gets its own row
+and other units stay in ranges. Units can be edited before they are
+generated, generating then fills numbers around them.
+"""
+
+import datetime
+import heapq
+import logging
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db import router, transaction
+from django.db.models import F, QuerySet, Sum
+from django.db.models.functions import Coalesce
+
+from fonds.models import Fond
+from helpers.db import run_write
+from inventories.constants import UNIT_BATCH_SIZE, UNIT_CHUNK_SIZE, UNIT_FIELDS
+from inventories.models import StorageUnit, UnitRange
+
+logger = logging.getLogger(__name__)
+
+RANGE_VALUES = ('inventory_id', 'first', 'last', *UNIT_FIELDS)
+UNIT_VALUES = ('inventory_id', 'number', *UNIT_FIELDS)
+
+
+class Unit(NamedTuple):
+    """Storage unit of inventory list"""
+    inventory_id: int
+    number: int
+    title: str
+    start_date: Optional[datetime.date]
+    end_date: Optional[datetime.date]
+    sheets: Optional[int]
+
+
+def _check_fields(values: dict) -> None:
+    unknown = set(values).difference(UNIT_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown storage unit fields: {", ".join(sorted(unknown))}')
+
+
+def _key(unit: Unit) -> Tuple[int, int]:
+    return unit.inventory_id, unit.number
+
+
+def _expand(ranges: Iterable[tuple], units: Iterable[tuple]) -> Iterator[Unit]:
+    """Merge range and unit rows, both ordered by inventory list and number.
+
+    Rows have 'RANGE_VALUES' and 'UNIT_VALUES' fields.
+    """
+    expanded = (Unit(inventory_id, number, *values)
+                for inventory_id, first, last, *values in ranges
+                for number in range(first, last + 1))
+    return heapq.merge(expanded, (Unit(*row) for row in units), key=_key)
+
+
+def _iter(ranges: QuerySet, units: QuerySet) -> Iterator[Unit]:
+    return _expand(ranges.order_by('inventory_id', 'first')
+                   .values_list(*RANGE_VALUES).iterator(chunk_size=UNIT_CHUNK_SIZE),
+                   units.order_by('inventory_id', 'number')
+                   .values_list(*UNIT_VALUES).iterator(chunk_size=UNIT_CHUNK_SIZE))
+
+
+def iter_units(inventory_id: int) -> Iterator[Unit]:
+    """Return storage units of inventory list in number order"""
+    return _iter(UnitRange.objects.filter(inventory_id=inventory_id),
+                 StorageUnit.objects.filter(inventory_id=inventory_id))
+
+
+def iter_fond_units(fond: Fond) -> Iterator[Unit]:
+    """Return storage units of all fond's inventory lists.
+
+    Units are ordered by inventory list primary key and number,
+    rows are read in chunks.
+    """
+    return _iter(UnitRange.objects.filter(inventory__fond=fond),
+                 StorageUnit.objects.filter(inventory__fond=fond))
+
+
+def units_by_inventory(inventory_ids: List[int]) -> Dict[int, Iterator[Unit]]:
+    """Return storage units of several inventory lists.
+
+    Ranges and units of all inventory lists are read with two
+    queries, units are made of ranges when iterator is read.
+
+    Returns:
+        Dictionary with inventory list primary key as key and
+        iterator of its units as value, inventory lists without
+        units are not in it.
+    """
+    ranges, units = {}, {}
+    for row in (UnitRange.objects.filter(inventory_id__in=inventory_ids)
+                .order_by('inventory_id', 'first').values_list(*RANGE_VALUES)):
+        ranges.setdefault(row[0], []).append(row)
+    for row in (StorageUnit.objects.filter(inventory_id__in=inventory_ids)
+                .order_by('inventory_id', 'number').values_list(*UNIT_VALUES)):
+        units.setdefault(row[0], []).append(row)
+    return {pk: _expand(ranges.get(pk, []), units.get(pk, []))
+            for pk in ranges.keys() | units.keys()}
+
+
+def count_units(inventories: QuerySet) -> int:
+    """Return number of storage units of inventory lists without reading units"""
+    in_ranges = (UnitRange.objects.filter(inventory__in=inventories)
+                 .aggregate(units=Coalesce(Sum(F('last') - F('first') + 1), 0))['units'])
+    return in_ranges + StorageUnit.objects.filter(inventory__in=inventories).count()
+
+
+def _taken_numbers(inventory_ids: List[int]) -> Dict[int, List[Tuple[int, int]]]:
+    """Return (first, last) numbers of ranges and units by inventory list primary key"""
+    taken = {}
+    for inventory_id, first, last in (UnitRange.objects.filter(inventory_id__in=inventory_ids)
+                                      .values_list('inventory_id', 'first', 'last')):
+        taken.setdefault(inventory_id, []).append((first, last))
+    for inventory_id, number in (StorageUnit.objects.filter(inventory_id__in=inventory_ids)
+                                 .values_list('inventory_id', 'number')):
+        taken.setdefault(inventory_id, []).append((number, number))
+    return taken
+
+
+def _free_numbers(taken: List[Tuple[int, int]], last: int) -> Iterator[Tuple[int, int]]:
+    """Return (first, last) numbers up to 'last' which no range or unit has"""
+    number = 1
+    for first, end in sorted(taken):
+        if number > last:
+            return
+        if first > number:
+            yield number, min(first - 1, last)
+        number = max(number, end + 1)
+    if number <= last:
+        yield number, last
+
+
+def _generate_batch(targets: List[Tuple[int, int]], values: dict) -> int:
+    """Create ranges of one batch of inventory lists in one transaction.
+
+    Args:
+        targets: (inventory list primary key, last unit number) pairs.
+        values: Values of generated units.
+
+    Returns:
+        Number of generated units.
+    """
+    with transaction.atomic(using=router.db_for_write(UnitRange)):
+        taken = _taken_numbers([pk for pk, _ in targets])
+        ranges = [UnitRange(inventory_id=pk, first=first, last=end, **values)
+                  for pk, last in targets
+                  for first, end in _free_numbers(taken.get(pk, []), last)]
+        UnitRange.objects.bulk_create(ranges)
+    return sum(unit_range.size for unit_range in ranges)
+
+
+def generate_units(inventories: QuerySet,
+                   batch_size: int = UNIT_BATCH_SIZE,
+                   **values) -> int:
+    """Generate storage units of inventory lists.
+
+    Units are numbered up to 'last_gv' of inventory list, or up to
+    'total_items' when last number is not known. Numbers which no
+    range or unit has are created as ranges, so generating again
+    creates only units added since and units edited before
+    generating are kept. Writes go through SQLite write queue.
+
+    Args:
+        inventories: Queryset of inventory lists.
+        batch_size: Number of inventory lists handled in one transaction.
+        values: Values of generated units, see 'UNIT_FIELDS'.
+
+    Returns:
+        Number of generated units.
+
+    Raises:
+        ValueError: Value is not storage unit field.
+    """
+    _check_fields(values)
+
+    generated = 0
+    last_pk = 0
+    while True:
+        # Batches are read by primary key, so no cursor is open while writing
+        rows = list(inventories.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', 'last_gv', 'total_items')[:batch_size])
+        if not rows:
+            return generated
+        last_pk = rows[-1][0]
+        targets = [(pk, last_gv or total_items or 0) for pk, last_gv, total_items in rows]
+        generated += run_write(_generate_batch, targets, values)
+
+
+def _edit_unit(inventory_id: int, number: int, values: dict) -> StorageUnit:
+    with transaction.atomic(using=router.db_for_write(UnitRange)):
+        unit_range = (UnitRange.objects
+                      .filter(inventory_id=inventory_id, first__lte=number)
+                      .order_by('-first').first())
+        if unit_range is None or unit_range.last < number:
+            unit, _ = StorageUnit.objects.update_or_create(
+                inventory_id=inventory_id, number=number, defaults=values)
+            return unit
+
+        range_values = {field: getattr(unit_range, field) for field in UNIT_FIELDS}
+        if unit_range.last > number:
+            UnitRange.objects.create(inventory_id=inventory_id, first=number + 1,
+                                     last=unit_range.last, **range_values)
+        if unit_range.first < number:
+            unit_range.last = number - 1
+            unit_range.save(update_fields=['last'])
+        else:
+            unit_range.delete()
+        return StorageUnit.objects.create(inventory_id=inventory_id, number=number,
+                                          **{**range_values, **values})
+
+
+def edit_unit(inventory_id: int, number: int, **values) -> StorageUnit:
+    """Change or add storage unit of inventory list.
+
+    Unit of range is taken out of it, so range is split in two
+    and only edited unit gets its own row.
+
+    Args:
+        inventory_id: Primary key of inventory list.
+        number: Number of unit.
+        values: Changed values, see 'UNIT_FIELDS'.
+
+    Returns:
+        Saved storage unit.
+
+    Raises:
+        ValueError: Value is not storage unit field.
+    """
+    _check_fields(values)
+    return run_write(_edit_unit, inventory_id, number, values)
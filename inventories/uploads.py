@@ -0,0 +1,145 @@
+"""Module contains background import of uploaded VVAIS reports.
+
+Report is written to disk in chunks while it is received and
+is imported later by job worker, see 'inventories.tasks', so
+request handling doesn't wait for the import.
+
+Handled rows, created inventory lists and row errors are saved in
+upload with every batch, in the same transaction and database as the
+batch, and import is resumed from them. Job row can be in other
+database than upload (see 'project.shards'), so job gets only progress.
+"""
+
+import json
+import logging
+import os
+from itertools import islice
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Dict, Optional
+
+from django.db import router, transaction
+from django.db.models import F, Func, JSONField, Value
+from django.utils import timezone
+
+from inventories.constants import IMPORT_VVAIS_UPLOAD, UPLOAD_CHUNK_SIZE
+from inventories.helpers.vvais import read_vvais_report
+from inventories.models import Inventory, VvaisUpload
+from jobs.models import Job
+from project.shards import project_databases
+
+if TYPE_CHECKING:
+    from jobs.worker import JobContext
+
+logger = logging.getLogger(__name__)
+
+
+def save_report(stream: IO[bytes], path: Path, max_size: Optional[int] = None) -> int:
+    """Write stream to file in chunks.
+
+    Data is written into temporary file which is renamed when whole
+    stream is read, so worker never sees partly written report.
+
+    Args:
+        stream: File like object with report, for example request.
+        path: Path to report.
+        max_size: Maximum allowed size in bytes.
+
+    Returns:
+        Number of written bytes.
+
+    Raises:
+        ValueError: If stream is larger than 'max_size'.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.part')
+    size = 0
+    try:
+        with open(temporary, 'wb') as report:
+            while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise ValueError(f'Report is larger than {max_size} bytes')
+                report.write(chunk)
+        os.replace(temporary, path)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    return size
+
+
+def queue_upload(upload: VvaisUpload) -> Job:
+    """Save upload and queue job which imports it.
+
+    Fond is in payload, so job imports into project database.
+    """
+    with transaction.atomic(using=router.db_for_write(VvaisUpload)):
+        upload.save(force_insert=True)
+        return Job.enqueue(IMPORT_VVAIS_UPLOAD, {'upload_id': str(upload.pk),
+                                                 'fond_id': upload.fond_id})
+
+
+def find_upload(upload_id) -> Optional[VvaisUpload]:
+    """Find upload in common and project databases"""
+    for alias in project_databases():
+        upload = VvaisUpload.objects.using(alias).filter(pk=upload_id).first()
+        if upload is not None:
+            return upload
+    return None
+
+
+def _add_errors(errors: Dict[int, dict]) -> Func:
+    """Return expression which adds errors to errors of upload in database"""
+    patch = json.dumps({str(index): error for index, error in errors.items()})
+    return Func(F('errors'), Value(patch), function='json_patch', output_field=JSONField())
+
+
+def process_upload(upload_id, job: Optional['JobContext'] = None) -> dict:
+    """Import uploaded report, progress and errors are saved in upload.
+
+    Progress of upload is saved in transaction of every imported batch.
+    When job is run again after interruption, rows of committed
+    batches are skipped.
+
+    Args:
+        upload_id: Primary key of VvaisUpload.
+        job: Job which runs import.
+
+    Returns:
+        Dictionary with number of handled rows and created inventory lists.
+    """
+    uploads = VvaisUpload.objects.filter(pk=upload_id)
+    upload = uploads.select_related('fond').get()
+
+    skipped = upload.processed_rows
+    previously_created = upload.created_inventories
+
+    def progress(rows: int, created: int, errors: Dict[int, dict]) -> None:
+        rows += skipped
+        created += previously_created
+        fields = {'processed_rows': rows, 'created_inventories': created}
+        if errors:
+            # Errors of earlier batches are in upload already
+            fields['errors'] = _add_errors({skipped + index: error
+                                            for index, error in errors.items()})
+        uploads.update(**fields)
+        if job is not None:
+            job.progress(rows)
+
+    try:
+        uploads.update(status=VvaisUpload.RUNNING)
+        created, errors = Inventory.bulk_import_from_vvais(
+            islice(read_vvais_report(upload.path, upload.file_format), skipped, None),
+            upload.fond,
+            progress=progress)
+    except Exception as error:
+        logger.error('VVAIS upload %s failed', upload_id, exc_info=True)
+        uploads.update(status=VvaisUpload.FAILED, message=str(error),
+                       finished_at=timezone.now())
+        raise
+
+    uploads.update(status=VvaisUpload.DONE,
+                   created_inventories=previously_created + created,
+                   finished_at=timezone.now())
+    upload.path.unlink(missing_ok=True)
+    upload.refresh_from_db(fields=['errors'])
+    return {'created': previously_created + created, 'errors': len(upload.errors)}
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from inventories import views
+
+app_name = 'inventories'
+
+urlpatterns = [
+    path('fonds/<int:fond_id>/vvais/', views.upload_vvais_report, name='upload-vvais'),
+    path('uploads/<uuid:upload_id>/', views.upload_status, name='upload-status'),
+]
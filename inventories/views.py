@@ -1,3 +1,88 @@
-from django.shortcuts import render
+"""Module contains inventories app views.
 
-# Create your views here.
+Views are async, so while large report is received or import
+is running no server worker is blocked.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+
+from fonds.models import Fond
+from inventories.constants import (
+    UPLOAD_CONTENT_TYPES,
+    UPLOAD_FORMAT_ERROR,
+    UPLOAD_SIZE_ERROR,
+)
+from helpers.routers import using_database
+from inventories.models import VvaisUpload
+from inventories.uploads import find_upload, queue_upload, save_report
+from project.shards import project_database
+
+
+async def _authenticated(request: HttpRequest) -> bool:
+    user = await request.auser()
+    return user.is_authenticated
+
+
+@require_POST
+async def upload_vvais_report(request: HttpRequest, fond_id: int) -> JsonResponse:
+    """Receive VVAIS report of fond and queue its import.
+
+    Report is sent as request body with 'text/csv' or XLSX content
+    type, format can be given with 'format' query parameter as well.
+
+    Report is imported by job worker, see 'run_workers' command.
+
+    Returns:
+        Response with status 202 and upload id, which is used
+        to get import status.
+    """
+    if not await _authenticated(request):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    file_format = request.GET.get('format') or UPLOAD_CONTENT_TYPES.get(request.content_type)
+    if file_format not in UPLOAD_CONTENT_TYPES.values():
+        return JsonResponse({'error': UPLOAD_FORMAT_ERROR}, status=415)
+
+    try:
+        # Project id is fond id, upload is kept in project database
+        database = await sync_to_async(project_database)(fond_id)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=409)
+
+    with using_database(database):
+        fond = await Fond.objects.filter(pk=fond_id).afirst()
+        if fond is None:
+            return JsonResponse({'error': 'Fond does not exist'}, status=404)
+
+        upload = VvaisUpload(fond=fond, file_format=file_format)
+        try:
+            # File operations run in thread, so event loop is not blocked
+            upload.size = await sync_to_async(save_report, thread_sensitive=False)(
+                request, upload.path, getattr(settings, 'VVAIS_UPLOAD_MAX_SIZE', None))
+        except ValueError:
+            return JsonResponse({'error': UPLOAD_SIZE_ERROR}, status=413)
+
+        job = await sync_to_async(queue_upload)(upload)
+
+    return JsonResponse({
+        'id': str(upload.pk),
+        'job': job.pk,
+        'status': upload.status,
+        'status_url': reverse('inventories:upload-status', args=[upload.pk]),
+    }, status=202)
+
+
+@require_GET
+async def upload_status(request: HttpRequest, upload_id) -> JsonResponse:
+    """Return progress and row errors of uploaded report"""
+    if not await _authenticated(request):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    upload = await sync_to_async(find_upload)(upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload does not exist'}, status=404)
+    return JsonResponse(upload.as_dict())
@@ -0,0 +1,18 @@
+"""Constants used in jobs app"""
+
+# Seconds between polls of idle worker
+POLL_INTERVAL = 1.0
+
+# Seconds between heartbeats of running job
+HEARTBEAT_INTERVAL = 10.0
+
+# Running job without heartbeat for this many seconds is claimed again
+STALE_AFTER = 60.0
+
+# Number of attempts before job fails
+MAX_ATTEMPTS = 3
+
+# Number of queued jobs read when looking for job to claim
+CLAIM_CANDIDATES = 10
+
+UNKNOWN_TASK_MSG = 'Unknown task'
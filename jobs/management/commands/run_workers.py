@@ -0,0 +1,72 @@
+"""Management command which runs job workers"""
+
+import multiprocessing
+import os
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from helpers.processes import init_worker
+from jobs.constants import POLL_INTERVAL
+from jobs.worker import run_worker, worker_name
+
+
+def _worker_process(index: int, stop, poll_interval: float, once: bool) -> None:
+    init_worker()
+    # Parent process handles Ctrl+C and stops workers with event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(worker_name(index), stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = 'Runs pool of worker processes which run queued jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=getattr(settings, 'JOBS_WORKERS', os.cpu_count() or 1),
+                            help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                            help='Seconds to wait when queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when queue is empty')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('Number of workers should be positive')
+
+        # Workers finish their current job and exit
+        stop = multiprocessing.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stopping workers after current jobs...')
+            stop.set()
+
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous[signum] = signal.signal(signum, request_stop)
+        try:
+            self._run(stop, options)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+    def _run(self, stop, options) -> None:
+        if options['workers'] == 1:
+            count = run_worker(worker_name(), stop, options['poll_interval'], options['once'])
+            self.stdout.write(f'{count} jobs run')
+            return
+
+        processes = [
+            multiprocessing.Process(target=_worker_process,
+                                    args=(index, stop, options['poll_interval'], options['once']),
+                                    name=f'job-worker-{index}')
+            for index in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.stdout.write(f'{len(processes)} workers stopped')
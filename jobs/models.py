@@ -0,0 +1,115 @@
+"""Module contains jobs app models"""
+
+import datetime
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.db import models, OperationalError
+from django.db.models import F, Q
+from django.utils import timezone
+from retry import retry
+
+from helpers.constants import TRIES, DELAY, BACKOFF, JITTER
+from jobs.constants import CLAIM_CANDIDATES, MAX_ATTEMPTS, STALE_AFTER
+
+logger = logging.getLogger(__name__)
+
+
+class Job(models.Model):
+    """Represents 'jobs' table in database.
+
+    Job is claimed by worker with conditional UPDATE, which succeeds
+    only for one worker, so job is never run twice at the same time.
+    Checkpoint is kept between attempts, so interrupted task can
+    continue from the last committed batch.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=MAX_ATTEMPTS)
+    checkpoint = models.JSONField(blank=True, null=True)
+    progress_done = models.BigIntegerField(default=0)
+    progress_total = models.BigIntegerField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.status})'
+
+    @staticmethod
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+    def enqueue(task: str, payload: Optional[dict] = None,
+                max_attempts: int = MAX_ATTEMPTS) -> 'Job':
+        """Put new job into queue.
+
+        Args:
+            task: Name of registered task, see 'jobs.registry'.
+            payload: JSON serializable arguments of task.
+            max_attempts: Number of attempts before job fails.
+
+        Returns:
+            Job instance.
+        """
+        return Job.objects.create(task=task, payload=payload or {}, max_attempts=max_attempts)
+
+    @staticmethod
+    def claimable(now: datetime.datetime) -> Q:
+        """Condition of jobs which can be claimed.
+
+        Queued jobs and running jobs whose worker stopped sending
+        heartbeats, for example because its process was killed.
+        """
+        stale_after = getattr(settings, 'JOBS_STALE_AFTER', STALE_AFTER)
+        stale = now - datetime.timedelta(seconds=stale_after)
+        return Q(status=Job.QUEUED) | Q(status=Job.RUNNING, heartbeat_at__lt=stale)
+
+    @staticmethod
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+    def claim(worker: str) -> Optional['Job']:
+        """Claim the oldest claimable job for worker.
+
+        Candidate is claimed with UPDATE which checks that job is
+        still claimable, so when several workers pick the same
+        candidate only one of them gets it.
+
+        Returns:
+            Claimed Job instance or None if queue is empty.
+        """
+        while True:
+            now = timezone.now()
+            candidates = list(Job.objects
+                              .filter(Job.claimable(now))
+                              .order_by('created_at', 'pk')
+                              .values_list('pk', flat=True)[:CLAIM_CANDIDATES])
+            if not candidates:
+                return None
+
+            for pk in candidates:
+                claimed = (Job.objects
+                           .filter(Job.claimable(now), pk=pk)
+                           .update(status=Job.RUNNING,
+                                   worker=worker,
+                                   attempts=F('attempts') + 1,
+                                   started_at=now,
+                                   heartbeat_at=now))
+                if claimed:
+                    return Job.objects.get(pk=pk)
@@ -0,0 +1,29 @@
+"""Module contains registry of tasks which can be run as jobs.
+
+Tasks are registered in 'tasks' modules of installed apps::
+
+    @task('inventories.import_vvais_upload')
+    def import_vvais_upload(job: JobContext) -> dict:
+        ...
+
+Task gets 'JobContext' and returns JSON serializable result.
+"""
+
+from typing import Callable, Dict, Optional
+
+_tasks: Dict[str, Callable] = {}
+
+
+def task(name: str) -> Callable:
+    """Register function as task with given name"""
+    def decorator(function: Callable) -> Callable:
+        if name in _tasks and _tasks[name] is not function:
+            raise ValueError(f'Task "{name}" is already registered')
+        _tasks[name] = function
+        return function
+    return decorator
+
+
+def get_task(name: str) -> Optional[Callable]:
+    """Return registered task or None"""
+    return _tasks.get(name)
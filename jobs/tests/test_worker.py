@@ -0,0 +1,165 @@
+"""Module contains tests for jobs app"""
+
+import datetime
+import io
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory, VvaisUpload
+from inventories.tests.test_vvais import REPORT
+from inventories.uploads import process_upload, queue_upload
+from jobs.models import Job
+from jobs.registry import task
+from jobs.worker import JobContext, JobLost, run_job, run_worker
+from project.models import Project
+
+RUNS = []
+
+
+@task('jobs.tests.record')
+def record(job: JobContext) -> int:
+    RUNS.append(job.pk)
+    return job.payload['value'] * 2
+
+
+@task('jobs.tests.resumable')
+def resumable(job: JobContext) -> list:
+    """Handles 'parts' one by one and fails once after the second part"""
+    done = (job.checkpoint or {}).get('done', [])
+    for part in job.payload['parts'][len(done):]:
+        with transaction.atomic():
+            done = done + [part]
+            job.save_checkpoint({'done': done}, done=len(done),
+                                total=len(job.payload['parts']))
+        if len(done) == 2 and job.job.attempts == 1:
+            raise RuntimeError('Interrupted')
+    return done
+
+
+class JobTest(TestCase):
+    """Class for testing job claiming and running"""
+
+    def setUp(self):
+        RUNS.clear()
+
+    def test_claim(self):
+        """Test that claimed job is not claimed again"""
+        first = Job.enqueue('jobs.tests.record', {'value': 1})
+        second = Job.enqueue('jobs.tests.record', {'value': 2})
+
+        self.assertEqual(Job.claim('a').pk, first.pk)
+        self.assertEqual(Job.claim('b').pk, second.pk)
+        self.assertIsNone(Job.claim('c'))
+
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.worker, first.attempts), (Job.RUNNING, 'a', 1))
+
+    def test_claim_race(self):
+        """Test that job claimed by another worker meanwhile is skipped"""
+        first = Job.enqueue('jobs.tests.record', {'value': 1})
+        second = Job.enqueue('jobs.tests.record', {'value': 2})
+        raced = []
+
+        def other_worker(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            # Another worker claims first job right after candidates are read
+            if not raced and sql.startswith('SELECT'):
+                raced.append(True)
+                Job.objects.filter(pk=first.pk).update(status=Job.RUNNING, worker='b')
+            return result
+
+        with connection.execute_wrapper(other_worker):
+            claimed = Job.claim('a')
+
+        self.assertEqual(claimed.pk, second.pk)
+        first.refresh_from_db()
+        self.assertEqual((first.worker, first.attempts), ('b', 0))
+
+    def test_stale_job(self):
+        """Test that job without heartbeat is claimed by another worker"""
+        job = Job.enqueue('jobs.tests.record', {'value': 1})
+        Job.claim('a')
+        self.assertIsNone(Job.claim('b'))
+
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(minutes=5))
+        claimed = Job.claim('b')
+        self.assertEqual((claimed.pk, claimed.worker, claimed.attempts), (job.pk, 'b', 2))
+
+        # Previous owner can't write to the job any more
+        with self.assertRaises(JobLost):
+            JobContext(job, 'a').progress(1)
+
+    def test_run_worker(self):
+        """Test that worker runs queued jobs and saves results"""
+        jobs = [Job.enqueue('jobs.tests.record', {'value': value}) for value in range(3)]
+        unknown = Job.enqueue('jobs.tests.missing')
+
+        self.assertEqual(run_worker('a', once=True), 4)
+
+        self.assertEqual(RUNS, [job.pk for job in jobs])
+        self.assertEqual(list(Job.objects.filter(task='jobs.tests.record')
+                              .order_by('pk').values_list('result', flat=True)), [0, 2, 4])
+        unknown.refresh_from_db()
+        self.assertEqual(unknown.status, Job.FAILED)
+
+    def test_resume_from_checkpoint(self):
+        """Test that failed job is run again from its checkpoint"""
+        job = Job.enqueue('jobs.tests.resumable', {'parts': ['a', 'b', 'c']})
+
+        run_job(Job.claim('a'), 'a')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.checkpoint, {'done': ['a', 'b']})
+        self.assertEqual((job.progress_done, job.progress_total), (2, 3))
+
+        run_job(Job.claim('a'), 'a')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, ['a', 'b', 'c'])
+
+    def test_run_workers_command(self):
+        """Test that command runs jobs until queue is empty"""
+        Job.enqueue('jobs.tests.record', {'value': 1})
+        out = io.StringIO()
+        call_command('run_workers', '--workers', '1', '--once', stdout=out)
+        self.assertIn('1 jobs run', out.getvalue())
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+
+class UploadJobTest(TestCase):
+    """Class for testing import of uploaded report as job"""
+
+    def test_resume_upload(self):
+        """Test that resumed import skips rows of committed batches"""
+        project = Project.add_project('Upload')
+        institution = Institution.add_institution(3, 'e', project=project)
+        fond = Fond.add_fond('3', 'LNA', 'Valsts arhivs', 402, 'Valsts mezi', False, institution)
+
+        with tempfile.TemporaryDirectory() as folder, \
+                override_settings(VVAIS_UPLOAD_ROOT=folder):
+            upload = VvaisUpload(fond=fond, file_format='csv')
+            upload.path.write_text(REPORT, encoding='utf-8')
+            job = queue_upload(upload)
+
+            # First row was committed by interrupted attempt
+            Job.claim('a')
+            VvaisUpload.objects.filter(pk=upload.pk).update(processed_rows=1,
+                                                            created_inventories=1)
+            job.refresh_from_db()
+            result = process_upload(upload.pk, JobContext(job, 'a'))
+
+        self.assertEqual(result, {'created': 1, 'errors': 1})
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, VvaisUpload.DONE)
+        self.assertEqual(upload.processed_rows, 2)
+        self.assertEqual(list(upload.errors), ['1'])
+        # Only second row was read, and it is not valid
+        self.assertFalse(Inventory.objects.exists())
+
@@ -0,0 +1,170 @@
+"""Module contains job worker.
+
+Worker claims jobs one by one and runs registered tasks. While task
+is running, heartbeat thread updates job, so other workers know that
+job is not abandoned. Every write of worker to its job checks that
+job still belongs to it, so worker which lost its job (for example
+because it was paused for longer than 'JOBS_STALE_AFTER') stops
+instead of overwriting progress of the new owner.
+"""
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from jobs.constants import HEARTBEAT_INTERVAL, POLL_INTERVAL, UNKNOWN_TASK_MSG
+from jobs.models import Job
+from jobs.registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+class JobLost(Exception):
+    """Job was claimed by another worker"""
+
+
+class JobContext:
+    """Job as seen by task"""
+
+    def __init__(self, job: Job, worker: str):
+        self.job = job
+        self.worker = worker
+
+    @property
+    def pk(self) -> int:
+        return self.job.pk
+
+    @property
+    def payload(self) -> dict:
+        return self.job.payload
+
+    @property
+    def checkpoint(self) -> Optional[dict]:
+        """Checkpoint saved by previous attempt"""
+        return self.job.checkpoint
+
+    def _update(self, **fields) -> None:
+        updated = (Job.objects
+                   .filter(pk=self.job.pk, worker=self.worker, status=Job.RUNNING)
+                   .update(heartbeat_at=timezone.now(), **fields))
+        if not updated:
+            raise JobLost(f'Job {self.job.pk} is not owned by {self.worker}')
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        """Save progress counters"""
+        fields = {'progress_done': done}
+        if total is not None:
+            fields['progress_total'] = total
+        self._update(**fields)
+
+    def save_checkpoint(self, checkpoint: dict, done: Optional[int] = None,
+                        total: Optional[int] = None) -> None:
+        """Save checkpoint and progress.
+
+        Should be called in the same transaction in which task
+        commits its work, then next attempt continues exactly
+        after the last committed part.
+        """
+        fields = {'checkpoint': checkpoint}
+        if done is not None:
+            fields['progress_done'] = done
+        if total is not None:
+            fields['progress_total'] = total
+        self._update(**fields)
+        self.job.checkpoint = checkpoint
+
+
+def worker_name(index: int = 0) -> str:
+    """Return unique name of worker"""
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def _heartbeat(job: Job, worker: str, stop: threading.Event) -> None:
+    interval = getattr(settings, 'JOBS_HEARTBEAT_INTERVAL', HEARTBEAT_INTERVAL)
+    try:
+        while not stop.wait(interval):
+            (Job.objects
+             .filter(pk=job.pk, worker=worker, status=Job.RUNNING)
+             .update(heartbeat_at=timezone.now()))
+    except Exception:
+        logger.warning('Heartbeat of job %s failed', job.pk, exc_info=True)
+    finally:
+        connection.close()
+
+
+def _finish(job: Job, worker: str, status: str, **fields) -> None:
+    if status != Job.QUEUED:
+        fields['finished_at'] = timezone.now()
+    (Job.objects
+     .filter(pk=job.pk, worker=worker, status=Job.RUNNING)
+     .update(status=status, **fields))
+
+
+def run_job(job: Job, worker: str) -> None:
+    """Run claimed job and save its result"""
+    function = get_task(job.task)
+    if function is None:
+        logger.error('%s: %s', UNKNOWN_TASK_MSG, job.task)
+        _finish(job, worker, status=Job.FAILED, error=f'{UNKNOWN_TASK_MSG}: {job.task}')
+        return
+    if job.attempts > job.max_attempts:
+        _finish(job, worker, status=Job.FAILED, error=job.error or 'Too many attempts')
+        return
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job, worker, stop),
+                                 name=f'heartbeat-{job.pk}', daemon=True)
+    heartbeat.start()
+    try:
+        result = function(JobContext(job, worker))
+    except JobLost:
+        logger.warning('Job %s was claimed by another worker', job.pk)
+        return
+    except Exception:
+        logger.error('Job %s failed', job.pk, exc_info=True)
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            # Checkpoint is kept, so next attempt continues
+            _finish(job, worker, status=Job.QUEUED, error=error, heartbeat_at=None)
+        else:
+            _finish(job, worker, status=Job.FAILED, error=error)
+        return
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    _finish(job, worker, status=Job.DONE, result=result, error='')
+
+
+def run_worker(worker: str, stop: Optional[threading.Event] = None,
+               poll_interval: float = POLL_INTERVAL, once: bool = False) -> int:
+    """Claim and run jobs until stopped.
+
+    Args:
+        worker: Unique name of worker.
+        stop: Event which stops worker after current job.
+        poll_interval: Seconds to wait when queue is empty.
+        once: Return when queue is empty.
+
+    Returns:
+        Number of run jobs.
+    """
+    stop = stop or threading.Event()
+    count = 0
+    while not stop.is_set():
+        job = Job.claim(worker)
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job, worker)
+        count += 1
+    return count
@@ -0,0 +1,36 @@
+"""Django settings for batch CLI, see 'opex_project.cli'.
+
+Same as 'opex_project.settings', but only ORM and apps with data
+models are loaded: admin, auth, sessions, messages, staticfiles and
+templates are not needed for import, export and validation. Log file
+is opened only when first record is written.
+"""
+
+from opex_project.settings import *  # noqa: F401,F403
+from opex_project.settings import LOGGING
+
+INSTALLED_APPS = [
+    'project',
+    'institutions',
+    'fonds',
+    'inventories',
+    # Marks OPEX manifests stale when batch changes data
+    'exports',
+    'dedup',
+    # Keeps search index up to date
+    'search',
+    # Keeps fond summaries up to date
+    'aggregates',
+]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+LOGGING = {
+    **LOGGING,
+    'handlers': {
+        name: {**handler, 'delay': True} if handler['class'] == 'logging.FileHandler' else handler
+        for name, handler in LOGGING['handlers'].items()
+    },
+}
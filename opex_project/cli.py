@@ -0,0 +1,255 @@
+"""Batch command-line interface.
+
+Runs import, export and validation without 'manage.py'::
+
+    python -m opex_project.cli import F1 report1.csv report2.xlsx
+    python -m opex_project.cli import --list reports.csv --workers 4
+    python -m opex_project.cli sync F1 report.csv --dry-run
+    python -m opex_project.cli validate "Project name" --full
+    python -m opex_project.cli export "Project name" --incremental
+
+Django is set up with 'opex_project.batch_settings', which load only
+ORM and apps with data models, and only after arguments are parsed.
+Modules of commands are imported when command is run, so every
+command loads only what it uses. Many reports are imported in one
+process, so startup is paid once per batch.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+BATCH_SETTINGS = 'opex_project.batch_settings'
+
+
+def setup() -> None:
+    """Set up Django with batch settings, unless other settings are set"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', BATCH_SETTINGS)
+    import django
+
+    django.setup()
+
+
+def _reports(args) -> List[Tuple[str, str]]:
+    """Return (fond code, report path) pairs from arguments"""
+    reports = [(args.fond, path) for path in args.reports]
+    if args.list:
+        with open(args.list, encoding='utf-8-sig', newline='') as list_file:
+            reports += [(row[0].strip(), row[1].strip())
+                        for row in csv.reader(list_file) if len(row) >= 2]
+    return reports
+
+
+def _import_fond(fond_code: str, paths: List[str]) -> Tuple[bool, List[Tuple[bool, str]]]:
+    """Import reports of one fond into its project database.
+
+    Returns:
+        Tuple where first value is True if some report failed and
+        second is list of (is error, message) lines.
+    """
+    from inventories.helpers.vvais import read_vvais_report
+    from inventories.models import Inventory
+    from project.shards import find_fond, use_project
+
+    try:
+        fond = find_fond(fond_code)
+    except ValueError as error:
+        return True, [(True, f'{path}: {error}') for path in paths]
+    if fond is None:
+        return True, [(True, f'{path}: fond "{fond_code}" does not exist') for path in paths]
+
+    failed = False
+    lines = []
+    with use_project(fond.pk):
+        for path in paths:
+            started = time.monotonic()
+            try:
+                created, errors = Inventory.bulk_import_from_vvais(read_vvais_report(path), fond)
+            except OSError as error:
+                lines.append((True, f'{path}: {error}'))
+                failed = True
+                continue
+
+            lines += [(True, f'{path}: row {row + 1}: {row_errors}')
+                      for row, row_errors in errors.items()]
+            failed = failed or bool(errors)
+            lines.append((False, f'{path}: {created} inventory lists imported into {fond_code}, '
+                                 f'{len(errors)} rows with errors '
+                                 f'({time.monotonic() - started:.1f} s)'))
+    return failed, lines
+
+
+def _print_lines(lines: List[Tuple[bool, str]]) -> None:
+    for error, line in lines:
+        print(line, file=sys.stderr if error else sys.stdout)
+
+
+def import_reports(args) -> int:
+    """Import VVAIS reports, each into its fond.
+
+    Reports of one fond are imported in order. With several workers
+    fonds are imported in parallel processes, which write at the same
+    time when projects have their own databases (see 'project.shards').
+    """
+    by_fond = {}
+    for fond_code, path in _reports(args):
+        by_fond.setdefault(fond_code, []).append(path)
+
+    if args.workers == 1 or len(by_fond) == 1:
+        results = []
+        for fond_code, paths in by_fond.items():
+            results.append(_import_fond(fond_code, paths))
+            _print_lines(results[-1][1])
+        return 1 if any(failed for failed, _ in results) else 0
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from helpers.processes import init_worker
+
+    failed = False
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+        futures = [pool.submit(_import_fond, fond_code, paths)
+                   for fond_code, paths in by_fond.items()]
+        for future in as_completed(futures):
+            fond_failed, lines = future.result()
+            _print_lines(lines)
+            failed = failed or fond_failed
+    return 1 if failed else 0
+
+
+def sync_report(args) -> int:
+    """Sync inventory lists of fond with corrected VVAIS report"""
+    from inventories.helpers.vvais import read_vvais_report
+    from inventories.sync import sync_from_vvais
+    from project.shards import find_fond, use_project
+
+    try:
+        fond = find_fond(args.fond)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    if fond is None:
+        print(f'Fond "{args.fond}" does not exist', file=sys.stderr)
+        return 1
+
+    started = time.monotonic()
+    try:
+        with use_project(fond.pk):
+            result = sync_from_vvais(read_vvais_report(args.report), fond,
+                                     delete=args.delete, dry_run=args.dry_run)
+    except OSError as error:
+        print(f'{args.report}: {error}', file=sys.stderr)
+        return 1
+
+    for row, row_errors in result['errors'].items():
+        print(f'{args.report}: row {row + 1}: {row_errors}', file=sys.stderr)
+    print(f'{args.report}: {result["inserted"]} inserted, {result["updated"]} updated, '
+          f'{result["deleted"]} deleted, {result["unchanged"]} unchanged in {args.fond}'
+          f'{" (dry run)" if args.dry_run else ""} ({time.monotonic() - started:.1f} s)')
+    return 1 if result['errors'] else 0
+
+
+def _project(name: str):
+    from project.models import Project
+
+    project = Project.objects.filter(name=name).first()
+    if project is None:
+        print(f'Project "{name}" does not exist', file=sys.stderr)
+    return project
+
+
+def validate(args) -> int:
+    """Validate inventory lists of project"""
+    from project.validation import validate_project
+
+    project = _project(args.project)
+    if project is None:
+        return 1
+
+    started = time.monotonic()
+    result = validate_project(project, workers=args.workers, full=args.full)
+    print(f'{result["checked"]} inventory lists checked, {result["invalid"]} invalid, '
+          f'validated: {result["validated"]} ({time.monotonic() - started:.1f} s)')
+    return 0 if result['validated'] else 1
+
+
+def export(args) -> int:
+    """Build OPEX package of project"""
+    from django.conf import settings
+
+    from exports.builder import build_package
+
+    project = _project(args.project)
+    if project is None:
+        return 1
+
+    started = time.monotonic()
+    path = build_package(project, args.target or settings.OPEX_EXPORT_ROOT,
+                         workers=args.workers, incremental=args.incremental)
+    print(f'Package {path} built in {time.monotonic() - started:.1f} s')
+    return 0
+
+
+def _workers(value: str) -> int:
+    workers = int(value)
+    if workers < 1:
+        raise argparse.ArgumentTypeError('Number of workers should be positive')
+    return workers
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='opex', description='OPEX project batch operations')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='Import VVAIS reports')
+    import_parser.add_argument('fond', nargs='?', help='Fond code of reports')
+    import_parser.add_argument('reports', nargs='*', help='CSV or XLSX reports')
+    import_parser.add_argument('--list', help='CSV file with fond code and report path rows')
+    import_parser.add_argument('--workers', type=_workers, default=1,
+                               help='Number of worker processes importing different fonds, '
+                                    'default is 1')
+    import_parser.set_defaults(handler=import_reports)
+
+    sync_parser = commands.add_parser('sync', help='Sync fond with corrected VVAIS report')
+    sync_parser.add_argument('fond', help='Fond code of report')
+    sync_parser.add_argument('report', help='CSV or XLSX report')
+    sync_parser.add_argument('--delete', action='store_true',
+                             help='Delete inventory lists which are not in report')
+    sync_parser.add_argument('--dry-run', action='store_true',
+                             help='Show changes without writing them')
+    sync_parser.set_defaults(handler=sync_report)
+
+    validate_parser = commands.add_parser('validate', help='Validate project')
+    validate_parser.add_argument('project', help='Project name')
+    validate_parser.add_argument('--workers', type=_workers, default=None,
+                                 help='Number of worker processes, default is number of CPUs')
+    validate_parser.add_argument('--full', action='store_true',
+                                 help='Check all inventory lists, not only changed ones')
+    validate_parser.set_defaults(handler=validate)
+
+    export_parser = commands.add_parser('export', help='Build OPEX package of project')
+    export_parser.add_argument('project', help='Project name')
+    export_parser.add_argument('--target', help='Folder in which package is created')
+    export_parser.add_argument('--workers', type=_workers, default=None,
+                               help='Number of worker processes, default is number of CPUs')
+    export_parser.add_argument('--incremental', action='store_true',
+                               help='Write only manifests changed since previous build')
+    export_parser.set_defaults(handler=export)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cli = parser()
+    args = cli.parse_args(argv)
+    if args.command == 'import' and not (args.list or (args.fond and args.reports)):
+        cli.error('give fond code and reports or --list')
+
+    setup()
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,11 @@ INSTALLED_APPS = [
     'institutions',
     'fonds',
     'inventories',
+    'exports',
+    'jobs',
+    'dedup',
+    'search',
+    'aggregates',
 ]
 
 MIDDLEWARE = [
@@ -84,6 +90,15 @@ DATABASES = {
     }
 }
 
+# Writes of several threads are run by one writer thread, see helpers.db
+SQLITE_WRITE_QUEUE = True
+
+# Project can get its own SQLite database (shard), so writes of different
+# projects don't wait for each other, see helpers.routers and project.shards
+DATABASE_ROUTERS = ['helpers.routers.ProjectShardRouter']
+OPEX_SHARDING = False
+OPEX_SHARD_ROOT = BASE_DIR / 'shards'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -151,3 +166,29 @@ LOGGING = {
         },
     },
 }
+
+# Folder where OPEX packages are built
+OPEX_EXPORT_ROOT = BASE_DIR / 'opex'
+
+# Folder with content files of electronic inventory lists,
+# files are kept in '<fond code>/<inventory number and postfix>/'
+OPEX_CONTENT_ROOT = BASE_DIR / 'content'
+
+# Content-addressed store of content files, every distinct
+# content is kept once, see 'dedup.store'
+CONTENT_STORE_ROOT = BASE_DIR / 'store'
+
+# Query count and latency metrics of model helpers, turned on with
+# environment variable OPEX_INSTRUMENTATION=1; then every process
+# writes its metrics into OPEX_METRICS_DIR at exit
+OPEX_INSTRUMENTATION = os.environ.get('OPEX_INSTRUMENTATION') == '1'
+OPEX_METRICS_DIR = BASE_DIR / 'metrics'
+
+# Folder where uploaded VVAIS reports are kept until they are imported
+VVAIS_UPLOAD_ROOT = BASE_DIR / 'uploads'
+VVAIS_UPLOAD_MAX_SIZE = 200 * 1024 * 1024
+
+# Background jobs, see 'run_workers' command
+JOBS_WORKERS = 2
+JOBS_HEARTBEAT_INTERVAL = 10
+JOBS_STALE_AFTER = 60
@@ -0,0 +1,94 @@
+"""Module contains tests for batch CLI"""
+
+import contextlib
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test import TestCase
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from inventories.tests.test_vvais import REPORT
+from opex_project.cli import main
+from project.models import Project
+
+# Import time of CLI with Django set up ('python -X importtime') is about
+# 200 ms, with full settings about 290 ms. Budget leaves room for slow
+# machines, loaded web apps are caught by NOT_LOADED
+STARTUP_BUDGET_MS = int(os.environ.get('OPEX_STARTUP_BUDGET_MS', 500))
+
+# Modules which batch CLI should not load at startup
+NOT_LOADED = ('django.contrib.admin', 'django.contrib.auth', 'django.contrib.sessions',
+              'django.contrib.messages', 'django.contrib.staticfiles',
+              'numpy', 'openpyxl', 'exports.builder', 'concurrent.futures.process')
+
+IMPORT_TIME = re.compile(r'import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)')
+
+
+class CliTest(TestCase):
+    """Class for testing batch commands"""
+
+    def setUp(self):
+        self.project = Project.add_project('Batch')
+        institution = Institution.add_institution(1, 'Iestāde', project=self.project)
+        self.fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                  False, institution)
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = Path(folder.name)
+
+    def run_cli(self, *argv) -> tuple:
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = main(list(argv))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_import(self):
+        """Test that several reports are imported in one run"""
+        first = self.folder / 'first.csv'
+        first.write_text(REPORT, encoding='utf-8')
+        second = self.folder / 'second.csv'
+        second.write_text(REPORT.replace('1;a;foto', '3;a;foto'), encoding='utf-8')
+        reports = self.folder / 'reports.csv'
+        reports.write_text(f'F1,{second}\nF9,{first}\n', encoding='utf-8')
+
+        code, out, err = self.run_cli('import', 'F1', str(first), '--list', str(reports))
+
+        self.assertEqual(code, 1)
+        self.assertEqual(sorted(Inventory.objects.values_list('number', flat=True)), [1, 3])
+        self.assertIn(f'{first}: 1 inventory lists imported into F1', out)
+        self.assertIn(f'{first}: fond "F9" does not exist', err)
+
+    def test_validate(self):
+        """Test that exit code shows validation result"""
+        self.assertEqual(self.run_cli('validate', 'Batch', '--workers', '1')[0], 0)
+        self.assertEqual(self.run_cli('validate', 'Missing')[0], 1)
+
+    def test_startup(self):
+        """Test that CLI startup stays within budget and skips web apps"""
+        env = {**os.environ, 'PYTHONPATH': str(settings.BASE_DIR)}
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'from opex_project.cli import setup; setup()'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+
+        total = 0
+        modules = set()
+        for match in IMPORT_TIME.finditer(result.stderr):
+            cumulative, indent, module = match.groups()
+            modules.add(module)
+            # Top level imports include all nested ones
+            if len(indent) == 1:
+                total += int(cumulative)
+
+        self.assertIn('project.signals', modules)
+        self.assertEqual([module for module in NOT_LOADED if module in modules], [])
+        self.assertLess(total / 1000, STARTUP_BUDGET_MS)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ProjectConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'project'
+
+    def ready(self):
+        from helpers.db import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='configure_sqlite')
+
+        # Uztvērēji, kas atzīmē izmaiņas projekta validācijai
+        from project import signals  # noqa: F401
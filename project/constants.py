@@ -1,3 +1,22 @@
 """Konstantes kuras tiek izmantotas 'project' aplikācijā"""
 
-PROJECT_EXISTS_MSG = "Projekts ar doto nosaukumu jau eksistē"
\ No newline at end of file
+PROJECT_EXISTS_MSG = "Projekts ar doto nosaukumu jau eksistē"
+# Projekta validācijas kļūdas
+LAST_GV_EXCEEDS_TOTAL_MSG = 'Pēdējās glabāšanas vienības numurs ir lielāks par vienību skaitu'
+DATES_ORDER_MSG = 'Sākuma datums ir vēlāks par beigu datumu'
+DUPLICATE_NUMBER_MSG = 'Uzskaites saraksta numurs fondā atkārtojas'
+
+# Uzskaites sarakstu skaits, kas tiek validēts vienā daļā
+VALIDATION_CHUNK_SIZE = 20000
+
+# Darba uzdevuma nosaukums projekta validācijai
+VALIDATE_PROJECT = 'project.validate'
+
+# Projekta atsevišķās datubāzes (shard) kļūdas
+SHARD_DETACHED_MSG = 'Projekta {} datubāze ir atvienota'
+SHARD_EXISTS_MSG = 'Projektam {} jau ir atsevišķa datubāze'
+SHARD_PROJECT_MSG = 'Datubāze {} nepieder projektam {}'
+SHARD_CONFLICT_MSG = 'Datubāzes {} iestāde vai fonds jau eksistē citā projektā'
+FOND_AMBIGUOUS_MSG = 'Fonds ar kodu {} eksistē vairākās datubāzēs'
+# Ierakstu skaits, kas tiek kopēts uz projekta datubāzi vienā vaicājumā
+SHARD_COPY_CHUNK = 2000
@@ -0,0 +1,150 @@
+"""Modulī atrodas visas projekta hierarhijas imports.
+
+Projekta apraksta piemērs::
+
+    {
+        'name': 'Projekts',
+        'institution': {'reg_nr': 1, 'name': 'Iestāde', 'creator': '', ...},
+        'fond': {'fond_code': 'F1', 'arch_abbreviation': 'LVA', ...},
+        'inventories': [{'number': 1, 'postfix': 'a', ...}, ...],
+    }
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, OperationalError, transaction
+from retry import retry
+
+from fonds.constants import FOND_EXISTS_MSG
+from fonds.models import Fond
+from helpers.constants import BACKOFF, DELAY, JITTER, TRIES, WRONG_VALUE_PROVIDED
+from institutions.constants import INSTITUTION_EXISTS_MSG
+from institutions.models import Institution
+from inventories.constants import INVENTORY_EXISTS_MSG
+from inventories.helpers.validators import validate_inventories
+from inventories.models import Inventory
+from project.constants import PROJECT_EXISTS_MSG
+from project.models import Project
+from project.shards import exists_in_projects, sharding_enabled
+from project.validation import chunks
+
+logger = logging.getLogger(__name__)
+
+
+def _validate_inventories(projects: List[dict]) -> Tuple[Dict[str, Dict[int, dict]], List[list]]:
+    """Validē visu projektu uzskaites sarakstus.
+
+    Returns:
+        Tuple where first value is dictionary with project name as key
+        and dictionary with errors by inventory index as value, second
+        is list with validated inventories of every project.
+    """
+    errors = {}
+    validated_inventories = []
+    for project in projects:
+        project_errors = {}
+        project_inventories = []
+        numbers = set()
+        results = validate_inventories(project.get('inventories', []))
+        for index, (validated, result) in enumerate(results):
+            if not validated:
+                project_errors[index] = result
+                continue
+            project_inventories.append(result)
+
+            # Jaunam fondam citu uzskaites sarakstu vēl nav
+            key = (result['number'], result['postfix'])
+            if key in numbers:
+                project_errors[index] = {'inventory': INVENTORY_EXISTS_MSG}
+            numbers.add(key)
+
+        if project_errors:
+            errors[project['name']] = project_errors
+        validated_inventories.append(project_inventories)
+    return errors, validated_inventories
+
+
+def _exists_in_shards(projects: List[dict]) -> Optional[str]:
+    """Pārbauda, vai institūcijas vai fondi jau ir projektu datubāzēs.
+
+    Kopējā datubāzē unikalitāti pārbauda pati datubāze, projektu
+    datubāzēs katrs lauks tiek pārbaudīts ar vienu vaicājumu katrai
+    vērtību daļai.
+
+    Returns:
+        Ziņojums par līmeni, kurā vērtība jau eksistē, vai None.
+    """
+    if not sharding_enabled():
+        return None
+    lookups = (
+        (Institution, 'reg_nr', 'institution', INSTITUTION_EXISTS_MSG),
+        (Institution, 'name', 'institution', INSTITUTION_EXISTS_MSG),
+        (Fond, 'fond_code', 'fond', FOND_EXISTS_MSG),
+    )
+    for model, field, level, message in lookups:
+        for chunk in chunks(project[level][field] for project in projects):
+            if exists_in_projects(model, exclude=DEFAULT_DB_ALIAS, **{f'{field}__in': chunk}):
+                return message
+    return None
+
+
+@retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
+def import_projects(projects: List[dict]) -> Union[str, Dict[str, Dict[int, dict]], List[Project]]:
+    """Izveido projektus ar institūcijām, fondiem un uzskaites sarakstiem.
+
+    Viss tiek izveidots vienā transakcijā ar vienu 'bulk_create'
+    katram līmenim. Katrs līmenis ir viens INSERT, kamēr tā parametri
+    nepārsniedz SQLite robežu (skatīt 'SQLITE_MAX_QUERY_PARAMS').
+    Unikalitāti pārbauda datubāze, tāpēc pirms ievietošanas netiek
+    veikti 'exists()' vaicājumi. Projektu datubāzes datubāze
+    nepārbauda, tāpēc tās tiek pārbaudītas pirms ievietošanas.
+
+    Args:
+        projects: Saraksts ar projektu aprakstiem, skatīt moduļa aprakstu.
+
+    Returns:
+        List of Project instances if projects created,
+        dictionary with inventory errors by project name if
+        inventories are not valid, else returns message with warning
+    """
+    errors, validated_inventories = _validate_inventories(projects)
+    if errors:
+        return errors
+
+    # Ziņojums par līmeni, kurā notika kļūda
+    message = PROJECT_EXISTS_MSG
+    try:
+        exists = _exists_in_shards(projects)
+        if exists is not None:
+            logger.warning(exists)
+            return exists
+
+        with transaction.atomic():
+            new_projects = Project.objects.bulk_create(
+                [Project(name=project['name']) for project in projects])
+
+            message = INSTITUTION_EXISTS_MSG
+            Institution.objects.bulk_create(
+                [Institution(project=new_project, **project['institution'])
+                 for new_project, project in zip(new_projects, projects)])
+
+            message = FOND_EXISTS_MSG
+            Fond.objects.bulk_create(
+                [Fond(institution_id=new_project.pk, **project['fond'])
+                 for new_project, project in zip(new_projects, projects)])
+
+            message = INVENTORY_EXISTS_MSG
+            Inventory.objects.bulk_create(
+                [Inventory(fond_id=new_project.pk, **inventory)
+                 for new_project, inventories in zip(new_projects, validated_inventories)
+                 for inventory in inventories])
+
+    except IntegrityError:
+        logger.warning(message, exc_info=True)
+        return message
+    except (KeyError, TypeError, ValueError):
+        logger.error(WRONG_VALUE_PROVIDED, exc_info=True)
+        return WRONG_VALUE_PROVIDED
+
+    return new_projects
@@ -0,0 +1,55 @@
+"""Management command which shows metrics of model helpers"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from helpers.instrumentation import get_metrics, merge_metrics, read_metrics_files
+
+
+class Command(BaseCommand):
+    help = 'Shows query count, database time, wall time and retries of model helpers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=getattr(settings, 'OPEX_METRICS_DIR', None),
+                            help='Folder with metrics files of processes')
+        parser.add_argument('--json', action='store_true',
+                            help='Print merged histograms as JSON')
+        parser.add_argument('--reset', action='store_true',
+                            help='Remove metrics files after they are shown')
+
+    def handle(self, *args, **options):
+        if not options['dir']:
+            raise CommandError('Metrics folder is not set, use --dir or OPEX_METRICS_DIR')
+
+        snapshots = read_metrics_files(options['dir'])
+        snapshots.append(get_metrics())
+        operations = merge_metrics(snapshots)
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {name: operation.as_dict() for name, operation in sorted(operations.items())},
+                indent=2))
+        elif not operations:
+            self.stdout.write('No metrics collected')
+        else:
+            self._print_table(operations)
+
+        if options['reset']:
+            for path in Path(options['dir']).glob('metrics-*.json'):
+                path.unlink(missing_ok=True)
+
+    def _print_table(self, operations: dict) -> None:
+        self.stdout.write(f'{"operation":<40} {"calls":>7} {"errors":>6} '
+                          f'{"metric":<8} {"mean":>9} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>9}')
+        for name, operation in sorted(operations.items()):
+            for index, (metric, histogram) in enumerate(operation.histograms.items()):
+                mean = histogram.total / histogram.count if histogram.count else 0
+                prefix = (f'{name:<40} {operation.calls:>7} {operation.errors:>6}' if index == 0
+                          else ' ' * 55)
+                self.stdout.write(
+                    f'{prefix} {metric:<8} {mean:>9.2f} {histogram.percentile(50):>8.2f} '
+                    f'{histogram.percentile(95):>8.2f} {histogram.percentile(99):>8.2f} '
+                    f'{histogram.max:>9.2f}')
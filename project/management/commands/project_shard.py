@@ -0,0 +1,39 @@
+"""Management command which creates, attaches and detaches project databases"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.models import Project
+from project.shards import attach_shard, create_shard, detach_shard, sharding_enabled
+
+
+class Command(BaseCommand):
+    help = 'Moves project into its own database, attaches or detaches project database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['create', 'attach', 'detach'])
+        parser.add_argument('project', help='Project name')
+        parser.add_argument('--path', help='Database file, required by "attach"')
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError('Project databases are off, set OPEX_SHARDING = True')
+        try:
+            project = Project.objects.get(name=options['project'])
+        except Project.DoesNotExist:
+            raise CommandError(f'Project "{options["project"]}" does not exist')
+
+        action = options['action']
+        try:
+            if action == 'create':
+                path = create_shard(project, options['path'])
+                self.stdout.write(self.style.SUCCESS(f'Project moved into {path}'))
+            elif action == 'attach':
+                if not options['path']:
+                    raise CommandError('Give database file with --path')
+                attach_shard(project, options['path'])
+                self.stdout.write(self.style.SUCCESS(f'{options["path"]} attached'))
+            else:
+                path = detach_shard(project)
+                self.stdout.write(self.style.SUCCESS(f'{path} detached, it can be archived'))
+        except (ValueError, FileNotFoundError) as error:
+            raise CommandError(str(error))
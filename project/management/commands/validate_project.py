@@ -0,0 +1,36 @@
+"""Management command which validates project"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.models import Project
+from project.validation import validate_project
+
+
+class Command(BaseCommand):
+    help = 'Validates inventory lists of project and updates its "validated" flag'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', help='Project name')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes, default is number of CPUs')
+        parser.add_argument('--full', action='store_true',
+                            help='Check all inventory lists, not only changed ones')
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(name=options['project'])
+        except Project.DoesNotExist:
+            raise CommandError(f'Project "{options["project"]}" does not exist')
+
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('Number of workers should be positive')
+
+        started = time.monotonic()
+        result = validate_project(project, workers=options['workers'], full=options['full'])
+
+        style = self.style.SUCCESS if result['validated'] else self.style.WARNING
+        self.stdout.write(style(
+            f'{result["checked"]} inventory lists checked, {result["invalid"]} invalid, '
+            f'validated: {result["validated"]} ({time.monotonic() - started:.1f} s)'))
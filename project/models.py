@@ -1,13 +1,22 @@
 """Modulī atrodas 'project' aplikācijas modeļi"""
 
 import logging
-from typing import Union
+from typing import Optional, Union
 
 from django.db import models, OperationalError
 from django.utils import timezone
 from retry import retry
 
-from helpers.constants import TRIES, DELAY, UNEXPECTED_ERROR_MSG, WRONG_VALUE_PROVIDED
+from helpers.constants import (
+    TRIES,
+    DELAY,
+    BACKOFF,
+    JITTER,
+    UNEXPECTED_ERROR_MSG,
+    WRONG_VALUE_PROVIDED
+)
+from helpers.instrumentation import instrumented
+from helpers.querysets import TrackedQuerySet
 from project.constants import PROJECT_EXISTS_MSG
 
 logger = logging.getLogger(__name__)
@@ -19,6 +28,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     validated = models.BooleanField(default=False)
 
+    objects = TrackedQuerySet.as_manager()
+
     class Meta:
         db_table = 'projects'
 
@@ -26,7 +37,8 @@ class Project(models.Model):
         return f'{self.name}'
     
     @staticmethod
-    @retry(OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    @instrumented()
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
     def add_project(name: str) -> Union[str, 'Project']:
         """Izveido jaunu projektu
         
@@ -54,7 +66,35 @@ class Project(models.Model):
         
         return project
     
-    @retry(OperationalError, tries=TRIES, delay=DELAY, logger=logger)
+    @retry(OperationalError, tries=TRIES, delay=DELAY, backoff=BACKOFF, jitter=JITTER, logger=logger)
     def is_validated(self) -> bool:
         """Pārbauda vai projekts ir validēts"""
         return self.validated
+
+    def validate(self, workers: Optional[int] = None, full: bool = False) -> dict:
+        """Validē projekta uzskaites sarakstus un atjauno 'validated'
+
+        Skatīt 'project.validation.validate_project'.
+        """
+        from project.validation import validate_project
+        return validate_project(self, workers=workers, full=full)
+
+
+class ProjectShard(models.Model):
+    """Atspoguļo 'project_shards' tabulu datubāzē.
+
+    Projekta atsevišķās datubāzes (shard) katalogs, skatīt
+    'project.shards'. Atvienotas datubāzes fails paliek vietā,
+    to var arhivēt un pievienot atkal.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='shard')
+    path = models.CharField(max_length=1024)
+    attached = models.BooleanField(default=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'project_shards'
+
+    def __str__(self):
+        return f'{self.project_id}, {self.path}'
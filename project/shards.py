@@ -0,0 +1,301 @@
+"""Modulī atrodas projektu atsevišķās datubāzes (shard).
+
+Ja 'OPEX_SHARDING' ir ieslēgts, projektam var izveidot savu SQLite
+datubāzi, kurā tiek glabāts viss projekta koks: iestāde, fonds,
+uzskaites saraksti, glabāšanas vienības, kopsavilkumi un meklēšanas
+indekss. Kopējā datubāzē paliek projekti, katalogs ('ProjectShard')
+un darba uzdevumi. Projekti ir neatkarīgi, tāpēc dažādu projektu
+imports nestāv rindā uz vienu SQLite rakstīšanas slēdzeni.
+
+Projekta vaicājumi tiek sūtīti uz tā datubāzi bloka iekšpusē:
+
+    with use_project(project.pk):
+        Inventory.bulk_import_from_vvais(rows, fond)
+
+Datubāzi var atvienot ('detach_shard'), tās fails paliek vietā un to
+var arhivēt, un pievienot atkal ('attach_shard'). Atvienošana jāveic,
+kad projekts netiek izmantots citos procesos.
+"""
+
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from aggregates.models import FondSummary
+from dedup.models import ContentReference
+from exports.models import StaleManifest
+from fonds.models import Fond
+from helpers.constants import SHARD_ALIAS_PREFIX
+from helpers.routers import add_database, remove_database, using_database
+from institutions.models import Institution
+from inventories.models import Inventory, StorageUnit, UnitRange, VvaisUpload
+from project.constants import (
+    FOND_AMBIGUOUS_MSG,
+    SHARD_CONFLICT_MSG,
+    SHARD_COPY_CHUNK,
+    SHARD_DETACHED_MSG,
+    SHARD_EXISTS_MSG,
+    SHARD_PROJECT_MSG,
+)
+from project.models import Project, ProjectShard
+from search.index import rebuild_index, remove_objects
+
+# Projekta koka modeļi vecāku secībā un to filtrs pēc projekta id
+PROJECT_TREE = (
+    (Institution, 'project_id'),
+    (Fond, 'institution_id'),
+    (Inventory, 'fond_id'),
+    (UnitRange, 'inventory__fond_id'),
+    (StorageUnit, 'inventory__fond_id'),
+    (VvaisUpload, 'fond_id'),
+    (FondSummary, 'fond_id'),
+    (StaleManifest, 'project_id'),
+    (ContentReference, 'inventory__fond_id'),
+)
+
+
+def sharding_enabled() -> bool:
+    return getattr(settings, 'OPEX_SHARDING', False)
+
+
+def shard_alias(project_id: int) -> str:
+    return f'{SHARD_ALIAS_PREFIX}{project_id}'
+
+
+def shard_path(project_id: int) -> Path:
+    """Atgriež jaunas projekta datubāzes faila ceļu"""
+    return Path(settings.OPEX_SHARD_ROOT) / f'{shard_alias(project_id)}.sqlite3'
+
+
+def project_database(project_id: Optional[int]) -> str:
+    """Atgriež projekta datubāzes aizstājvārdu.
+
+    Projekta datubāze tiek pievienota savienojumiem, kad to
+    pieprasa pirmo reizi. Projektam bez atsevišķas datubāzes
+    tiek atgriezta kopējā datubāze.
+
+    Raises:
+        ValueError: Projekta datubāze ir atvienota.
+    """
+    if project_id is None or not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    alias = shard_alias(project_id)
+    if alias in connections.settings:
+        return alias
+
+    shard = (ProjectShard.objects.using(DEFAULT_DB_ALIAS)
+             .filter(pk=project_id).values_list('path', 'attached').first())
+    if shard is None:
+        return DEFAULT_DB_ALIAS
+    path, attached = shard
+    if not attached:
+        raise ValueError(SHARD_DETACHED_MSG.format(project_id))
+    add_database(alias, path)
+    return alias
+
+
+@contextmanager
+def use_project(project_id: Optional[int]) -> Iterator[str]:
+    """Sūta projekta koka vaicājumus uz projekta datubāzi bloka laikā"""
+    with using_database(project_database(project_id)) as alias:
+        yield alias
+
+
+def attached_databases() -> List[str]:
+    """Atgriež visu pievienoto projektu datubāžu aizstājvārdus"""
+    if not sharding_enabled():
+        return []
+    return [project_database(pk) for pk in ProjectShard.objects.using(DEFAULT_DB_ALIAS)
+            .filter(attached=True).order_by('pk').values_list('pk', flat=True)]
+
+
+def project_databases() -> List[str]:
+    """Atgriež kopējās un visu pievienoto projektu datubāžu aizstājvārdus"""
+    return [DEFAULT_DB_ALIAS, *attached_databases()]
+
+
+def exists_in_projects(model, exclude: Optional[str] = None, **lookup) -> bool:
+    """Pārbauda, vai rinda eksistē kopējā vai kādā projekta datubāzē.
+
+    Unikālos laukus ('reg_nr', 'fond_code') datubāze pārbauda tikai
+    savās rindās, tāpēc pirms jaunas rindas izveides jāpārbauda visas.
+
+    Args:
+        model: Projekta koka modelis.
+        exclude: Datubāze, kas netiek pārbaudīta.
+        lookup: Filtrs, piemēram, fond_code='F1'.
+    """
+    return any(model.objects.using(alias).filter(**lookup).exists()
+               for alias in project_databases() if alias != exclude)
+
+
+def find_fond(fond_code: str) -> Optional[Fond]:
+    """Atrod fondu pēc koda kopējā un projektu datubāzēs.
+
+    Atrastā fonda projekta datubāze ir 'fond._state.db'.
+
+    Raises:
+        ValueError: Fonds ar šo kodu ir vairākās datubāzēs.
+    """
+    found = [fond for alias in project_databases()
+             for fond in Fond.objects.using(alias).filter(fond_code=fond_code)]
+    if len(found) > 1:
+        raise ValueError(FOND_AMBIGUOUS_MSG.format(fond_code))
+    return found[0] if found else None
+
+
+def _check_unique(alias: str, path: Path) -> None:
+    """Pārbauda, ka pievienotās datubāzes iestāde un fonds nav citā projektā"""
+    for model, fields in ((Institution, ('reg_nr', 'name')), (Fond, ('fond_code',))):
+        for row in model.objects.using(alias).values(*fields):
+            for field, value in row.items():
+                if exists_in_projects(model, exclude=alias, **{field: value}):
+                    raise ValueError(SHARD_CONFLICT_MSG.format(path))
+
+
+def _create_schema(alias: str, project: Project) -> None:
+    """Izveido tabulas un projekta rindu projekta datubāzē"""
+    call_command('migrate', database=alias, run_syncdb=True, verbosity=0, interactive=False)
+    # Projekta rinda ir kataloga rindas kopija ārējām atslēgām
+    Project._base_manager.using(alias).bulk_create([Project(
+        pk=project.pk, name=project.name, created_at=project.created_at,
+        validated=project.validated)], ignore_conflicts=True)
+
+
+def _copy_tree(project: Project, alias: str) -> None:
+    """Kopē projekta koku no kopējās datubāzes uz projekta datubāzi.
+
+    Rindas tiek kopētas bez signāliem, meklēšanas indekss tiek
+    izveidots no jauna.
+    """
+    with transaction.atomic(using=alias):
+        for model, lookup in PROJECT_TREE:
+            rows = (model._base_manager.using(DEFAULT_DB_ALIAS)
+                    .filter(**{lookup: project.pk}).distinct().order_by('pk')
+                    .values(*[field.attname for field in model._meta.concrete_fields])
+                    .iterator(chunk_size=SHARD_COPY_CHUNK))
+            while chunk := list(islice(rows, SHARD_COPY_CHUNK)):
+                model._base_manager.using(alias).bulk_create([model(**row) for row in chunk])
+        rebuild_index(using=alias)
+
+
+def _delete_tree(project: Project) -> None:
+    """Dzēš projekta koku no kopējās datubāzes bez signāliem.
+
+    Satura objekti paliek kopējā datubāzē, uz tiem atsaucas arī citi projekti.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        for model, lookup in reversed(PROJECT_TREE):
+            pks = list(model._base_manager.using(DEFAULT_DB_ALIAS)
+                       .filter(**{lookup: project.pk}).values_list('pk', flat=True))
+            for index in range(0, len(pks), SHARD_COPY_CHUNK):
+                chunk = pks[index:index + SHARD_COPY_CHUNK]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {model._meta.db_table} '
+                               f'WHERE {model._meta.pk.column} IN ({placeholders})', chunk)
+                if model in (Institution, Fond, Inventory):
+                    remove_objects(model, chunk, using=DEFAULT_DB_ALIAS)
+
+
+def create_shard(project: Project, path: Union[str, Path, None] = None) -> Path:
+    """Izveido projekta datubāzi un pārceļ uz to projekta koku.
+
+    Kopēšanas laikā kopējā datubāzē nevar rakstīt. Procesi, kas
+    projektu izmanto 'use_project' blokā, kurš sākts pirms tam,
+    raksta kopējā datubāzē, tāpēc projektam jābūt neizmantotam.
+
+    Args:
+        project: Project instance.
+        path: Datubāzes faila ceļš, pēc noklusējuma 'OPEX_SHARD_ROOT'
+          mapē.
+
+    Returns:
+        Datubāzes faila ceļš.
+
+    Raises:
+        ValueError: Projektam jau ir datubāze.
+    """
+    if ProjectShard.objects.using(DEFAULT_DB_ALIAS).filter(pk=project.pk).exists():
+        raise ValueError(SHARD_EXISTS_MSG.format(project.pk))
+
+    path = Path(path) if path is not None else shard_path(project.pk)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    alias = shard_alias(project.pk)
+    add_database(alias, path)
+    try:
+        _create_schema(alias, project)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            # Kataloga ieraksts aizņem kopējās datubāzes rakstīšanas
+            # slēdzeni, tāpēc citi raksti gaida, līdz rindas ir kopētas
+            # un dzēstas, un netiek dzēsti nenokopēti
+            ProjectShard.objects.using(DEFAULT_DB_ALIAS).create(project=project, path=str(path))
+            _copy_tree(project, alias)
+            _delete_tree(project)
+    except BaseException:
+        remove_database(alias)
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def attach_shard(project: Project, path: Union[str, Path]) -> None:
+    """Pievieno projektam tā datubāzi, piemēram, no arhīva.
+
+    Trūkstošās tabulas tiek izveidotas.
+
+    Raises:
+        ValueError: Datubāze pieder citam projektam, vai tās iestāde
+          vai fonds jau eksistē citā projektā.
+        FileNotFoundError: Datubāzes fails neeksistē.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(path)
+
+    alias = shard_alias(project.pk)
+    remove_database(alias)
+    add_database(alias, path)
+    try:
+        owner = Project._base_manager.using(alias).filter(pk=project.pk).exists()
+        if not owner:
+            raise ValueError(SHARD_PROJECT_MSG.format(path, project.pk))
+        _create_schema(alias, project)
+        _check_unique(alias, path)
+    except BaseException:
+        remove_database(alias)
+        raise
+
+    ProjectShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        project=project,
+        defaults={'path': str(path), 'attached': True, 'changed_at': timezone.now()})
+
+
+def detach_shard(project: Project) -> Path:
+    """Atvieno projekta datubāzi, fails paliek vietā.
+
+    Žurnāls (WAL) tiek ierakstīts datubāzes failā, tāpēc failu
+    var arhivēt bez citiem failiem.
+
+    Returns:
+        Datubāzes faila ceļš.
+
+    Raises:
+        ProjectShard.DoesNotExist: Projektam nav datubāzes.
+    """
+    shard = ProjectShard.objects.using(DEFAULT_DB_ALIAS).get(pk=project.pk)
+    alias = shard_alias(project.pk)
+    add_database(alias, shard.path)
+    with connections[alias].cursor() as cursor:
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    remove_database(alias)
+
+    shard.attached = False
+    shard.changed_at = timezone.now()
+    shard.save(update_fields=['attached', 'changed_at'])
+    return Path(shard.path)
@@ -0,0 +1,61 @@
+"""Modulī atrodas signālu uztvērēji, kas atzīmē izmaiņas validācijai.
+
+Mainītam uzskaites sarakstam tiek atjaunots 'changed_at', tāpēc tas
+tiek pārbaudīts nākamajā validācijā, un projekts vairs nav validēts.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from helpers.signals import bulk_created, queryset_updated
+from inventories.models import Inventory
+from project.models import Project
+from project.validation import VALIDATION_FIELDS, chunks
+
+
+def _invalidate_projects(fond_ids) -> None:
+    # Projekta un fonda primārās atslēgas sakrīt
+    (Project._base_manager
+     .filter(pk__in=set(fond_ids), validated=True)
+     .update(validated=False))
+
+
+@receiver(pre_save, sender=Inventory)
+def touch_inventory(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and VALIDATION_FIELDS.issuperset(update_fields):
+        return
+    instance.changed_at = timezone.now()
+
+
+@receiver(post_save, sender=Inventory)
+def inventory_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None:
+        if VALIDATION_FIELDS.issuperset(update_fields):
+            return
+        if 'changed_at' not in update_fields:
+            (Inventory._base_manager
+             .filter(pk=instance.pk)
+             .update(changed_at=instance.changed_at))
+    _invalidate_projects([instance.fond_id])
+
+
+@receiver(post_delete, sender=Inventory)
+def inventory_deleted(sender, instance, **kwargs):
+    _invalidate_projects([instance.fond_id])
+
+
+@receiver(bulk_created, sender=Inventory)
+def inventories_created(sender, instances, **kwargs):
+    _invalidate_projects(instance.fond_id for instance in instances)
+
+
+@receiver(queryset_updated, sender=Inventory)
+def inventories_updated(sender, pks, fields, **kwargs):
+    if VALIDATION_FIELDS.issuperset(fields):
+        return
+    now = timezone.now()
+    for chunk in chunks(pks):
+        inventories = Inventory._base_manager.filter(pk__in=chunk)
+        inventories.update(changed_at=now)
+        _invalidate_projects(inventories.values_list('fond_id', flat=True).distinct())
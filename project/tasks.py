@@ -0,0 +1,17 @@
+"""Module contains project app tasks run by job workers"""
+
+from jobs.registry import task
+from jobs.worker import JobContext
+from project.constants import VALIDATE_PROJECT
+from project.models import Project
+from project.validation import validate_project
+
+
+@task(VALIDATE_PROJECT)
+def validate_project_task(job: JobContext) -> dict:
+    """Validate project, results of finished parts are kept if interrupted"""
+    project = Project.objects.get(pk=job.payload['project_id'])
+    return validate_project(project,
+                            workers=job.payload.get('workers'),
+                            full=job.payload.get('full', False),
+                            progress=job.progress)
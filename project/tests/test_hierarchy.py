@@ -0,0 +1,104 @@
+"""Module contains tests for project.hierarchy"""
+
+import math
+
+from django.db import connection, models
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from fonds.constants import FOND_EXISTS_MSG
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.constants import INVENTORY_EXISTS_MSG
+from inventories.models import Inventory
+from project.constants import PROJECT_EXISTS_MSG
+from project.hierarchy import import_projects
+from project.models import Project
+from search.constants import SEARCH_INDEX_CHUNK
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+def project_description(index: int, inventories: int = 3) -> dict:
+    return {
+        'name': f'Projekts {index}',
+        'institution': {'reg_nr': index, 'name': f'Iestāde {index}'},
+        'fond': {
+            'fond_code': f'F{index}',
+            'arch_abbreviation': 'LVA',
+            'arch_title': 'Latvijas Valsts arhīvs',
+            'fond_number': index,
+            'fond_title': f'Fonds {index}',
+            'subfond': False,
+        },
+        'inventories': [{**INVENTORY_LIST, 'number': number} for number in range(inventories)],
+    }
+
+
+def expected_inserts(model, rows: int) -> int:
+    """Return number of INSERT queries of 'bulk_create' with given number of rows"""
+    fields = [field for field in model._meta.concrete_fields
+              if not isinstance(field, models.AutoField)]
+    return math.ceil(rows / connection.ops.bulk_batch_size(fields, []))
+
+
+class ImportProjectsTest(TestCase):
+    """Class for testing import_projects"""
+
+    def import_captured(self, first: int, projects: int) -> CaptureQueriesContext:
+        with CaptureQueriesContext(connection) as queries:
+            result = import_projects([project_description(index, 2)
+                                      for index in range(first, first + projects)])
+        self.assertEqual(len(result), projects)
+        return queries
+
+    def test_import(self):
+        """Test that 500 projects are created with one insert per level"""
+        queries = self.import_captured(0, 500)
+
+        self.assertEqual(Institution.objects.count(), 500)
+        self.assertEqual(Fond.objects.get(fond_code='F7').institution.project.name, 'Projekts 7')
+        self.assertEqual(Inventory.objects.filter(fond__fond_code='F7').count(), 2)
+        for model, rows in ((Project, 500), (Institution, 500), (Fond, 500), (Inventory, 1000)):
+            inserts = [query for query in queries
+                       if query['sql'].startswith(f'INSERT INTO "{model._meta.db_table}"')]
+            self.assertEqual(len(inserts), expected_inserts(model, rows), model)
+            self.assertEqual(len(inserts), 1, model)
+
+    def test_queries_of_receivers(self):
+        """Test that signal receivers don't add queries per project"""
+        small = self.import_captured(0, 10)
+        large = self.import_captured(10, 500)
+
+        # Only search index is written in chunks of primary keys
+        chunks = math.ceil(1000 / SEARCH_INDEX_CHUNK) - math.ceil(20 / SEARCH_INDEX_CHUNK)
+        self.assertEqual(len(large) - len(small), chunks)
+
+    def test_existing(self):
+        """Test that nothing is created if one level already exists"""
+        import_projects([project_description(1)])
+        description = project_description(2)
+        description['fond']['fond_code'] = 'F1'
+
+        self.assertEqual(import_projects([description]), FOND_EXISTS_MSG)
+        self.assertEqual(import_projects([project_description(1)]), PROJECT_EXISTS_MSG)
+        self.assertFalse(Project.objects.filter(name='Projekts 2').exists())
+
+    def test_inventory_errors(self):
+        """Test that inventory errors are returned before import"""
+        description = project_description(1)
+        description['inventories'].append({**INVENTORY_LIST, 'number': 0})
+        description['inventories'].append({**INVENTORY_LIST, 'number': 'x'})
+
+        result = import_projects([description])
+
+        self.assertEqual(result['Projekts 1'][3], {'inventory': INVENTORY_EXISTS_MSG})
+        self.assertIn('number', result['Projekts 1'][4])
+        self.assertFalse(Project.objects.exists())
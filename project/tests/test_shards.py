@@ -0,0 +1,277 @@
+"""Module contains tests for project.shards"""
+
+import io
+import json
+import tempfile
+import threading
+from unittest import mock
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from aggregates.models import FondSummary
+from dedup.models import ContentObject, ContentReference
+from dedup.report import savings_report
+from fonds.constants import FOND_EXISTS_MSG
+from fonds.models import Fond
+from helpers.instrumentation import get_metrics, instrumented, reset_metrics
+from helpers.routers import current_database, remove_database
+from institutions.constants import INSTITUTION_EXISTS_MSG
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.hierarchy import import_projects
+from project.models import Project, ProjectShard
+from project import shards
+from project.shards import (
+    attach_shard,
+    create_shard,
+    detach_shard,
+    find_fond,
+    project_database,
+    shard_alias,
+    use_project,
+)
+from project.tests.test_validation import INVENTORY_LIST
+from search.index import search
+
+
+class ShardTestMixin:
+    """Project with institution, fond and three inventory lists in default database"""
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        settings = override_settings(OPEX_SHARDING=True, OPEX_SHARD_ROOT=self.root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.project = Project.add_project('Dalīts')
+        institution = Institution.add_institution(1, 'Iestāde', project=self.project)
+        self.fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                  False, institution)
+        Inventory.objects.bulk_create([Inventory(fond=self.fond, number=number, **INVENTORY_LIST)
+                                       for number in range(1, 4)])
+        self.other = Project.add_project('Kopējs')
+
+    def tearDown(self):
+        remove_database(shard_alias(self.project.pk))
+        self.root.cleanup()
+
+
+class ProjectShardTest(ShardTestMixin, TestCase):
+    """Class for testing project databases"""
+
+    def test_create(self):
+        """Test that project tree is moved into project database"""
+        path = create_shard(self.project)
+
+        self.assertTrue(path.is_file())
+        alias = shard_alias(self.project.pk)
+        self.assertEqual(project_database(self.project.pk), alias)
+        self.assertEqual(project_database(self.other.pk), DEFAULT_DB_ALIAS)
+        self.assertFalse(Inventory.objects.using(DEFAULT_DB_ALIAS).exists())
+        self.assertFalse(Fond.objects.using(DEFAULT_DB_ALIAS).exists())
+        self.assertEqual(Inventory.objects.using(alias).count(), 3)
+        # Project stays in catalog
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+        with self.assertRaises(ValueError):
+            create_shard(self.project)
+
+    def test_routing(self):
+        """Test that queries and writes of project go to its database"""
+        create_shard(self.project)
+
+        self.assertFalse(Inventory.objects.exists())
+        with use_project(self.project.pk) as alias:
+            self.assertEqual(current_database(), alias)
+            fond = Fond.objects.get(pk=self.fond.pk)
+            self.assertEqual(fond.inventory_set.count(), 3)
+            Inventory.objects.bulk_create([Inventory(fond=fond, number=4, **INVENTORY_LIST)])
+            self.assertEqual(Inventory.objects.count(), 4)
+            self.assertEqual(len(search('F1', project=self.project.pk)[0]), 1)
+        self.assertEqual(current_database(), DEFAULT_DB_ALIAS)
+        self.assertEqual(search('F1')[0], [])
+        self.assertEqual(find_fond('F1')._state.db, alias)
+
+    def test_search_view(self):
+        """Test that search without project is refused when projects have databases"""
+        self.client.force_login(User.objects.create_user('archivist'))
+        self.assertEqual(len(self.client.get('/search/', {'q': 'F1'}).json()['results']), 1)
+        create_shard(self.project)
+
+        response = self.client.get('/search/', {'q': 'F1'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/search/', {'q': 'F1', 'project': self.project.pk})
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_detach_attach(self):
+        """Test that detached database is not used until it is attached again"""
+        path = create_shard(self.project)
+        self.assertEqual(detach_shard(self.project), path)
+
+        alias = shard_alias(self.project.pk)
+        self.assertNotIn(alias, connections.settings)
+        self.assertFalse(ProjectShard.objects.get(pk=self.project.pk).attached)
+        with self.assertRaises(ValueError):
+            project_database(self.project.pk)
+        self.assertIsNone(find_fond('F1'))
+
+        archived = Path(self.root.name) / 'archive.sqlite3'
+        path.rename(archived)
+        with self.assertRaises(ValueError):
+            attach_shard(self.other, archived)
+        attach_shard(self.project, archived)
+
+        with use_project(self.project.pk):
+            self.assertEqual(Inventory.objects.count(), 3)
+
+    def test_content_in_catalog(self):
+        """Test that content objects are shared by project databases"""
+        create_shard(self.project)
+        with use_project(self.project.pk) as alias:
+            content, _ = ContentObject.add_object('a' * 64, 'b' * 32, 10)
+            for inventory in Inventory.objects.all():
+                ContentReference.add_reference(inventory, 'scan.tif', content)
+
+        self.assertEqual(content._state.db, DEFAULT_DB_ALIAS)
+        self.assertEqual(ContentReference.objects.using(alias).count(), 3)
+        report = savings_report()
+        self.assertEqual(report['projects'][0]['project'], 'Dalīts')
+        self.assertEqual(report['total'], {'files': 3, 'objects': 1, 'referenced_bytes': 30,
+                                           'stored_bytes': 10, 'saved_bytes': 20})
+
+    def test_unique_across_databases(self):
+        """Test that institution and fond codes are unique in all databases"""
+        create_shard(self.project)
+
+        self.assertEqual(Institution.add_institution(1, 'Cita', project=self.other),
+                         INSTITUTION_EXISTS_MSG)
+        self.assertEqual(Institution.add_institution(2, 'Iestāde', project=self.other),
+                         INSTITUTION_EXISTS_MSG)
+        institution = Institution.add_institution(2, 'Cita', project=self.other)
+        self.assertEqual(Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 401, 'Cits', False,
+                                       institution), FOND_EXISTS_MSG)
+
+        # Rows created without checks make fond code ambiguous
+        Fond.objects.create(fond_code='F1', arch_abbreviation='LNA', arch_title='Valsts arhivs',
+                            fond_number=401, fond_title='Cits', institution=institution)
+        with self.assertRaises(ValueError):
+            find_fond('F1')
+
+    def test_import_projects(self):
+        """Test that imported institutions and fonds are unique in project databases"""
+        create_shard(self.project)
+        fond = {'fond_code': 'F2', 'arch_abbreviation': 'LNA', 'arch_title': 'Valsts arhivs',
+                'fond_number': 401, 'fond_title': 'Cits', 'subfond': False}
+
+        def described(reg_nr: int, name: str, fond_code: str) -> dict:
+            return {'name': f'Projekts {reg_nr}', 'institution': {'reg_nr': reg_nr, 'name': name},
+                    'fond': {**fond, 'fond_code': fond_code}, 'inventories': []}
+
+        self.assertEqual(import_projects([described(1, 'Cita', 'F2')]), INSTITUTION_EXISTS_MSG)
+        self.assertEqual(import_projects([described(2, 'Iestāde', 'F2')]),
+                         INSTITUTION_EXISTS_MSG)
+        self.assertEqual(import_projects([described(2, 'Cita', 'F1')]), FOND_EXISTS_MSG)
+        self.assertFalse(Institution.objects.filter(reg_nr=2).exists())
+        self.assertEqual(len(import_projects([described(2, 'Cita', 'F2')])), 1)
+
+    def test_attach_conflict(self):
+        """Test that database with institution of other project is not attached"""
+        path = create_shard(self.project)
+        detach_shard(self.project)
+        Institution.add_institution(1, 'Iestāde', project=self.other)
+
+        with self.assertRaises(ValueError):
+            attach_shard(self.project, path)
+        self.assertFalse(ProjectShard.objects.get(pk=self.project.pk).attached)
+    def test_instrumentation(self):
+        """Test that queries of project database are counted"""
+        create_shard(self.project)
+        count = instrumented('test.shard')(Inventory.objects.count)
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+        with override_settings(OPEX_INSTRUMENTATION=True), use_project(self.project.pk):
+            self.assertEqual(count(), 3)
+        self.assertEqual(get_metrics()['test.shard']['histograms']['queries']['total'], 1)
+
+
+class ShardWriteQueueTest(ShardTestMixin, TransactionTestCase):
+    """Class for testing writes through write queue of project database.
+
+    Writer thread writes catalog as well, so test doesn't keep
+    default database in transaction.
+    """
+
+    def test_write_after_attach(self):
+        """Test that writes go to attached file, not to file detached before"""
+        path = create_shard(self.project)
+        with use_project(self.project.pk):
+            # Starts write queue of project database
+            Inventory.bulk_import_from_vvais([{**INVENTORY_LIST, 'number': 4}], self.fond)
+        detach_shard(self.project)
+        archived = path.rename(Path(self.root.name) / 'archive.sqlite3')
+        attach_shard(self.project, archived)
+
+        with use_project(self.project.pk):
+            created, errors = Inventory.bulk_import_from_vvais(
+                [{**INVENTORY_LIST, 'number': 5}], self.fond)
+            self.assertEqual((created, errors), (1, {}))
+            self.assertEqual(sorted(Inventory.objects.values_list('number', flat=True)),
+                             [1, 2, 3, 4, 5])
+
+    def test_commands(self):
+        """Test that commands find fond, summaries, index and institutions in project database"""
+        create_shard(self.project)
+        alias = shard_alias(self.project.pk)
+        FondSummary.objects.using(alias).all().delete()
+
+        report = Path(self.root.name) / 'report.csv'
+        report.write_text(
+            'Uzskaites saraksta numurs;Postfikss;Dokumentu veids;Datu nesējs;'
+            'Pēdējās glabāšanas vienības numurs;Sākuma datums;Beigu datums;'
+            'Glabāšanas termiņš;Glabāšanas vienību skaits kopā\n'
+            '5;a;foto;elektronisks;55;1990-01-01;1995-12-31;Pastāvīgi glabājamās lietas;60\n',
+            encoding='utf-8')
+        out = io.StringIO()
+        call_command('sync_vvais', 'F1', str(report), '--json', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['inserted'], 1)
+        self.assertEqual(Inventory.objects.using(alias).count(), 4)
+
+        call_command('rebuild_aggregates', stdout=io.StringIO())
+        self.assertEqual(FondSummary.objects.using(alias).get().inventories, 4)
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('6 rows', out.getvalue())
+
+        result = Institution.update_from_mapping({1: {'signer': 'Bērziņš'}})
+        self.assertEqual(list(result['changed']), [1])
+        self.assertEqual(Institution.objects.using(alias).get().signer, 'Bērziņš')
+
+    def test_create_blocks_writes(self):
+        """Test that common database can't be written while project is copied"""
+        results = []
+
+        def write() -> None:
+            try:
+                Inventory.objects.create(fond=self.fond, number=9, **INVENTORY_LIST)
+                results.append('written')
+            except OperationalError:
+                results.append('locked')
+            finally:
+                connections.close_all()
+
+        def copy_tree(*args) -> None:
+            thread = threading.Thread(target=write)
+            thread.start()
+            thread.join()
+            copy(*args)
+
+        copy = shards._copy_tree
+        with mock.patch('project.shards._copy_tree', copy_tree):
+            create_shard(self.project)
+
+        self.assertEqual(results, ['locked'])
+        self.assertEqual(Inventory.objects.using(shard_alias(self.project.pk)).count(), 3)
@@ -0,0 +1,112 @@
+"""Module contains tests for project.validation"""
+
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.constants import INVENTORY_WRONG_VALUE
+from inventories.models import Inventory
+from project.constants import DATES_ORDER_MSG, LAST_GV_EXCEEDS_TOTAL_MSG
+from project.models import Project
+from project.validation import _save_results, validate_project
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': True,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas',
+    'start_date': datetime.date(1990, 1, 1),
+    'end_date': datetime.date(1995, 12, 31),
+}
+
+
+class ValidateProjectTest(TestCase):
+    """Class for testing project validation"""
+
+    def setUp(self):
+        self.project = Project.add_project('Validācija')
+        institution = Institution.add_institution(1, 'Iestāde', project=self.project)
+        self.fond = Fond.add_fond('F1', 'LNA', 'Valsts arhivs', 400, 'Valsts meži',
+                                  False, institution)
+        # Created without validation, as if data was changed in database
+        Inventory.objects.bulk_create(
+            [Inventory(fond=self.fond, number=number, **INVENTORY_LIST) for number in range(1, 8)]
+            + [Inventory(fond=self.fond, number=8, **{**INVENTORY_LIST, 'last_gv': 61}),
+               Inventory(fond=self.fond, number=9, **{**INVENTORY_LIST, 'type': 'cits'}),
+               Inventory(fond=self.fond, number=10,
+                         **{**INVENTORY_LIST, 'start_date': datetime.date(1996, 1, 1)})])
+
+    def errors(self) -> dict:
+        return dict(Inventory.objects
+                    .filter(validation_errors__isnull=False)
+                    .values_list('number', 'validation_errors'))
+
+    def test_validate(self):
+        """Test that field and cross-record rules are checked"""
+        result = validate_project(self.project, workers=1)
+
+        self.assertEqual(result, {'checked': 10, 'invalid': 3, 'validated': False})
+        self.assertEqual(self.errors(), {
+            8: {'last_gv': LAST_GV_EXCEEDS_TOTAL_MSG},
+            9: {'type': INVENTORY_WRONG_VALUE},
+            10: {'end_date': DATES_ORDER_MSG},
+        })
+        self.assertFalse(Project.objects.get(pk=self.project.pk).is_validated())
+
+    def test_revalidate_changed(self):
+        """Test that only changed inventory lists are checked again"""
+        validate_project(self.project, workers=1)
+
+        inventory = Inventory.objects.get(number=8)
+        inventory.last_gv = 60
+        inventory.save()
+        Inventory.objects.filter(number__in=[9, 10]).update(type='video',
+                                                            start_date=datetime.date(1990, 1, 1))
+
+        result = self.project.validate(workers=1)
+
+        self.assertEqual(result, {'checked': 3, 'invalid': 0, 'validated': True})
+        self.assertTrue(Project.objects.get(pk=self.project.pk).validated)
+        self.assertEqual(validate_project(self.project, workers=1)['checked'], 0)
+        self.assertEqual(validate_project(self.project, workers=1, full=True)['checked'], 10)
+
+    def test_full(self):
+        """Test that full validation keeps errors of invalid inventory lists"""
+        validate_project(self.project, workers=1)
+        result = validate_project(self.project, workers=1, full=True)
+
+        self.assertEqual(result, {'checked': 10, 'invalid': 3, 'validated': False})
+        self.assertEqual(list(self.errors()), [8, 9, 10])
+
+    def test_change_after_validation(self):
+        """Test that change of inventory list resets 'validated'"""
+        Inventory.objects.filter(number__in=[8, 9, 10]).delete()
+        self.assertTrue(validate_project(self.project, workers=1)['validated'])
+
+        Inventory.objects.filter(number=1).update(total_items=70)
+
+        self.assertFalse(Project.objects.get(pk=self.project.pk).validated)
+        self.assertEqual(validate_project(self.project, workers=1)['checked'], 1)
+
+    def test_changed_during_validation(self):
+        """Test that result is not saved for inventory changed meanwhile"""
+        inventory = Inventory.objects.get(number=1)
+        started = timezone.now() - datetime.timedelta(seconds=1)
+
+        _save_results(self.fond.pk, inventory.pk, inventory.pk, False, {}, started)
+
+        inventory.refresh_from_db()
+        self.assertIsNone(inventory.validated_at)
+
+    def test_command(self):
+        """Test that command reports validation result"""
+        out = io.StringIO()
+        call_command('validate_project', 'Validācija', '--workers', '1', stdout=out)
+        self.assertIn('10 inventory lists checked, 3 invalid', out.getvalue())
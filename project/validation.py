@@ -0,0 +1,263 @@
+"""Modulī atrodas projekta validācija.
+
+Validācija pārbauda visus projekta uzskaites sarakstus: lauku vērtības
+un klasifikatorus (kā 'validate_invenotry'), 'last_gv' <= 'total_items',
+'start_date' <= 'end_date' un numuru unikalitāti fondā.
+
+Rezultāts tiek saglabāts katram uzskaites sarakstam ('validated_at',
+'validation_errors'). Saraksts tiek pārbaudīts vēlreiz tikai tad, ja
+tas mainīts pēc iepriekšējās validācijas ('changed_at', skatīt
+'project.signals'). Saraksti tiek pārbaudīti daļās vairākos procesos,
+rezultātus raksta tikai galvenais process.
+"""
+
+import json
+import logging
+import os
+from collections import defaultdict
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+from helpers.db import run_write
+from helpers.processes import init_worker
+from inventories.helpers.validators import validate_inventories
+from inventories.models import Inventory
+from project.constants import (
+    DATES_ORDER_MSG,
+    DUPLICATE_NUMBER_MSG,
+    LAST_GV_EXCEEDS_TOTAL_MSG,
+    VALIDATION_CHUNK_SIZE,
+)
+from project.models import Project
+from project.shards import use_project
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('pk', 'number', 'postfix', 'type', 'electronic', 'last_gv', 'total_items',
+          'storage_term', 'start_date', 'end_date', 'items_per_period')
+
+# Laukos ir validācijas stāvoklis, to maiņa nav saraksta izmaiņa
+VALIDATION_FIELDS = frozenset(('changed_at', 'validated_at', 'validation_errors'))
+
+# Maximum number of primary keys in one UPDATE
+UPDATE_CHUNK_SIZE = 900
+
+
+def pending_q() -> Q:
+    """Nosacījums uzskaites sarakstiem, kas jāpārbauda"""
+    return Q(validated_at__isnull=True) | Q(changed_at__gt=F('validated_at'))
+
+
+def chunks(values: Iterable, size: int = UPDATE_CHUNK_SIZE) -> Iterable[list]:
+    """Sadala vērtības sarakstos, kas der vienam 'pk__in' vaicājumam"""
+    values = iter(values)
+    while chunk := list(islice(values, size)):
+        yield chunk
+
+
+def check_rows(rows: List[dict]) -> Dict[int, dict]:
+    """Pārbauda lauku un viena ieraksta noteikumus.
+
+    Args:
+        rows: Saraksts ar vārdnīcām, kurās ir 'FIELDS' lauki.
+
+    Returns:
+        Dictionary with inventory primary key as key
+        and error dictionary as value, only for invalid inventories.
+    """
+    errors = {}
+    for row, (validated, result) in zip(rows, validate_inventories(rows)):
+        row_errors = {} if validated else result
+
+        last_gv, total_items = row['last_gv'], row['total_items']
+        if ('last_gv' not in row_errors and 'total_items' not in row_errors
+                and last_gv > total_items):
+            row_errors['last_gv'] = LAST_GV_EXCEEDS_TOTAL_MSG
+
+        start_date, end_date = row['start_date'], row['end_date']
+        if (start_date is not None and end_date is not None
+                and 'start_date' not in row_errors and 'end_date' not in row_errors
+                and start_date > end_date):
+            row_errors['end_date'] = DATES_ORDER_MSG
+
+        if row_errors:
+            errors[row['pk']] = row_errors
+    return errors
+
+
+def duplicate_numbers(fond_pk: int) -> Set[Tuple[int, str]]:
+    """Atgriež fondā atkārtotos (numurs, postfikss) pārus.
+
+    Vaicājums izmanto 'unique_inventory_number' indeksu, tāpēc
+    viss fonds tiek pārbaudīts ar vienu vaicājumu.
+    """
+    return set(Inventory.objects
+               .filter(fond_id=fond_pk)
+               .values_list('number', 'postfix')
+               .annotate(count=Count('pk'))
+               .filter(count__gt=1)
+               .order_by()
+               .values_list('number', 'postfix'))
+
+
+def _inventories(fond_pk: int, first: int, last: int, full: bool):
+    inventories = Inventory._base_manager.filter(fond_id=fond_pk, pk__range=(first, last))
+    if not full:
+        inventories = inventories.filter(pending_q())
+    return inventories
+
+
+def check_range(fond_pk: int, first: int, last: int, full: bool,
+                duplicates: Set[Tuple[int, str]]) -> Tuple[int, Dict[int, dict]]:
+    """Pārbauda fonda uzskaites sarakstus primārās atslēgas diapazonā.
+
+    Tiek izpildīts darba procesā, datubāzē neko neraksta.
+
+    Returns:
+        Tuple with number of checked inventories
+        and dictionary with errors by primary key.
+    """
+    with use_project(fond_pk):
+        return _check_range(fond_pk, first, last, full, duplicates)
+
+
+def _check_range(fond_pk: int, first: int, last: int, full: bool,
+                 duplicates: Set[Tuple[int, str]]) -> Tuple[int, Dict[int, dict]]:
+    # Rindas tiek lasītas bez modeļu un vārdnīcu veidošanas ORM pusē
+    sql, params = _inventories(fond_pk, first, last, full).values_list(*FIELDS).query.sql_with_params()
+    with connections[router.db_for_read(Inventory)].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = [dict(zip(FIELDS, row)) for row in cursor.fetchall()]
+
+    errors = check_rows(rows)
+    for row in rows:
+        if (row['number'], row['postfix']) in duplicates:
+            errors.setdefault(row['pk'], {})['number'] = DUPLICATE_NUMBER_MSG
+    return len(rows), errors
+
+
+def _ranges(inventories, chunk_size: int) -> List[Tuple[int, int]]:
+    """Sadala uzskaites sarakstus primārās atslēgas diapazonos"""
+    bounds = inventories.aggregate(first=Min('pk'), last=Max('pk'), count=Count('pk'))
+    if not bounds['count']:
+        return []
+
+    parts = max(-(-bounds['count'] // chunk_size), 1)
+    step = max(-(-(bounds['last'] - bounds['first'] + 1) // parts), 1)
+    return [(start, min(start + step - 1, bounds['last']))
+            for start in range(bounds['first'], bounds['last'] + 1, step)]
+
+
+def _save_results(fond_pk: int, first: int, last: int, full: bool,
+                  errors: Dict[int, dict], started) -> None:
+    """Saglabā vienas daļas rezultātus vienā transakcijā.
+
+    Rezultāts netiek saglabāts sarakstiem, kas mainīti pēc validācijas
+    sākuma, tie paliek nepārbaudīti. Validācijas lauki nav saraksta
+    dati, tāpēc tiek rakstīti bez 'TrackedQuerySet' signāliem.
+    """
+    inventories = _inventories(fond_pk, first, last, full).filter(changed_at__lte=started)
+
+    # Vienādas kļūdas tiek saglabātas ar vienu vaicājumu
+    by_errors = defaultdict(list)
+    for pk, row_errors in errors.items():
+        by_errors[json.dumps(row_errors, sort_keys=True)].append(pk)
+
+    with transaction.atomic(using=router.db_for_write(Inventory)):
+        # Vispirms visi diapazona saraksti tiek atzīmēti kā derīgi
+        inventories.update(validated_at=started, validation_errors=None)
+        for row_errors, error_pks in by_errors.items():
+            for chunk in chunks(error_pks):
+                (Inventory._base_manager
+                 .filter(pk__in=chunk, changed_at__lte=started)
+                 .update(validation_errors=json.loads(row_errors)))
+
+
+def _set_validated(project_pk: int) -> bool:
+    """Atzīmē projektu kā validētu, ja visi saraksti ir pārbaudīti un derīgi"""
+    # Saraksti var būt projekta datubāzē, skatīt 'project.shards'
+    with transaction.atomic(using=router.db_for_write(Inventory)):
+        invalid = (Inventory.objects
+                   .filter(fond_id=project_pk)
+                   .filter(pending_q() | Q(validation_errors__isnull=False))
+                   .exists())
+        Project._base_manager.filter(pk=project_pk).update(validated=not invalid)
+    return not invalid
+
+
+def validate_project(project: Project,
+                     workers: Optional[int] = None,
+                     full: bool = False,
+                     progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Validē visus projekta uzskaites sarakstus.
+
+    Args:
+        project: Project instance.
+        workers: Number of worker processes, by default number of CPUs.
+          If 1, inventories are checked in current process.
+        full: Check all inventories, not only changed after
+          previous validation.
+        progress: Function called with number of checked
+          and total number of inventories after every part.
+
+    Returns:
+        Dictionary with number of checked and invalid
+        inventories and new 'validated' value of project.
+    """
+    # Projekta atsevišķā datubāze, skatīt 'project.shards'
+    with use_project(project.pk):
+        return _validate_project(project, workers, full, progress)
+
+
+def _validate_project(project: Project,
+                      workers: Optional[int],
+                      full: bool,
+                      progress: Optional[Callable[[int, int], None]]) -> dict:
+    workers = workers or os.cpu_count() or 1
+    # Saraksti, kas mainīti pēc šī brīža, paliek nepārbaudīti
+    started = timezone.now()
+
+    inventories = Inventory.objects.filter(fond_id=project.pk)
+    if not full:
+        inventories = inventories.filter(pending_q())
+    total = inventories.count()
+    ranges = _ranges(inventories, VALIDATION_CHUNK_SIZE)
+    duplicates = duplicate_numbers(project.pk) if ranges else set()
+
+    checked = 0
+
+    def save(first: int, last: int, result: Tuple[int, Dict[int, dict]]) -> None:
+        nonlocal checked
+        count, errors = result
+        run_write(_save_results, project.pk, first, last, full, errors, started)
+        checked += count
+        if progress is not None:
+            progress(checked, total)
+
+    if workers == 1 or len(ranges) <= 1:
+        for first, last in ranges:
+            save(first, last, check_range(project.pk, first, last, full, duplicates))
+    else:
+        # Imported here, module is loaded at startup by 'project.signals'
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Bērnu procesi nedrīkst lietot vecāka datubāzes savienojumus
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            futures = [pool.submit(check_range, project.pk, first, last, full, duplicates)
+                       for first, last in ranges]
+            for (first, last), future in zip(ranges, futures):
+                save(first, last, future.result())
+
+    validated = run_write(_set_validated, project.pk)
+    project.validated = validated
+    return {
+        'checked': checked,
+        'invalid': Inventory.objects.filter(fond_id=project.pk,
+                                            validation_errors__isnull=False).count(),
+        'validated': validated,
+    }
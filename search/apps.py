@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        # Apps have no migrations, so FTS5 table is created after 'migrate'
+        from search.index import create_index
+        post_migrate.connect(create_index, sender=self, dispatch_uid='create_search_index')
+
+        # Register receivers which keep search index up to date
+        from search import signals  # noqa: F401
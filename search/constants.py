@@ -0,0 +1,34 @@
+"""Constants used in search app"""
+
+# FTS5 table with text of institutions, fonds and inventory lists
+SEARCH_TABLE = 'search_index'
+
+# 'remove_diacritics 2' folds Latvian letters (ā, č, ģ, ķ, ļ, ņ, š, ž),
+# so 'kuldiga' finds 'Kuldīga', prefix indexes make 'term*' queries fast
+SEARCH_TOKENIZER = 'unicode61 remove_diacritics 2'
+SEARCH_PREFIXES = '2 3'
+
+# bm25 weights of 'title' and 'body' columns
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+# Row ids of each kind take range of this size, see 'search.index'
+SEARCH_KIND_SIZE = 2 ** 40
+
+# Queries with more matches are not ranked, bm25 of every match would
+# take longer than search should, and results are returned in index order
+SEARCH_RANK_LIMIT = 5000
+
+# Number of rows indexed with one statement
+SEARCH_INDEX_CHUNK = 500
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Fields which are indexed, changes of other fields don't touch index
+INSTITUTION_SEARCH_FIELDS = frozenset({'name', 'reg_nr'})
+FOND_SEARCH_FIELDS = frozenset({'fond_title', 'fond_code', 'arch_abbreviation', 'arch_title'})
+INVENTORY_SEARCH_FIELDS = frozenset({'number', 'postfix', 'type', 'storage_term'})
+
+SEARCH_QUERY_ERROR = 'Search query should contain at least one word'
+SEARCH_CURSOR_ERROR = 'Invalid cursor'
+SEARCH_PROJECT_REQUIRED = 'Projects have their own databases, give project to search'
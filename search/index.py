@@ -0,0 +1,304 @@
+"""Module contains full-text search index of institutions, fonds and inventory lists.
+
+Index is SQLite FTS5 table 'search_index' with 'title' and 'body'
+columns, project id is kept in it as unindexed column. Row id of
+indexed object is made of its kind code and primary key, so index
+needs no other columns, rows are replaced by row id and every kind
+takes its own range of row ids:
+
+    rowid = kind code * SEARCH_KIND_SIZE + pk
+
+Index is kept up to date by receivers in 'search.signals' and can
+be built again with 'rebuild_search_index' command. Table is created
+after 'migrate' and, in database made without it, on first use.
+
+Results of query with up to SEARCH_RANK_LIMIT matches are ordered by
+bm25 rank and paged with (rank, rowid) cursor. Query with more matches
+(a word which is in most inventory lists) is not ranked, as ranking
+would read every match, its results are returned in row id order,
+which is institutions, fonds and then inventory lists, paged by rowid.
+In both cases next page doesn't read rows of previous pages again.
+"""
+
+import re
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, models, router
+
+from fonds.models import Fond
+from helpers.routers import current_database
+from institutions.models import Institution
+from inventories.models import Inventory
+from search.constants import (
+    SEARCH_CURSOR_ERROR,
+    SEARCH_INDEX_CHUNK,
+    SEARCH_KIND_SIZE,
+    SEARCH_PAGE_SIZE,
+    SEARCH_PREFIXES,
+    SEARCH_QUERY_ERROR,
+    SEARCH_RANK_LIMIT,
+    SEARCH_TABLE,
+    SEARCH_TOKENIZER,
+    SEARCH_WEIGHTS,
+)
+
+# Kind code and select of (rowid, title, body, project_id) rows by kind
+KINDS = {
+    'institution': (0, Institution,
+                    "SELECT {start} + project_id, name, CAST(reg_nr AS TEXT), project_id "
+                    "FROM {table}"),
+    'fond': (1, Fond,
+             "SELECT {start} + institution_id, fond_title, "
+             "fond_code || ' ' || arch_abbreviation || ' ' || arch_title, institution_id "
+             "FROM {table}"),
+    'inventory': (2, Inventory,
+                  "SELECT {start} + id, number || postfix, "
+                  "type || ' ' || storage_term, fond_id "
+                  "FROM {table}"),
+}
+KIND_NAMES = {code: kind for kind, (code, _, _) in KINDS.items()}
+MODEL_KINDS = {model: kind for kind, (_, model, _) in KINDS.items()}
+
+# Result columns, rank is computed only for ranked results
+RANKED = f'SELECT rowid, rank, title, body, project_id FROM {SEARCH_TABLE}'
+UNRANKED = f'SELECT rowid, NULL, title, body, project_id FROM {SEARCH_TABLE}'
+
+T = TypeVar('T')
+
+
+def _sqlite(using: str) -> bool:
+    return connections[using].vendor == 'sqlite'
+
+
+def create_index(sender=None, using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """Create search index, receiver of 'post_migrate' signal"""
+    if not _sqlite(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                       f"title, body, project_id UNINDEXED, "
+                       f"tokenize='{SEARCH_TOKENIZER}', prefix='{SEARCH_PREFIXES}')")
+        # 'rank' column uses weighted bm25 in all queries
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', %s)",
+                       [f'bm25({weights})'])
+
+
+def _with_index(using: str, function: Callable[..., T]) -> T:
+    """Call function with cursor, index is created if it doesn't exist.
+
+    Function is called again after index is created, so it should
+    not consume its arguments.
+    """
+    try:
+        with connections[using].cursor() as cursor:
+            return function(cursor)
+    except OperationalError as error:
+        if f'no such table: {SEARCH_TABLE}' not in str(error):
+            raise
+    create_index(using=using)
+    with connections[using].cursor() as cursor:
+        return function(cursor)
+
+
+def _start(kind: str) -> int:
+    """Return first row id of kind"""
+    return KINDS[kind][0] * SEARCH_KIND_SIZE
+
+
+def _select(model: Type[models.Model]) -> str:
+    kind = MODEL_KINDS[model]
+    return KINDS[kind][2].format(start=_start(kind), table=model._meta.db_table)
+
+
+def index_objects(model: Type[models.Model],
+                  pks: Optional[Iterable[int]] = None,
+                  using: Optional[str] = None) -> None:
+    """Add objects to search index or replace their rows.
+
+    Rows are selected from model table by SQL, so objects are not
+    loaded into Python.
+
+    Args:
+        model: Institution, Fond or Inventory.
+        pks: Primary keys of objects, all objects if not given.
+        using: Database of objects, by default database of model
+          in current context.
+    """
+    using = using or router.db_for_write(model)
+    if not _sqlite(using):
+        return
+    insert = f'INSERT OR REPLACE INTO {SEARCH_TABLE}(rowid, title, body, project_id) '
+    pks = None if pks is None else list(pks)
+
+    def write(cursor) -> None:
+        if pks is None:
+            cursor.execute(insert + _select(model))
+            return
+
+        chunks = iter(pks)
+        pk_column = model._meta.pk.column
+        while chunk := list(islice(chunks, SEARCH_INDEX_CHUNK)):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'{insert}{_select(model)} WHERE {pk_column} IN ({placeholders})',
+                           chunk)
+
+    _with_index(using, write)
+
+
+def remove_objects(model: Type[models.Model],
+                   pks: Iterable[int],
+                   using: Optional[str] = None) -> None:
+    """Remove objects from search index"""
+    using = using or router.db_for_write(model)
+    if not _sqlite(using):
+        return
+    start = _start(MODEL_KINDS[model])
+    rowids = [start + pk for pk in pks]
+
+    def delete(cursor) -> None:
+        chunks = iter(rowids)
+        while chunk := list(islice(chunks, SEARCH_INDEX_CHUNK)):
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} '
+                           f'WHERE rowid IN ({", ".join(["%s"] * len(chunk))})', chunk)
+
+    _with_index(using, delete)
+
+
+def rebuild_index(using: Optional[str] = None) -> int:
+    """Build search index again from all objects.
+
+    Returns:
+        Number of indexed rows.
+    """
+    using = using or current_database()
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+    create_index(using=using)
+    for _, model, _ in KINDS.values():
+        index_objects(model, using=using)
+
+    with connections[using].cursor() as cursor:
+        # Merges index segments written by inserts into one
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def match_query(text: str) -> str:
+    """Make FTS5 query from user input.
+
+    Every word is quoted, so FTS5 syntax in input is searched as
+    text, and is a prefix, so 'Kuldīga' finds 'Kuldīgas' and results
+    appear while word is typed.
+
+    Raises:
+        ValueError: Input has no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        raise ValueError(SEARCH_QUERY_ERROR)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def encode_cursor(rowid: int, rank: Optional[float] = None) -> str:
+    return str(rowid) if rank is None else f'{rank!r}:{rowid}'
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[float]]:
+    """Return (rowid, rank) of cursor, rank is None for unranked results.
+
+    Raises:
+        ValueError: Cursor is not valid.
+    """
+    try:
+        if ':' not in cursor:
+            return int(cursor), None
+        rank, rowid = cursor.rsplit(':', 1)
+        return int(rowid), float(rank)
+    except ValueError:
+        raise ValueError(SEARCH_CURSOR_ERROR)
+
+
+def search(text: str,
+           project: Optional[int] = None,
+           kind: Optional[str] = None,
+           after: Optional[str] = None,
+           limit: int = SEARCH_PAGE_SIZE,
+           using: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """Search institutions, fonds and inventory lists.
+
+    Args:
+        text: Words to search, diacritics don't matter.
+        project: Search only in project with this id.
+        kind: Search only 'institution', 'fond' or 'inventory' rows.
+        after: Cursor of last result of previous page.
+        limit: Number of results.
+
+    Returns:
+        Tuple where first value is list of results and second is
+        cursor of next page or None, if there are no more results.
+        Rank of result is None, if query has too many matches to rank.
+
+    Raises:
+        ValueError: Query, kind or cursor is not valid.
+    """
+    conditions = [f'{SEARCH_TABLE} MATCH %s']
+    params = [match_query(text)]
+    if project is not None:
+        conditions.append('project_id = %s')
+        params.append(project)
+    if kind is not None:
+        if kind not in KINDS:
+            raise ValueError(f'Kind should be one of: {", ".join(KINDS)}')
+        # Row id range is used by FTS5, so rows of other kinds are not read
+        conditions.append('rowid >= %s AND rowid < %s')
+        params += [_start(kind), _start(kind) + SEARCH_KIND_SIZE]
+
+    where = ' AND '.join(conditions)
+
+    def read(cursor) -> Tuple[List[tuple], bool]:
+        if after is not None:
+            last_rowid, last_rank = decode_cursor(after)
+            ranked = last_rank is not None
+            if ranked:
+                cursor.execute(f'{RANKED} WHERE {where} AND (rank, rowid) > (%s, %s) '
+                               f'ORDER BY rank, rowid LIMIT %s',
+                               params + [last_rank, last_rowid, limit + 1])
+            else:
+                cursor.execute(f'{UNRANKED} WHERE {where} AND rowid > %s ORDER BY rowid LIMIT %s',
+                               params + [last_rowid, limit + 1])
+            rows = cursor.fetchall()
+        else:
+            # Matches are read in index order, which stops at limit
+            cursor.execute(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {where} '
+                           f'ORDER BY rowid LIMIT %s', params + [SEARCH_RANK_LIMIT + 1])
+            rowids = [rowid for rowid, in cursor.fetchall()]
+            ranked = len(rowids) <= SEARCH_RANK_LIMIT
+            if ranked:
+                cursor.execute(f'{RANKED} WHERE {where} ORDER BY rank, rowid LIMIT %s',
+                               params + [limit + 1])
+            else:
+                # First page is already found, so its rows are read by row id
+                rowids = rowids[:limit + 1]
+                cursor.execute(f'{UNRANKED} WHERE rowid IN ({", ".join(["%s"] * len(rowids))}) '
+                               f'ORDER BY rowid', rowids)
+            rows = cursor.fetchall()
+        return rows, ranked
+
+    rows, ranked = _with_index(using or current_database(), read)
+
+    results = [{
+        'kind': KIND_NAMES[rowid // SEARCH_KIND_SIZE],
+        'id': rowid % SEARCH_KIND_SIZE,
+        'project': project_id,
+        'title': title,
+        'text': body,
+        'rank': rank,
+    } for rowid, rank, title, body, project_id in rows[:limit]]
+
+    if len(rows) <= limit:
+        return results, None
+    last = rows[limit - 1]
+    return results, encode_cursor(last[0], last[1] if ranked else None)
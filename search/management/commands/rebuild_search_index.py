@@ -0,0 +1,19 @@
+"""Management command which builds search index again"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.shards import project_databases
+from search.index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('Builds full-text search index of institutions, fonds and inventory lists again '
+            'in common and every attached project database')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = sum(rebuild_index(using=alias) for alias in project_databases())
+        self.stdout.write(self.style.SUCCESS(
+            f'{rows} rows indexed in {time.monotonic() - started:.1f} s'))
@@ -0,0 +1,3 @@
+# Search index is FTS5 virtual table, which Django models can't describe,
+# it is created by 'search.index.create_index' after 'migrate'. Module
+# makes Django send 'post_migrate' for this app.
@@ -0,0 +1,95 @@
+"""Module contains signal receivers which keep search index up to date.
+
+Deleted objects are removed from index together: Django sends
+'pre_delete' for every collected object before it sends any
+'post_delete', so objects of one model deleted by the same delete
+call (and its cascade) are counted and removed from index with one
+statement when the last of them is deleted.
+"""
+
+import threading
+import weakref
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from fonds.models import Fond
+from helpers.signals import bulk_created, queryset_updated
+from institutions.models import Institution
+from inventories.models import Inventory
+from search.constants import (
+    FOND_SEARCH_FIELDS,
+    INSTITUTION_SEARCH_FIELDS,
+    INVENTORY_SEARCH_FIELDS,
+)
+from search.index import index_objects, remove_objects
+
+SEARCH_FIELDS = {
+    Institution: INSTITUTION_SEARCH_FIELDS,
+    Fond: FOND_SEARCH_FIELDS,
+    Inventory: INVENTORY_SEARCH_FIELDS,
+}
+
+
+@receiver(post_save, sender=Institution)
+@receiver(post_save, sender=Fond)
+@receiver(post_save, sender=Inventory)
+def index_saved(sender, instance, update_fields=None, using=None, **kwargs):
+    if update_fields is not None and not SEARCH_FIELDS[sender].intersection(update_fields):
+        return
+    index_objects(sender, [instance.pk], using=using)
+
+
+# Deleting objects by model and origin of delete, for every thread
+_deleting = threading.local()
+
+
+def _deleted_objects(origin) -> dict:
+    """Return (collected, deleted) primary keys by model of delete with origin"""
+    if not hasattr(_deleting, 'origins'):
+        _deleting.origins = weakref.WeakKeyDictionary()
+    return _deleting.origins.setdefault(origin, {})
+
+
+@receiver(pre_delete, sender=Institution)
+@receiver(pre_delete, sender=Fond)
+@receiver(pre_delete, sender=Inventory)
+def count_deleted(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        return
+    objects = _deleted_objects(origin)
+    collected, deleted = objects.setdefault(sender, (set(), set()))
+    if instance.pk in collected:
+        # Delete is run again after failure, earlier one was rolled back
+        objects.clear()
+        collected, deleted = objects.setdefault(sender, (set(), set()))
+    collected.add(instance.pk)
+
+
+@receiver(post_delete, sender=Institution)
+@receiver(post_delete, sender=Fond)
+@receiver(post_delete, sender=Inventory)
+def remove_deleted(sender, instance, using=None, origin=None, **kwargs):
+    objects = _deleted_objects(origin) if origin is not None else {}
+    if sender not in objects:
+        remove_objects(sender, [instance.pk], using=using)
+        return
+
+    collected, deleted = objects[sender]
+    deleted.add(instance.pk)
+    if deleted == collected:
+        del objects[sender]
+        remove_objects(sender, deleted, using=using)
+
+
+@receiver(bulk_created)
+def index_bulk_created(sender, instances, **kwargs):
+    if sender in SEARCH_FIELDS:
+        index_objects(sender, [instance.pk for instance in instances
+                               if instance.pk is not None])
+
+
+@receiver(queryset_updated)
+def index_updated(sender, pks, fields, **kwargs):
+    if sender in SEARCH_FIELDS and SEARCH_FIELDS[sender].intersection(fields):
+        index_objects(sender, pks)
@@ -0,0 +1,158 @@
+"""Module contains tests for search app"""
+
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from fonds.models import Fond
+from institutions.models import Institution
+from inventories.models import Inventory
+from project.models import Project
+from search.constants import SEARCH_TABLE
+from search.index import search
+
+INVENTORY_LIST = {
+    'postfix': 'a',
+    'type': 'foto',
+    'electronic': False,
+    'last_gv': 55,
+    'total_items': 60,
+    'storage_term': 'Pastāvīgi glabājamās lietas'
+}
+
+
+def found(text: str, **kwargs) -> list:
+    return [(result['kind'], result['id']) for result in search(text, **kwargs)[0]]
+
+
+class SearchTest(TestCase):
+    """Class for testing full-text search"""
+
+    def setUp(self):
+        self.project = Project.add_project('Kuldīga')
+        self.institution = Institution.add_institution(1, 'Kuldīgas novada pašvaldība',
+                                                       project=self.project)
+        self.fond = Fond.add_fond('F1', 'LNA', 'Latvijas Nacionālais arhīvs', 400,
+                                  'Kuldīgas pilsētas dome', False, self.institution)
+        Inventory.bulk_import_from_vvais(
+            ({**INVENTORY_LIST, 'number': number} for number in (1, 2, 3)), self.fond)
+        self.inventory = Inventory.objects.get(number=1)
+
+    def test_diacritics(self):
+        """Test that words are found with and without Latvian diacritics"""
+        self.assertEqual(found('kuldigas'), [('institution', self.institution.pk),
+                                             ('fond', self.fond.pk)])
+        self.assertEqual(found('Pašvaldība'), [('institution', self.institution.pk)])
+        self.assertEqual(found('nacionalais arh'), [('fond', self.fond.pk)])
+        self.assertEqual(found('"NEAR(('), [])
+
+    def test_rank(self):
+        """Test that match in title is ranked before match in body"""
+        Institution.objects.filter(pk=self.institution.pk).update(name='Arhīvs')
+        self.assertEqual(found('arhivs'), [('institution', self.institution.pk),
+                                           ('fond', self.fond.pk)])
+
+    def test_sync(self):
+        """Test that saved, updated and deleted objects are indexed"""
+        self.assertEqual(len(found('foto', kind='inventory')), 3)
+
+        Inventory.objects.filter(number__in=[2, 3]).update(type='karte')
+        self.assertEqual(found('foto'), [('inventory', self.inventory.pk)])
+
+        self.inventory.type = 'zīmējums'
+        self.inventory.save()
+        self.assertEqual(found('zimejums'), [('inventory', self.inventory.pk)])
+
+        self.fond.fond_title = 'Kuldīgas rajona padome'
+        self.fond.save(update_fields=['fond_title'])
+        self.assertEqual(found('rajona'), [('fond', self.fond.pk)])
+
+        self.inventory.delete()
+        self.assertEqual(found('zimejums'), [])
+        self.project.delete()
+        self.assertEqual(found('karte'), [])
+
+    def test_pages(self):
+        """Test that pages follow each other without repeats"""
+        Inventory.bulk_import_from_vvais(
+            ({**INVENTORY_LIST, 'number': number} for number in range(4, 26)), self.fond)
+        other = Project.add_project('Cits')
+        institution = Institution.add_institution(2, 'Cita iestāde', project=other)
+        Fond.add_fond('F2', 'LNA', 'Valsts arhivs', 401, 'Cits fonds', False, institution)
+
+        def pages() -> list:
+            results, cursor = search('pastavigi', project=self.project.pk, limit=10)
+            pages = [results]
+            while cursor is not None:
+                results, cursor = search('pastavigi', project=self.project.pk,
+                                         after=cursor, limit=10)
+                pages.append(results)
+            return pages
+
+        ranked = pages()
+        self.assertEqual([len(page) for page in ranked], [10, 10, 5])
+        ids = [result['id'] for page in ranked for result in page]
+        self.assertEqual(sorted(ids), sorted(Inventory.objects.values_list('pk', flat=True)))
+
+        # Query with too many matches is paged in index order
+        with mock.patch('search.index.SEARCH_RANK_LIMIT', 20):
+            unranked = pages()
+        self.assertEqual([len(page) for page in unranked], [10, 10, 5])
+        self.assertEqual([result['id'] for page in unranked for result in page], sorted(ids))
+        self.assertIsNone(unranked[0][0]['rank'])
+        self.assertEqual(found('arhivs', project=other.pk), [('fond', institution.pk)])
+
+    def test_delete_cascade(self):
+        """Test that objects deleted by cascade are removed with one statement per kind"""
+        with CaptureQueriesContext(connection) as queries:
+            self.project.delete()
+
+        removals = [query['sql'] for query in queries.captured_queries
+                    if query['sql'].startswith(f'DELETE FROM {SEARCH_TABLE}')]
+        self.assertEqual(len(removals), 3)
+        self.assertEqual(found('kuldigas'), [])
+        self.assertEqual(found('foto'), [])
+
+    def test_missing_index(self):
+        """Test that index is created when database doesn't have it"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {SEARCH_TABLE}')
+
+        self.assertEqual(found('kuldigas'), [])
+        self.inventory.delete()
+        Inventory.objects.filter(number=2).update(type='karte')
+        self.assertEqual(found('karte'), [('inventory', Inventory.objects.get(number=2).pk)])
+
+    def test_rebuild(self):
+        """Test that rebuilt index has all objects"""
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('5 rows indexed', out.getvalue())
+        self.assertEqual(len(found('kuldigas')), 2)
+
+    def test_view(self):
+        """Test search API"""
+        url = '/search/'
+        self.assertEqual(self.client.get(url, {'q': 'foto'}).status_code, 401)
+        self.client.force_login(User.objects.create_user('archivist'))
+
+        response = self.client.get(url, {'q': 'foto', 'kind': 'inventory', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual([result['title'] for result in page['results']], ['1a', '2a'])
+
+        response = self.client.get(url, {'q': 'foto', 'limit': 2, 'cursor': page['next']})
+        self.assertEqual(response.json(), {'results': [{
+            'kind': 'inventory', 'id': Inventory.objects.get(number=3).pk,
+            'project': self.project.pk, 'title': '3a',
+            'text': 'foto Pastāvīgi glabājamās lietas',
+            'rank': response.json()['results'][0]['rank'],
+        }], 'next': None})
+
+        for params in ({'q': '!!'}, {'q': 'foto', 'kind': 'list'}, {'q': 'foto', 'cursor': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
@@ -0,0 +1,37 @@
+"""Module contains search app views"""
+
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.http import require_GET
+
+from project.shards import attached_databases, project_database
+from search.constants import SEARCH_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, SEARCH_PROJECT_REQUIRED
+from search.index import search
+
+
+@require_GET
+def search_view(request: HttpRequest) -> JsonResponse:
+    """Search institutions, fonds and inventory lists.
+
+    Query parameters are 'q' with words to search, optional 'project'
+    id, 'kind' ('institution', 'fond' or 'inventory'), 'limit' and
+    'cursor', which is 'next' value of previous page. Project with
+    its own database is searched in that database. Index of every
+    database has its own row ids and ranks, so when projects have
+    their own databases, 'project' is required.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    try:
+        project = int(request.GET['project']) if request.GET.get('project') else None
+        if project is None and attached_databases():
+            raise ValueError(SEARCH_PROJECT_REQUIRED)
+        limit = min(max(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+        results, next_cursor = search(request.GET.get('q', ''), project=project,
+                                      kind=request.GET.get('kind') or None,
+                                      after=request.GET.get('cursor') or None, limit=limit,
+                                      using=project_database(project))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse({'results': results, 'next': next_cursor})